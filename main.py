@@ -1,9 +1,6 @@
 import os
-import time
 from dotenv import load_dotenv
 
-from src.engine.backtester import Backtester
-from src.engine.skalpit import Skalpit
 from src.engine.strategy import strategy
 
 if __name__ == '__main__':
@@ -13,14 +10,24 @@ if __name__ == '__main__':
     args = argv[2:]
 
     load_dotenv()
-    symbol = os.getenv("SYMBOL")
+    # SYMBOL may list several symbols, e.g. BTCUSD,ETHUSD
+    symbols = os.getenv("SYMBOL", "BTCUSD").split(',')
+    symbol = symbols[0]
     api_key = os.getenv("BYBIT_PUBLIC_TRADE")
     secret = os.getenv("BYBIT_SECRET_TRADE")
 
+    # engines are imported once chosen, so a run only loads its own dependencies
     if engine == "skalpit":
-        Skalpit(api_key = api_key, secret = secret, symbol = symbol, strategy = strategy, args = args)
+        from src.engine.skalpit import Skalpit
+        Skalpit(api_key = api_key, secret = secret, symbols = symbols, strategy = strategy, args = args)
     elif engine == "backtester":
-        Backtester(api_key = api_key, secret = secret, symbol = symbol, strategy = strategy, args = args)
+        from src.engine.backtester import Backtester
+        Backtester(api_key = api_key, secret = secret, symbol = symbol, symbols = symbols, strategy = strategy, args = args)
+    elif engine == "replay":
+        from src.engine.replay import Replay
+        replay = Replay(args[0], strategy, symbols = symbols, speed = float(args[1]) if len(args) > 1 else None)
+        replay.run()
+        print(f"replayed {replay.frames} frames, rest calls: {[name for name, _ in replay.restclient.calls]}")
     else:
-        print(f"engine {engine} is invalid. Use skalpit or backtester")
+        print(f"engine {engine} is invalid. Use skalpit, backtester or replay")
         exit(1)
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+SIDES = {'long': 1, 'short': -1}
+SIDE_NAMES = {1: 'long', -1: 'short'}
+
+TRADE_DTYPE = np.dtype([
+    ('side', np.int8),
+    ('entry', np.float64),
+    ('stop', np.float64),
+    ('tp', np.float64),
+    ('initialstop', np.float64),
+    ('risk', np.float64),
+    ('size', np.float64),
+    ('pnl', np.float64),
+    ('opentimestamp', np.int64),
+    ('closetimestamp', np.int64),
+    ('exit', np.float64),
+    ('stopped', np.bool_),
+    ('partials', np.int16),
+    ('profit', np.float64),
+    ('percent', np.float64),
+    ('before', np.float64),
+    ('after', np.float64),
+    # empty for a single symbol backtest
+    ('symbol', 'S12'),
+])
+
+def _value(x):
+    """Missing prices are NaN and missing timestamps 0 in the ledger, None in a trade dict"""
+    x = x.item()
+    if isinstance(x, float) and np.isnan(x):
+        return None
+    return x
+
+class TradeLedger():
+    """Closed trades as rows of a growable structured array, 128 bytes per trade
+
+    Indexing and iteration give the trade dicts ``TestAccount`` used to keep, so code
+    reading ``trades[i]['result']['profit']`` keeps working. Reporting should use the
+    columns (``array``, ``frame``, ``summary``) instead.
+    """
+
+    def __init__(self, capacity = 1024):
+        self.data = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def array(self):
+        return self.data[:self.count]
+
+    def append(self, trade):
+        result = trade['result']
+        if self.count == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros(len(self.data), dtype=TRADE_DTYPE)])
+        row = self.data[self.count]
+        row['side'] = SIDES[trade['side']]
+        for name in ['entry', 'stop', 'tp', 'risk', 'size', 'pnl', 'exit']:
+            row[name] = np.nan if trade.get(name) is None else trade[name]
+        row['initialstop'] = np.nan if trade['meta']['initialstop'] is None else trade['meta']['initialstop']
+        row['opentimestamp'] = trade.get('opentimestamp') or 0
+        row['closetimestamp'] = trade.get('closetimestamp') or 0
+        row['partials'] = len(trade.get('takeprofits', []))
+        row['stopped'] = bool(result['stopped'])
+        row['profit'] = result['profit']
+        row['percent'] = result['percent']
+        row['before'] = result['balance']['before']
+        row['after'] = result['balance']['after']
+        row['symbol'] = trade.get('symbol') or ''
+        self.count += 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(f"trade {i} out of range")
+        row = self.data[i]
+        timestamp = lambda name: int(row[name]) or None
+        return {
+            "side": SIDE_NAMES[int(row['side'])],
+            "entry": _value(row['entry']),
+            "stop": _value(row['stop']),
+            "tp": _value(row['tp']),
+            "risk": _value(row['risk']),
+            "size": _value(row['size']),
+            "pnl": _value(row['pnl']),
+            "opentimestamp": timestamp('opentimestamp'),
+            "closetimestamp": timestamp('closetimestamp'),
+            "exit": _value(row['exit']),
+            "result": {
+                "stopped": bool(row['stopped']),
+                "exit": _value(row['exit']),
+                "profit": _value(row['profit']),
+                "percent": _value(row['percent']),
+                "balance": { "before": _value(row['before']), "after": _value(row['after']) }
+            },
+            "meta": { "initialstop": _value(row['initialstop']) },
+            "symbol": row['symbol'].decode() or None
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+    def frame(self):
+        return pd.DataFrame(self.array)
+
+    def summary(self, startbalance):
+        """Totals and ratios of the closed trades in one pass over the columns"""
+        profit = self.array['profit']
+        balance = np.concatenate([[startbalance], self.array['after']])
+        peak = np.maximum.accumulate(balance)
+        wins = profit[profit > 0]
+        losses = profit[profit < 0]
+        n = len(profit)
+        return {
+            "trades": n,
+            "won": len(wins),
+            "lost": len(losses),
+            "even": n - len(wins) - len(losses),
+            "strikerate": len(wins) / n * 100 if n else 0,
+            "balance": balance[-1],
+            "maxdrawdown": ((balance - peak) / peak * 100).min(),
+            "avgwin": wins.mean() if len(wins) else 0,
+            "avgloss": losses.mean() if len(losses) else 0,
+            "profitfactor": wins.sum() / -losses.sum() if len(losses) else np.inf if len(wins) else 0,
+        }
@@ -11,32 +11,36 @@ class LiveAccount(Account):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.orders = {}
+        self.clock = kwargs.get('clock', time.time)
+        self.export_dir = kwargs.get('export_dir', 'trades')
+        self.symbol = kwargs.get('symbol')
 
         self.lasttradeclosed = 1500000000 #random time in the past
         self.lasttradeopened = None
 
     def new_order(self, data):
-        logger.debug(f"new_order: {data}")
+        logger.debug("new_order: %s", data)
         oid = data.get('order_id')
         self.orders[oid] = data
 
     def position_update(self, data):
-        logger.debug(f"position_update: {data}")
+        logger.debug("position_update: %s", data)
         size = data.get('size')
-        if size == 0 and not self.trade == None and int(time.time()) - self.lasttradeopened > 5:
+        if size == 0 and not self.trade == None and int(self.clock()) - self.lasttradeopened > 5:
             self._close(data)
             self.export_position()
             self.trades.append(self.trade)
             self.trade = None
         else:
             self.trade = data
-        logger.info(f"position_update: balance {self.balance}, daily won {self.dailywon}, dailylost = {self.dailylost}, dailytrades = {self.dailytrades}")
+        logger.info("position_update: balance %s, daily won %s, dailylost = %s, dailytrades = %s", self.balance, self.dailywon, self.dailylost, self.dailytrades)
 
     def export_position(self):
         logger.debug(f"export_position")
-        timestamp = int(time.time())
+        timestamp = int(self.clock())
         try:
-            with open(f'trades/trade-{timestamp}', 'w') as outfile:
+            name = f'trade-{self.symbol}-{timestamp}' if self.symbol else f'trade-{timestamp}'
+            with open(f'{self.export_dir}/{name}', 'w') as outfile:
                 json.dump({
                     "trade": dict(self.trade),
                     "orders": dict(self.orders)
@@ -49,14 +53,14 @@ class LiveAccount(Account):
                 """)
 
     def order_executed(self, data):
-        logger.debug(f"order_executed: {data}")        
+        logger.debug("order_executed: %s", data)        
         oid = data.get('order_id')
         self.orders[oid] = data
 
     def open(self, risk, price, stop):
         self.dailytrades += 1
         self.closed = False
-        self.lasttradeopened = int(time.time())
+        self.lasttradeopened = int(self.clock())
         return int(self._size_by_stop_risk( risk, price, stop ))
 
     def _close(self, data):                
@@ -87,8 +91,8 @@ class LiveAccount(Account):
             self.dailyeven+=1
             self.totaleven+=1
 
-        self.lasttradeclosed = int(time.time())
-        self.trade["closetimestamp"] = int(time.time())
+        self.lasttradeclosed = int(self.clock())
+        self.trade["closetimestamp"] = int(self.clock())
         self.trade["result"] = {
             "profit": f"{pnl:.8f}",
             "percent": f"{percent( startbal, self.balance ):.2f}",
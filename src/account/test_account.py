@@ -1,7 +1,9 @@
 import logging
 
 from src.account.account import Account
+from src.account.ledger import TradeLedger
 from src.utils.utils import get_logger, timestamp_to_date, sameday, percent, date_to_seconds
+from src.utils.log import LazyDate
 
 logger = get_logger(logging.getLogger(__name__), 'logs/test-account.log', logging.DEBUG)
 
@@ -9,17 +11,21 @@ class TestAccount(Account):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.lasttradeclosed = 0
+        self.trades = TradeLedger()
 
     def getResult(self):
+        summary = self.trades.summary(self.startbalance)
         return {
-            "trades": len(self.trades),
-            "strikerate": f'{(self.totalwon / len(self.trades) * 100):.2f}%',
+            "trades": summary["trades"],
+            "strikerate": f'{summary["strikerate"]:.2f}%',
             "balance": self.balance,
             "growth": f'{percent(self.startbalance, self.balance):.2f}%',
-            "maxdrawdown": f'{self.maxdrawdown:.2f}%',
-            "won": self.totalwon,
-            "lost": self.totallost,
-            "even": self.totaleven,
+            "maxdrawdown": f'{summary["maxdrawdown"]:.2f}%',
+            "won": summary["won"],
+            "lost": summary["lost"],
+            "even": summary["even"],
+            "profitfactor": f'{summary["profitfactor"]:.2f}',
         }
 
     def get_last_trade(self):
@@ -43,7 +49,7 @@ class TestAccount(Account):
         
         self.balance += pnl
 
-        self.trade.takeprofits.append({
+        self.trade["takeprofits"].append({
             "timestamp": timestamp,
             "price": price,
             "portion": portion,
@@ -52,9 +58,10 @@ class TestAccount(Account):
         })
 
 
-    def open(self, side, price, stop = None, tp = None, risk = 5, is_maker = False, timestamp = None ):
+    def open(self, side, price, stop = None, tp = None, risk = 5, is_maker = False, timestamp = None, symbol = None ):
 
         self.dailytrades += 1
+        self.closed = False
 
         size = self._size_by_stop_risk( risk, price, stop ) if stop else ( self.balance * ( risk / 100 ) )
         
@@ -77,12 +84,13 @@ class TestAccount(Account):
             "opentimestamp": timestamp,
             "closetimestamp": None,
             "result": {},
-            "meta": { "initialstop": stop }
+            "meta": { "initialstop": stop },
+            "symbol": symbol
         }
 
     def close( self, price, is_maker = True, timestamp = None):
-        logger.info(f"close: {price}, is_maker = {is_maker}")
-        logger.info(f"close: active trade: {self.trade}")
+        logger.info("close: %s, is_maker = %s", price, is_maker)
+        logger.debug("close: active trade: %s", self.trade)
         
         if not self.trade:
             logger.debug("close: nothing to close")
@@ -115,7 +123,8 @@ class TestAccount(Account):
 
         self.balance += pnl
 
-        self.closed = True        
+        self.closed = True
+        self.lasttradeclosed = timestamp if timestamp else 0
         self.won = pnl > 0
         self.lost = pnl < 0
         self.even = pnl == 0
@@ -166,7 +175,6 @@ class TestAccount(Account):
         self.lastbardate = timestamp
 
         self.stopped = False
-        self.closed = False
         self.lost = False
         self.won = False
         self.even = False
@@ -176,17 +184,17 @@ class TestAccount(Account):
         
         if self.trade["side"] == 'long':
             if float(kline["Low"]) <= self.trade["stop"]:
-                logger.info(f"{timestamp_to_date(timestamp).strftime('%Y-%m-%d %H:%M:%S.%d')}: close LONG at SL")
+                logger.info("%s: close LONG at SL", LazyDate(timestamp))
                 self.stopped = True
                 self._close_position( self.trade["stop"], is_maker = False, timestamp = timestamp )
             elif float(kline["High"]) >= self.trade["tp"]:
-                logger.info(f"{timestamp_to_date(timestamp).strftime('%Y-%m-%d %H:%M:%S.%d')}: close LONG at TP")
+                logger.info("%s: close LONG at TP", LazyDate(timestamp))
                 self._close_position( self.trade["tp"], is_maker = True, timestamp = timestamp )
         elif self.trade["side"] == 'short':
             if float(kline["High"]) >= self.trade["stop"]:
-                logger.info(f"{timestamp_to_date(timestamp).strftime('%Y-%m-%d %H:%M:%S.%d')}: close SHORT at SL")
+                logger.info("%s: close SHORT at SL", LazyDate(timestamp))
                 self.stopped = True
                 self._close_position( self.trade["stop"], is_maker = False, timestamp = timestamp )
             elif float(kline["Low"]) <= self.trade["tp"]:
-                logger.info(f"{timestamp_to_date(timestamp).strftime('%Y-%m-%d %H:%M:%S.%d')}: close SHORT at TP")
+                logger.info("%s: close SHORT at TP", LazyDate(timestamp))
                 self._close_position( self.trade["tp"], is_maker = True, timestamp = timestamp )
@@ -1,15 +1,24 @@
 import os
+import json
+import numpy as np
 import pandas as pd
 import time
 from datetime import datetime
 import logging
 
-from src.utils.constants import PATH_HIST_KLINES
 from src.account.test_account import TestAccount
-from src.utils.chart import Chart
+from src.utils.report import Report
 from src.engine.engine import Engine
-from src.engine.bybit_rest import BybitRest
-from src.utils.utils import get_logger, interval_bybit_notation, date_to_seconds
+from src.engine.vectorized import VectorizedExecutor
+from src.engine.sweep import Sweep
+from src.engine.walk_forward import WalkForward, parse_windows
+from src.engine.portfolio import Portfolio, breakdown
+from src.engine.kline_downloader import KlineDownloader
+from src.utils.kline_store import KlineStore
+from src.utils.resample import resampler
+from src.utils.time_range import select_range
+from src.utils.indicators import configure_cache
+from src.utils.utils import get_logger, date_to_seconds
 
 logger = get_logger(logging.getLogger(__name__), 'logs/backtester.log', logging.DEBUG)
 
@@ -17,29 +26,54 @@ class Backtester(Engine):
     def __init__(self, *args, **kwargs):
         super().__init__(strategy =  kwargs.get('strategy'), symbol = kwargs.get('symbol'))
 
+        # several symbols are run as a portfolio against one balance
+        self.symbols = list(kwargs.get('symbols') or [self.symbol])
+
+        #setup account
+        self.account = TestAccount(startbalance = 1)
+        self.rowwise = False
+
+        if kwargs.get('testmode'):
+            return
+
         api_key = kwargs.get('api_key')
         secret = kwargs.get('secret')
-        
+
+        # only a backtest downloading klines needs the REST client, testmode runs never load it
+        from src.engine.bybit_rest import BybitRest
         self.bybit = BybitRest(api_key = api_key, secret = secret, symbol = self.symbol)
+        self.store = KlineStore()
+        if os.getenv('INDICATOR_CACHE_DIR'):
+            configure_cache(path = os.getenv('INDICATOR_CACHE_DIR'))
 
         self.start_ts = date_to_seconds(kwargs.get('args')[0])
         self.end_ts = date_to_seconds(kwargs.get('args')[1])
-
-        #setup account
-        self.account = TestAccount(startbalance = 1)
+        flags = kwargs.get('args')[2:]
+        self.rowwise = '--rowwise' in flags
+        if '--sweep' in flags or '--walk-forward' in flags:
+            # a sweep or walk-forward runs on the first symbol
+            self.symbols = [self.symbol]
 
         #aggregate klines
         tic = time.perf_counter()
-        kline_dict = self.aggregate_local_and_hist_klines('BTCUSD', ['1h', '15m', '1m'])
-
-        # constructing working set
-        self.klines['1m'] = kline_dict['1m'].loc[[x for x in range(self.start_ts, self.end_ts, 60)]]
-        self.klines['15m'] = kline_dict['15m'].loc[[x for x in range(self.start_ts, self.end_ts, 900)]]
-        self.klines['1h'] = kline_dict['1h'].loc[[x for x in range(self.start_ts, self.end_ts, 3600)]]
-
+        working_sets = {symbol: self._working_set(symbol) for symbol in self.symbols}
+        self.klines = working_sets[self.symbol]
         toc = time.perf_counter()
         print(f"aggregate klines: {toc-tic:.4f}")
 
+        if len(self.symbols) > 1:
+            self.portfolio(working_sets)
+            return
+
+        if '--sweep' in flags:
+            self.sweep(flags[flags.index('--sweep') + 1], report = '--report' in flags)
+            return
+
+        if '--walk-forward' in flags:
+            grid = flags[flags.index('--grid') + 1] if '--grid' in flags else None
+            self.walk_forward(flags[flags.index('--walk-forward') + 1], grid)
+            return
+
         tic = time.perf_counter()
         table = self._get_indis()
         toc = time.perf_counter()
@@ -53,39 +87,129 @@ class Backtester(Engine):
         logger.info(self.account.getResult())
         print(self.account.getResult())
 
-        chart = Chart(account = self.account, risk = self.risk)
+        self.report(self.symbol)
+
+    def report(self, label):
+        """Chart the account's equity and drawdown to reports/<run>/<label>.png"""
+        report = Report()
+        report.account(label, self.account, title = f"{label} risk: {self.risk}")
+        for path in report.close():
+            print(f"report: {path}")
+
+    def _working_set(self, symbol):
+        """Klines of ``symbol`` for the backtest range, higher timeframes are derived from 1m"""
+        kline_dict = self.aggregate_local_and_hist_klines(symbol, ['1m'])
+        klines = {}
+        klines['1m'], gaps = select_range(kline_dict['1m'], self.start_ts, self.end_ts, 60)
+        self._report_gaps(gaps, symbol)
+        for interval in self._intervals():
+            klines[interval] = resampler.resample(klines['1m'], interval)
+        return klines
+
+    def portfolio(self, working_sets):
+        """Run every symbol against one shared balance, see ``Portfolio``"""
+        tic = time.perf_counter()
+        portfolio = Portfolio.from_klines(self.strategy, working_sets)
+        toc = time.perf_counter()
+        print(f"join indis: {toc-tic:.4f}")
+
+        tic = time.perf_counter()
+        self.account = portfolio.run()
+        toc = time.perf_counter()
+        print(f"execute: {toc-tic:.4f}")
+        logger.info(self.account.getResult())
+        print(self.account.getResult())
+        print(breakdown(self.account).to_string())
+
+        self.report('portfolio')
+
+    def _report_gaps(self, gaps, symbol = None):
+        if not gaps:
+            return
+        missing = sum((end - start) // 60 for start, end in gaps)
+        for start, end in gaps:
+            logger.warning(f"{symbol or self.symbol}: missing 1m klines from {start} to {end}")
+        print(f"{symbol or self.symbol} working set has {len(gaps)} gaps, {missing} 1m klines missing, see logs/backtester.log")
 
     def process_kline(self, row, signals):
         try:
-            if self._check_risk_management():
+            if self._check_risk_management(now = row.name):
                 if self._check_time(row):
                     signal = self._check_signal(row, signals)
 
                     if signal == "long":
                         atr = row['atr']
-                        sl = round(row['Open'] - 1 * atr, 2)
-                        tp = round(row['Open'] + 0.95 * atr, 2)
-                        logger.info(f"{row['Date']}: LONG {row['Open']} SL {sl} TP {tp}")
-                        logger.info(row)
-                        self.account.open('long', row['Open'], sl, tp, self.risk, row.name)
+                        sl = round(row['Open'] - self.strategy.get('sl-atr') * atr, 2)
+                        tp = round(row['Open'] + self.strategy.get('tp-atr') * atr, 2)
+                        logger.info("%s: LONG %s SL %s TP %s", row.name, row['Open'], sl, tp)
+                        logger.debug("%s", row)
+                        self.account.open('long', row['Open'], sl, tp, self.risk, timestamp = row.name)
                     if signal == "short":
                         atr = row['atr']
-                        sl = round(row['Open'] + 1 * atr, 2)
-                        tp = round(row['Open'] - 0.95 * atr, 2)
-                        logger.info(f"{row['Date']}: SHORT {row['Open']} SL {sl} TP {tp}")
-                        logger.info(row)
-                        self.account.open('short', row['Open'], sl, tp, self.risk, row.name)
+                        sl = round(row['Open'] + self.strategy.get('sl-atr') * atr, 2)
+                        tp = round(row['Open'] - self.strategy.get('tp-atr') * atr, 2)
+                        logger.info("%s: SHORT %s SL %s TP %s", row.name, row['Open'], sl, tp)
+                        logger.debug("%s", row)
+                        self.account.open('short', row['Open'], sl, tp, self.risk, timestamp = row.name)
 
             # update account
             self.account.update(row.name, row)
         except Exception as e:
             import traceback
             traceback.print_exc()
-            logger.error(f"error at {row.name}: {e} ")
+            logger.error("error at %s: %s", row.name, e)
 
     def execute_strategy(self, table):
-        table.apply(self.process_kline, axis = 1, signals = self.signals)
+        if self.rowwise:
+            table.apply(self.process_kline, axis = 1, signals = self.signals)
+        else:
+            VectorizedExecutor(self.strategy, self.account).run(table, self.signals)
+
+
+    def sweep(self, filename, report = False):
+        """Run a parameter grid, read from a json file, against the loaded working set
 
+        e.g. {"hma.length": [34, 55], "tp-atr": [0.9, 0.95], "risk": [1, 2]}
+        With ``report`` the equity of every combination is charted, named by its rank.
+        """
+        with open(filename) as f:
+            grid = json.load(f)
+
+        charts = Report(processes = os.cpu_count()) if report else None
+        tic = time.perf_counter()
+        results = Sweep(self.strategy, self.klines).run(grid, report = charts)
+        toc = time.perf_counter()
+        print(f"sweep: {toc-tic:.4f}")
+
+        logger.info(results.to_string())
+        print(results.to_string())
+        if charts is not None:
+            print(f"report: {len(charts.close())} charts in {charts.directory}")
+        return results
+
+    def walk_forward(self, spec, filename = None):
+        """Score the strategy over rolling '<train days>:<test days>[:<step days>]' windows
+
+        With a json grid (see ``sweep``) every window trades the combination that did
+        best on its train range.
+        """
+        grid = None
+        if filename:
+            with open(filename) as f:
+                grid = json.load(f)
+        train, test, step = parse_windows(spec)
+
+        tic = time.perf_counter()
+        results = WalkForward(self.strategy, self.klines, train, test, step, grid = grid, symbol = self.symbol).run()
+        toc = time.perf_counter()
+        print(f"walk-forward: {toc-tic:.4f}")
+
+        logger.info(results.to_string())
+        print(results.to_string())
+        if len(results.index) and step in (None, test):
+            # the test ranges tile the span, chained they are one out of sample run
+            print(f"test growth compounded: {(results['test_balance'].prod() - 1) * 100:.2f}%")
+        return results
 
     def aggregate_local_and_hist_klines(self, symbol, intervals):
         """Aggregate local klines with bybit klines
@@ -98,38 +222,11 @@ class Backtester(Engine):
         result = {}
 
         for interval in intervals:
-            filename = PATH_HIST_KLINES[interval]
-            file_klines = pd.DataFrame()
-
-            request_begin = strat_begin = self.start_ts - 300000
-            write_mode = 'w'
-
-            try:
-                file_klines = pd.read_csv(filename, index_col=0, names = ["Open","High","Low","Close","Volume","TurnOver","Date"])
-                file_klines.loc[:,'Date'] = [datetime.fromtimestamp(i).strftime('%Y-%m-%d %H:%M:%S.%d')[:-3] for i in file_klines.index]
-                newest = file_klines.tail(1).index[0]
-                oldest = file_klines.head(1).index[0]
-                if oldest - strat_begin > interval_bybit_notation(interval) * 60:
-                    request_begin = strat_begin
-                    write_mode = 'w'
-                    file_klines = pd.DataFrame()
-                else:
-                    request_begin = int(newest) + interval_bybit_notation(interval) * 60
-                    write_mode = 'a'
-            except FileNotFoundError as err:
-                pass
-
-            bybit_klines = pd.DataFrame()
-            if request_begin < int(datetime.now().timestamp()):
-                output_data = self.bybit.get_hist_klines(symbol, interval_bybit_notation(interval), str(request_begin))
-                column_data = [i[1:] for i in output_data]
-                index = [int(i[0]) for i in output_data]
-                # convert to data frame
-                bybit_klines = pd.DataFrame(column_data, index = index, columns=['Open', 'High', 'Low', 'Close', 'Volume', 'TurnOver'])
-                bybit_klines.loc[:,'Date'] = [datetime.fromtimestamp(i).strftime('%Y-%m-%d %H:%M:%S.%d')[:-3] for i in bybit_klines.index]
-
-                bybit_klines.to_csv(filename, header = False,  mode=write_mode)
-
-            result[interval] = pd.concat([file_klines, bybit_klines]) if not len(bybit_klines.index) == 0 else file_klines
+            strat_begin = self.start_ts - 300000
+            # only the holes of the coverage index are fetched
+            downloader = KlineDownloader(self.bybit, symbol, interval, store = self.store)
+            downloader.backfill(strat_begin, min(self.end_ts, int(datetime.now().timestamp())))
+
+            result[interval] = self.store.load(symbol, interval, strat_begin, self.end_ts)
 
         return result
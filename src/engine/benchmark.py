@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import numpy as np
+import pandas as pd
+
+from src.account.test_account import TestAccount
+from src.engine.backtester import Backtester
+from src.engine.strategy import strategy as default_strategy
+from src.utils import indicators
+from src.utils.kline_store import KlineStore, COLUMNS
+from src.utils.resample import resampler
+from src.utils.time_range import select_range
+
+STAGES = ('load', 'indicators', 'join', 'execute')
+# what main.py imports for every engine, run by a fresh interpreter
+STARTUP = {
+    'main': 'import main',
+    'backtester': 'import main, src.engine.backtester',
+    'skalpit': 'import main, src.engine.skalpit',
+    'replay': 'import main, src.engine.replay',
+}
+# third party packages slow enough to import that it matters which engine loads them
+HEAVY = ('numpy', 'pandas', 'requests', 'websockets', 'dateparser', 'matplotlib', 'pandas_ta')
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# history loaded ahead of the working set to warm up the indicators, as in the backtester
+WARMUP = 300000
+
+def synthetic_ohlcv(days, seed = 11, start = 1609459200):
+    """Deterministic random walk of ``days`` of 1m klines, in ``COLUMNS`` order"""
+    rng = np.random.default_rng(seed)
+    n = days * 1440
+    index = np.arange(n, dtype=np.int64) * 60 + start
+    close = 30000 + np.cumsum(rng.normal(0, 15, n))
+    opens = np.concatenate([[close[0]], close[:-1]])
+    return pd.DataFrame({
+        'Open': opens,
+        'High': np.maximum(opens, close) + rng.uniform(0, 20, n),
+        'Low': np.minimum(opens, close) - rng.uniform(0, 20, n),
+        'Close': close,
+        'Volume': rng.uniform(1e5, 1e6, n),
+        'TurnOver': rng.uniform(1, 10, n),
+    }, index = index)
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Benchmark():
+    """Times the backtester stages on synthetic klines read back from a KlineStore
+
+    Every stage runs ``repeat`` times untraced for its timings, then once more under
+    tracemalloc for its peak memory, so tracing does not inflate the timings.
+    """
+
+    def __init__(self, days = 365, strategy = default_strategy, repeat = 5, seed = 11, rowwise = False):
+        self.days = days
+        self.strategy = strategy
+        self.repeat = repeat
+        self.seed = seed
+        self.rowwise = rowwise
+        self.symbol = 'BTCUSD'
+
+    def _stages(self, bt, store, start, end):
+        """(name, callable) in pipeline order, each stage feeds the next through ``state``"""
+        state = {}
+
+        def load():
+            frame = store.load(self.symbol, '1m', start - WARMUP, end)
+            bt.klines['1m'], _ = select_range(frame, start, end, 60)
+            for interval in bt._intervals():
+                bt.klines[interval] = resampler.resample(bt.klines['1m'], interval)
+
+        def calc():
+            # a warm cache would time dictionary lookups
+            indicators.cache.clear()
+            state['indis'] = bt._calc_indis(self.strategy.get('signal'), self.strategy.get('atr'))
+
+        def join():
+            state['table'] = bt._join_indis(state['indis'])
+
+        def execute():
+            bt.account = TestAccount(startbalance = 1)
+            bt.execute_strategy(state['table'])
+
+        return list(zip(STAGES, [load, calc, join, execute]))
+
+    def run(self):
+        frame = synthetic_ohlcv(self.days, seed = self.seed)
+        start, end = int(frame.index[0]), int(frame.index[-1]) + 60
+        bt = Backtester(strategy = self.strategy, symbol = self.symbol, testmode = True)
+        bt.rowwise = self.rowwise
+        stages = {name: {'seconds': []} for name in STAGES}
+
+        with tempfile.TemporaryDirectory() as root:
+            store = KlineStore(root = root)
+            store.write(self.symbol, '1m', frame.index, frame[COLUMNS].to_numpy())
+            pipeline = self._stages(bt, store, start, end)
+
+            for _ in range(self.repeat):
+                for name, stage in pipeline:
+                    tic = time.perf_counter()
+                    stage()
+                    stages[name]['seconds'].append(time.perf_counter() - tic)
+
+            tracemalloc.start()
+            try:
+                for name, stage in pipeline:
+                    tracemalloc.reset_peak()
+                    base = tracemalloc.get_traced_memory()[0]
+                    stage()
+                    stages[name]['peak_mb'] = round((tracemalloc.get_traced_memory()[1] - base) / 2**20, 3)
+            finally:
+                tracemalloc.stop()
+
+        for row in stages.values():
+            seconds = row.pop('seconds')
+            row.update({'min': round(min(seconds), 6), 'median': round(float(np.median(seconds)), 6)})
+
+        result = bt.account.getResult()
+        return {
+            'meta': {
+                'commit': _commit(),
+                'created': int(time.time()),
+                'days': self.days,
+                'rows': len(frame.index),
+                'repeat': self.repeat,
+                'seed': self.seed,
+                'executor': 'rowwise' if self.rowwise else 'vectorized',
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'machine': platform.machine(),
+            },
+            'stages': stages,
+            # a changed result means the benchmark no longer measures the same work
+            'result': {'trades': int(result['trades']), 'balance': round(float(result['balance']), 8)},
+        }
+
+def startup(repeat = 5):
+    """Wall time of a fresh interpreter importing what ``main.py`` loads for every engine
+
+    Stages are named 'startup <engine>', like the stages of ``Benchmark.run``, so
+    ``compare`` works on both. The result lists the ``HEAVY`` packages each loaded.
+    """
+    probe = "import sys; {}; print(','.join(m for m in {!r} if m in sys.modules))"
+    stages, modules = {}, {}
+    for engine, code in STARTUP.items():
+        seconds = []
+        for _ in range(repeat):
+            tic = time.perf_counter()
+            out = subprocess.run([sys.executable, '-c', probe.format(code, HEAVY)], cwd = ROOT, capture_output = True, text = True, check = True)
+            seconds.append(time.perf_counter() - tic)
+        stages[f'startup {engine}'] = {'min': round(min(seconds), 6), 'median': round(float(np.median(seconds)), 6)}
+        modules[engine] = [m for m in out.stdout.strip().split(',') if m]
+    return {
+        'meta': {
+            'commit': _commit(),
+            'created': int(time.time()),
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'stages': stages,
+        # a heavy package showing up for an engine is worth a look even within the tolerance
+        'result': {'modules': modules},
+    }
+
+def compare(baseline, current, tolerance = 0.2):
+    """Stage by stage change between two benchmark results
+
+    Returns rows of {stage, metric, before, after, change}; ``regression`` is set when a
+    metric grew by more than ``tolerance``. Timings are compared on their min.
+    """
+    rows = []
+    for stage in baseline['stages']:
+        before, after = baseline['stages'].get(stage), current['stages'].get(stage)
+        if before is None or after is None:
+            continue
+        for metric in ('min', 'peak_mb'):
+            b, a = before.get(metric), after.get(metric)
+            if b is None or a is None:
+                continue
+            change = (a - b) / b if b else 0.0
+            rows.append({'stage': stage, 'metric': metric, 'before': b, 'after': a, 'change': round(change, 4), 'regression': change > tolerance})
+    return rows
+
+def _main(argv):
+    parser = argparse.ArgumentParser(prog = 'python -m src.engine.benchmark', description = 'Backtester benchmark on synthetic klines')
+    parser.add_argument('--days', type = int, default = 365)
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--seed', type = int, default = 11)
+    parser.add_argument('--rowwise', action = 'store_true', help = 'time the row by row executor')
+    parser.add_argument('--startup', action = 'store_true', help = 'time the engines\' imports instead')
+    parser.add_argument('--out', help = 'write the result to this json file')
+    parser.add_argument('--compare', help = 'baseline json to compare against, exits with 1 on a regression')
+    parser.add_argument('--tolerance', type = float, default = 0.2)
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        result = startup(repeat = args.repeat)
+        for stage, row in result['stages'].items():
+            engine = stage.split()[-1]
+            print(f"{stage:<20} min {row['min']:.4f}s  median {row['median']:.4f}s  {', '.join(result['result']['modules'][engine])}")
+    else:
+        result = Benchmark(days = args.days, repeat = args.repeat, seed = args.seed, rowwise = args.rowwise).run()
+        for stage, row in result['stages'].items():
+            print(f"{stage:<12} min {row['min']:.4f}s  median {row['median']:.4f}s  peak {row['peak_mb']:.1f}MB")
+        print(f"{result['meta']['rows']} klines, {result['result']['trades']} trades")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok = True)
+        with open(args.out, 'w') as outfile:
+            json.dump(result, outfile, indent = 1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['result'] != result['result']:
+            print(f"results differ from the baseline: {baseline['result']} -> {result['result']}")
+        rows = compare(baseline, result, args.tolerance)
+        for row in rows:
+            flag = '  REGRESSION' if row['regression'] else ''
+            print(f"{row['stage']:<20} {row['metric']:<8} {row['before']:>10.4f} -> {row['after']:>10.4f} {row['change']:+.1%}{flag}")
+        if any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
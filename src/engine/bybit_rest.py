@@ -1,22 +1,17 @@
-import hashlib
-import hmac
 import json
 import time
-import urllib.parse
-from collections import deque
-import pandas as pd
-from requests import Request, Session
-from requests.exceptions import HTTPError
+import asyncio
 import logging
 
-from src.utils.utils import get_logger, date_to_seconds
+from src.utils.utils import get_logger, date_to_seconds, interval_from_bybit_notation
+from src.engine.kline_downloader import KlineDownloader
+from src.engine.rest_transport import RestTransport
 
 logger = get_logger(logging.getLogger(__name__), 'logs/bybit-rest.log', logging.DEBUG)
 
 class BybitRest():
     url_main = 'https://api.bybit.com'
     url_test = 'https://api-testnet.bybit.com'
-    headers = {'Content-Type': 'application/json'}
 
     def __init__(self, api_key, secret, symbol, test = False):
         self.api_key = api_key
@@ -24,51 +19,33 @@ class BybitRest():
 
         self.symbol = symbol
     
-        self.s = Session()
-        self.s.headers.update(self.headers)
+        self.transport = RestTransport(self.url_main if not test else self.url_test, api_key, secret)
 
-        self.url = self.url_main if not test else self.url_test
+    @property
+    def url(self):
+        return self.transport.url
+
+    @url.setter
+    def url(self, url):
+        self.transport.url = url
 
     #
     # Http Apis
     #
 
-    def _request(self, method, path, payload):
-        payload['api_key'] = self.api_key
-        payload['timestamp'] = int(time.time() * 1000)
-        payload = dict(sorted(payload.items()))
-        for k, v in list(payload.items()):
-            if v is None:
-                del payload[k]
-
-        param_str = urllib.parse.urlencode(payload)
-        sign = hmac.new(self.secret.encode('utf-8'),
-                        param_str.encode('utf-8'), hashlib.sha256).hexdigest()
-        payload['sign'] = sign
-
-        if method == 'GET':
-            query = payload
-            body = None
-        else:
-            query = None
-            body = json.dumps(payload)
-
-
-        req = Request(method, self.url + path, data=body, params=query)
-        prepped = self.s.prepare_request(req)
-
-        resp = None
-        try:
-            resp = self.s.send(prepped)
-            resp.raise_for_status()
-        except HTTPError as e:
-            print(e)
-
-        try:
-            return resp.json()
-        except json.decoder.JSONDecodeError as e:
-            print('json.decoder.JSONDecodeError: ' + str(e))
-            return resp.text
+    def _request(self, method, path, payload, retries=None):
+        return self.transport.request(method, path, payload, retries=retries)
+
+    def submit(self, name, *args, **kwargs):
+        """Run the api call ``name`` on the transport pool, returns a Future
+
+        e.g. ``rest.submit('get_ticker').result()``
+        """
+        return self.transport.executor.submit(getattr(self, name), *args, **kwargs)
+
+    async def call(self, name, *args, **kwargs):
+        """Awaitable version of the api call ``name``, e.g. ``await rest.call('get_balance', 'BTC')``"""
+        return await asyncio.wrap_future(self.submit(name, *args, **kwargs))
 
     def get_hist_klines(self, symbol, interval, start_str, end_str=None):
         """Get Historical Klines from Bybit 
@@ -83,58 +60,11 @@ class BybitRest():
         :return: list of OHLCV values
         """
 
-        limit = 200
         start_ts = int(date_to_seconds(start_str))
-        end_ts = None
-        if end_str:
-            end_ts = int(date_to_seconds(end_str))
-        else: 
-            end_ts = int(date_to_seconds('now'))
-
-        output_data = []
-        indexes = []
-
-        idx = 0
-        symbol_existed = False
-        while True:
-            # fetch the klines from start_ts up to max 200 entries 
-            temp_dict = self.kline(symbol=symbol, interval=str(interval), _from=start_ts, limit=limit)
-
-            # handle the case where our start date is before the symbol pair listed on Binance
-            if not symbol_existed and len(temp_dict):
-                symbol_existed = True
-
-            if symbol_existed and len(temp_dict) > 0:
-                # extract data and convert to list 
-                temp_data = []
-                for i in temp_dict['result']:
-                    l = list(i.values())[2:]
-                    temp_data += [list(float(k) for k in l)]
+        end_ts = int(date_to_seconds(end_str)) if end_str else int(date_to_seconds('now'))
 
-                output_data += temp_data
-
-                # add timestamps to a different list to create indexes later
-                # temp_data = [int(list(i.values())[2]) for i in temp_dict['result']]
-                # indexes += temp_data
-
-                # move start_ts over by one interval atter the last value in the array
-                # NOTE: current implementation does not support inteval of D/W/M/Y
-                start_ts = temp_dict['result'][len(temp_dict['result'])-1]['open_time'] + interval
-
-            else:
-                # try every interval until data is found
-                start_ts += interval
-
-            idx += 1
-            # if we received less than the required limit, we reached present time, so exit the loop
-            if len(temp_data) < limit:
-                break
-
-            # sleep after every 3rd call to be kind to the API
-            if idx % 3 == 0:
-                time.sleep(0.2)
-
-        return output_data
+        data = KlineDownloader(self, symbol, interval_from_bybit_notation(interval)).download(start_ts, end_ts)
+        return data.tolist()
 
     def get_active_order(self, order_id=None, order_link_id=None, symbol=None,
                          sort=None, order=None, page=None, limit=None,
@@ -257,14 +187,14 @@ class BybitRest():
         payload = {}
         return self._request('GET', '/v2/public/symbols', payload=payload)
 
-    def kline(self, symbol=None, interval=None, _from=None, limit=None):
+    def kline(self, symbol=None, interval=None, _from=None, limit=None, retries=None):
         payload = {
             'symbol': symbol if symbol else self.symbol,
             'interval': interval,
             'from': _from,
             'limit': limit
         }
-        return self._request('GET', '/v2/public/kline/list', payload=payload)
+        return self._request('GET', '/v2/public/kline/list', payload=payload, retries=retries)
 
     def place_active_order(self, symbol=None, side=None, order_type=None,
                               qty=None, price=None, stop_loss = None, reduce_only = "False",
@@ -283,15 +213,16 @@ class BybitRest():
         }
         return self._request('POST', '/v2/private/order/create', payload=payload)
 
-    def cancel_active_order(self, order_id=None):
+    def cancel_active_order(self, order_id=None, symbol=None):
         payload = {
+            'symbol': symbol if symbol else self.symbol,
             'order_id': order_id
         }
         return self._request('POST', '/v2/private/order/cancel', payload=payload)
 
-    def cancel_active_orders_all(self):
+    def cancel_active_orders_all(self, symbol=None):
         payload = {
-            'symbol': self.symbol
+            'symbol': symbol if symbol else self.symbol
         }
         return self._request('POST', '/v2/private/order/cancelAll', payload=payload)
 
@@ -4,14 +4,16 @@ import sys
 import time
 import threading
 import asyncio
-import pandas as pd
 import json
 from collections import deque
 import websockets
 import logging
 
-from src.engine.bybit_rest import BybitRest
+from src.engine.order_book import OrderBook
+from src.engine.dispatcher import Dispatcher, peek_topic
+from src.engine.latency import correlation_id
 from src.utils.utils import get_logger, date_to_seconds
+from src.utils.log import Sampler
 
 logger = get_logger(logging.getLogger(__name__), 'logs/bybit-ws.log', logging.DEBUG)
 
@@ -19,13 +21,18 @@ class BybitWs():
     ws_url_main = 'wss://stream.bybit.com/realtime'
     ws_url_test = 'wss://stream-testnet.bybit.com/realtime'
 
-    def __init__(self, api_key, secret, symbol, callback = None, restclient = None, ws=True, test=False):
+    def __init__(self, api_key, secret, symbol, callback = None, restclient = None, ws=True, test=False, recorder = None, latency = None, symbols = None):
         self.api_key = api_key
         self.secret = secret
 
-        self.symbol = symbol
+        # one connection serves every symbol, ``symbol`` is the default of the getters
+        self.symbols = list(symbols or [symbol])
+        self.symbol = self.symbols[0]
         self.callback = callback
         self.restclient = restclient
+        self.recorder = recorder
+        self.latency = latency
+        self.sample_frames = Sampler(100)
 
         self.ping_timeout = 10
         self.sleep_time = 5
@@ -33,21 +40,33 @@ class BybitWs():
     
         self.ws_url = self.ws_url_main if not test else self.ws_url_test        
 
+        self.ws_data = {
+            'position': deque(maxlen=200),
+            'execution': deque(maxlen=200),
+            'order': deque(maxlen=200),
+            'stop_order': deque(maxlen=200),
+            'klines': {}
+            }
+        for s in self.symbols:
+            self.ws_data[f'trade.{s}'] = deque(maxlen=200)
+            self.ws_data[f'instrument_info.100ms.{s}'] = {}
+            self.ws_data[f'orderBookL2_25.{s}'] = OrderBook()
+            self.ws_data['klines'][s] = {'1m': deque(maxlen=6000)}
+
+        self.routes = Dispatcher({
+            'orderBookL2_25': self._on_ws_orderbook,
+            'execution': self._on_ws_execution,
+            'order': self._on_ws_order,
+            'stop_order': self._on_ws_stop_order,
+            'instrument_info': self._on_ws_instrumentinfo,
+            'trade': self._on_ws_trade,
+            'position': self._on_ws_position,
+            'klineV2': lambda message: self._on_ws_kline(message['topic'], message['data']),
+        })
+
+        self.auth_confirmed = False
+        # without ws the instance is only driven through _on_message, e.g. by a replay
         if ws:
-            self.ws_data = {f'trade.{self.symbol}': deque(maxlen=200), 
-                f'instrument_info.100ms.{self.symbol}': {},
-                f'orderBookL2_25.{self.symbol}': pd.DataFrame(),
-                'position': deque(maxlen=200),
-                'execution': deque(maxlen=200),
-                'order': deque(maxlen=200),
-                'klines': {
-                    '1m': deque(maxlen=2000),
-                    '15m': deque(maxlen=2000),
-                    '1h': deque(maxlen=2000)
-                }
-                }
-
-            self.auth_confirmed = False
             self._connect()
             
     def _connect(self):
@@ -131,60 +150,68 @@ class BybitWs():
                                          'execution',
                                          'order',
                                          'stop_order',
-                                         f'klineV2.1.{self.symbol}',
-                                         f'klineV2.15.{self.symbol}',
-                                         f'klineV2.60.{self.symbol}',
-                                         ]}))        
+                                         ] + [f'klineV2.1.{s}' for s in self.symbols]}))
 
     async def _on_message(self, message):
-        logger.debug(f"_on_message: {message}")        
+        if self.recorder is not None:
+            self.recorder.record(message)
+        if self.sample_frames():
+            logger.debug("_on_message: %s", message)
         try:
-            message = json.loads(message)
-            if message.get('success') and message.get('request', {}).get('op') == 'auth':
-                self.callback(topic = "auth", data = {"success": True})
-                self.auth_confirmed = True
-            if message.get('topic'):
-                topic = message.get('topic')
-
-                if 'orderBookL2_25' in topic:
-                    self._on_ws_orderbook(message)            
-                elif 'execution' in topic:
-                    self._on_ws_execution(message)
-                elif 'order' in topic:
-                    self._on_ws_order(message)
-                elif 'instrument_info' in topic:
-                    self._on_ws_instrumentinfo(message)
-                elif 'trade' in topic:
-                    self._on_ws_trade(message)
-                elif 'position' in topic:
-                    self._on_ws_position(message)
-                elif 'kline' in topic:
-                    self._on_ws_kline(topic, message['data'])
+            if isinstance(message, bytes):
+                message = message.decode('utf-8')
+            topic = peek_topic(message)
+            if topic is None:
+                self._on_response(json.loads(message))
+                return
+            # frames of topics without a handler are not decoded
+            handler = self.routes.route(topic)
+            if handler is not None:
+                handler(json.loads(message))
         except Exception as err:
             import traceback
             traceback.print_exc()
             logger.error(f"_on_message: {err}")
             sys.exit()
 
+    def _on_response(self, message):
+        if message.get('success') and message.get('request', {}).get('op') == 'auth':
+            self.callback(topic = "auth", data = {"success": True})
+            self.auth_confirmed = True
+
+    # private topics are account wide, a frame may hold entries of several symbols
+
     def _on_ws_execution(self, message):
-        self.ws_data['execution'].append(message['data'][0])     
-        self.callback(topic = f"execution", data = message.get('data')[0])
+        for data in message['data']:
+            self.ws_data['execution'].append(data)
+            self.callback(topic = "execution", data = data)
 
     def _on_ws_order(self, message):
-        self.ws_data['order'].append(message['data'][0])
-        self.callback(topic = f"order", data = message.get('data')[0])
+        for data in message['data']:
+            self.ws_data['order'].append(data)
+            self.callback(topic = "order", data = data)
+
+    def _on_ws_stop_order(self, message):
+        for data in message['data']:
+            self.ws_data['stop_order'].append(data)
+            self.callback(topic = "stop_order", data = data)
 
     def _on_ws_instrumentinfo(self, message):
-        self.ws_data['position'].append(message)
-        self.ws_data[f'instrument_info.100ms.{self.symbol}'].append(message['data'][0])            
+        data = message['data']
+        info = self.ws_data[message['topic']]
+        if message.get('type') == 'snapshot':
+            info.update(data)
+        else:
+            for update in data.get('update', []):
+                info.update(update)
 
     def _on_ws_trade(self, message):
-        self.ws_data['trade'].append(message)
-        self.ws_data[f'trade.{self.symbol}'].append(message['data'][0])        
+        self.ws_data[message['topic']].extend(message['data'])
 
     def _on_ws_position(self, message):
         self.ws_data['position'].append(message)
-        self.callback(topic = f"position", data = message.get('data')[0])
+        for data in message['data']:
+            self.callback(topic = "position", data = data)
 
     def _on_ws_kline(self, topic, data):
         try:
@@ -196,7 +223,9 @@ class BybitWs():
                     '60': '1h'
                 }[s]
             
-            interval = get_interval(topic.split('.')[1])
+            _, interval, symbol = topic.split('.')
+            interval = get_interval(interval)
+            klines = self.ws_data['klines'][symbol][interval]
             
             tick = [
                 data['start'],
@@ -207,13 +236,15 @@ class BybitWs():
                 data['volume'],
                 data['turnover']]
 
-            last = self.ws_data['klines'][interval].pop()
+            last = klines.pop()
             if last[0] == tick[0]:
-                self.ws_data['klines'][interval].append(tick)
+                klines.append(tick)
             else:
-                self.ws_data['klines'][interval].append(last)
-                self.ws_data['klines'][interval].append(tick)
-                self.callback(topic = f"kline.{interval}", data = self.ws_data['klines'][interval])
+                klines.append(last)
+                klines.append(tick)
+                if self.latency is not None:
+                    self.latency.begin(correlation_id(last[0], symbol))
+                self.callback(topic = f"kline.{interval}.{symbol}", data = klines)
 
         except Exception as e:
             import traceback
@@ -223,22 +254,7 @@ class BybitWs():
 
 
     def _on_ws_orderbook(self, message):
-        topic = message.get('topic')
-        if message['type'] == 'snapshot':
-            self.ws_data[topic] = pd.io.json.json_normalize(message['data']).set_index('id').sort_index(ascending=False)
-        else: # message['type'] == 'delta'
-            # delete or update or insert
-            if len(message['data']['delete']) != 0:
-                drop_list = [x['id'] for x in message['data']['delete']]
-                self.ws_data[topic].drop(index=drop_list)
-            elif len(message['data']['update']) != 0:
-                update_list = pd.io.json.json_normalize(message['data']['update']).set_index('id')
-                self.ws_data[topic].update(update_list)
-                self.ws_data[topic] = self.ws_data[topic].sort_index(ascending=False)
-            elif len(message['data']['insert']) != 0:
-                insert_list = pd.io.json.json_normalize(message['data']['insert']).set_index('id')
-                self.ws_data[topic].update(insert_list)
-                self.ws_data[topic] = self.ws_data[topic].sort_index(ascending=False)        
+        self.ws_data[message.get('topic')].on_message(message)
 
     def subscribe(self, topic):
         self.ws.send(json.dumps(
@@ -257,19 +273,17 @@ class BybitWs():
         
         return self.ws_data['instrument_info.' + str(self.symbol)]
 
-    def get_orderbook(self, side=None):
-        if not self.ws: return None
-
-        while self.ws_data['orderBookL2_25.' + str(self.symbol)].empty:
+    def get_orderbook(self, side=None, symbol=None):
+        """The OrderBook, or its bids / asks for side 'Buy' / 'Sell'"""
+        book = self.ws_data['orderBookL2_25.' + str(symbol or self.symbol)]
+        while not len(book):
             time.sleep(1.0)
 
         if side == 'Sell':
-            orderbook = self.ws_data['orderBookL2_25.' + str(self.symbol)].query('side.str.contains("Sell")', engine='python')
+            return book.asks
         elif side == 'Buy':
-            orderbook = self.ws_data['orderBookL2_25.' + str(self.symbol)].query('side.str.contains("Buy")', engine='python')
-        else:
-            orderbook = self.ws_data['orderBookL2_25.' + str(self.symbol)]
-        return orderbook
+            return book.bids
+        return book
 
     def get_position(self):
         if not self.ws: return None
@@ -286,15 +300,15 @@ class BybitWs():
         
         return self.ws_data['order']
 
-    def _setup_klines(self):
-        start_ts_1 = int(time.time()) - 86400
-        start_ts_15 = int(time.time()) - 225000
-        start_ts_60 = int(time.time()) - 300000
-        
-        self.ws_data['klines']['1m'] = deque(self.restclient.get_hist_klines(self.symbol, 1, str(start_ts_1)))
-        self.ws_data['klines']['15m'] = deque(self.restclient.get_hist_klines(self.symbol, 15, str(start_ts_15)))
-        self.ws_data['klines']['1h'] = deque(self.restclient.get_hist_klines(self.symbol, 60, str(start_ts_60)))
+    def _setup_klines(self, symbol = None):
+        """Fetch the 1m history of ``symbol``, or of every symbol"""
+        # higher timeframes are derived from 1m, so fetch enough 1m history to warm them up
+        start_ts_1 = int(time.time()) - 300000
+
+        for s in [symbol] if symbol else self.symbols:
+            history = self.restclient.get_hist_klines(s, 1, str(start_ts_1))
+            if self.recorder is not None:
+                self.recorder.record(json.dumps({'symbol': s, 'klines': history}), kind = 'klines')
+            self.ws_data['klines'][s]['1m'] = deque(history, maxlen=6000)
 
-        self.callback(topic = "kline.1h", data = self.ws_data['klines']['1h'])
-        self.callback(topic = "kline.15m", data = self.ws_data['klines']['15m'])
-        self.callback(topic = "kline.1m", data = self.ws_data['klines']['1m'])        
\ No newline at end of file
+            self.callback(topic = f"kline.1m.{s}", data = self.ws_data['klines'][s]['1m'])
@@ -0,0 +1,99 @@
+import json
+import time
+
+def topic_key(topic):
+    """Routing key of a topic, the part before the first dot
+
+    'klineV2.1.BTCUSD' -> 'klineV2', 'kline.1m' -> 'kline', 'stop_order' -> 'stop_order'
+    """
+    return topic.split('.', 1)[0]
+
+def peek_topic(raw):
+    """Topic of a raw json frame without decoding it, None if it has none"""
+    i = raw.find('"topic"')
+    if i < 0:
+        return None
+    start = raw.find('"', i + 7) + 1
+    return raw[start:raw.find('"', start)]
+
+class Dispatcher():
+    """Topic -> handler routing table
+
+    Handlers are registered by exact routing key (see ``topic_key``), so 'order' does
+    not catch 'orderBookL2_25' or 'stop_order'. The handler of every full topic seen
+    is memoized, a frame costs one dict lookup.
+    """
+
+    def __init__(self, handlers = None):
+        self.handlers = dict(handlers or {})
+        self.routes = {}
+
+    def register(self, key, handler):
+        self.handlers[key] = handler
+        self.routes = {}
+
+    def route(self, topic):
+        try:
+            return self.routes[topic]
+        except KeyError:
+            handler = self.routes[topic] = self.handlers.get(topic_key(topic))
+            return handler
+
+    def dispatch(self, topic, *args):
+        """Call the handler of ``topic`` with ``args``, False if there is none"""
+        handler = self.route(topic)
+        if handler is None:
+            return False
+        handler(*args)
+        return True
+
+def _frames(n, symbol = 'BTCUSD'):
+    """A mix of frames like the private and public bybit topics produce"""
+    frames = []
+    for i in range(n):
+        ts = 1614556800 + 60 * (i // 10)
+        kind = i % 5
+        if kind == 0:
+            frames.append({'topic': f'klineV2.1.{symbol}', 'data': [{'start': ts, 'end': ts + 60, 'open': 50000, 'close': 50000.5 + i % 7,
+                'high': 50010, 'low': 49990, 'volume': 1000, 'turnover': 0.02, 'confirm': False, 'cross_seq': i, 'timestamp': ts * 10**6}]})
+        elif kind == 1:
+            frames.append({'topic': f'orderBookL2_25.{symbol}', 'type': 'delta', 'data': {'delete': [], 'insert': [],
+                'update': [{'price': f'{50000 - 0.5 * (i % 25):.1f}', 'symbol': symbol, 'id': i, 'side': 'Buy', 'size': i % 90 + 1}]}})
+        elif kind == 2:
+            frames.append({'topic': f'trade.{symbol}', 'data': [{'timestamp': '2021-03-01T00:00:00.000Z', 'symbol': symbol, 'side': 'Buy',
+                'size': 10, 'price': 50000.5, 'tick_direction': 'PlusTick', 'trade_id': str(i)}]})
+        elif kind == 3:
+            frames.append({'topic': 'stop_order', 'data': [{'stop_order_id': str(i), 'order_status': 'Untriggered', 'symbol': symbol}]})
+        else:
+            frames.append({'topic': 'order', 'data': [{'order_id': str(i), 'order_status': 'New', 'symbol': symbol, 'side': 'Buy', 'qty': 1}]})
+    return [json.dumps(f, separators=(',', ':')) for f in frames]
+
+if __name__ == "__main__":
+    # frames per second through BybitWs._on_message and the Skalpit callback table
+    import asyncio
+    from collections import deque
+    from src.engine.bybit_ws import BybitWs
+    from src.engine.order_book import OrderBook
+
+    n = 200000
+    frames = _frames(n)
+    received = Dispatcher({'kline': lambda topic, data: None, 'order': lambda topic, data: None})
+    ws = BybitWs(None, None, 'BTCUSD', callback = lambda topic, data: received.dispatch(topic, topic, data), ws = False)
+    ws.ws_data['klines']['BTCUSD']['1m'] = deque([[1614556800 - 60, 0, 0, 0, 0, 0, 0]], maxlen=6000)
+    ws.ws_data['orderBookL2_25.BTCUSD'].snapshot([{'price': f'{50000 - 0.5 * i:.1f}', 'side': 'Buy', 'size': 1} for i in range(25)])
+
+    async def run():
+        for frame in frames:
+            await ws._on_message(frame)
+
+    tic = time.perf_counter()
+    asyncio.run(run())
+    toc = time.perf_counter()
+
+    tic_decode = time.perf_counter()
+    for frame in frames:
+        json.loads(frame)
+    toc_decode = time.perf_counter()
+
+    print(f"dispatch: {n / (toc - tic):,.0f} frames/s, {(toc - tic) / n * 1e6:.2f}us per frame")
+    print(f"json.loads alone: {n / (toc_decode - tic_decode):,.0f} frames/s")
@@ -1,10 +1,10 @@
 import time
 import pandas as pd
 import numpy as np
-from datetime import datetime
 
 from src.utils.indicators import calc_indi
-from src.utils.utils import get_logger, start_of_min15, start_of_hour, start_of_hour4, start_of_day, date_to_seconds, interval_bybit_notation
+from src.utils.calendar_index import CalendarIndex
+from src.utils.utils import get_logger, hour_of_day, date_to_seconds, interval_bybit_notation
 
 class Engine():
 
@@ -36,11 +36,17 @@ class Engine():
 
     def _check_time(self, row):
         no_trade_hours = self.strategy.get('no-trade-hours')
-        hour = datetime.fromtimestamp(row.name).hour
-        return not hour in no_trade_hours
+        return not hour_of_day(row.name) in no_trade_hours
 
-    def _check_risk_management(self):
-        return self.account.dailywon < 1 and self.account.dailylost <= 3 and self.account.closed == True and int(time.time()) - self.account.lasttradeclosed > 120
+    def _check_risk_management(self, now = None, account = None):
+        now = int(time.time()) if now is None else now
+        account = account or self.account
+        return account.dailywon < 1 and account.dailylost <= 3 and account.closed == True and now - account.lasttradeclosed > 120
+
+    def _intervals(self):
+        """Kline intervals the strategy's indicators are computed on"""
+        indis = self.strategy.get('signal') + [self.strategy.get('atr')]
+        return sorted({i.get('properties').get('interval') for i in indis})
 
     def _get_indis(self):
         indis = self._calc_indis(self.strategy.get('signal'), self.strategy.get('atr'))        
@@ -50,29 +56,26 @@ class Engine():
         frames = {}
         indis = [s for s in signal] + [atr]
         for indi in indis:
-            interval, result = calc_indi(indi, self.klines)
+            interval, result = calc_indi(indi, self.klines, self.symbol)
             frames[interval] = pd.DataFrame(result) if not interval in frames else pd.concat([frames[interval], result], axis = 1)
 
         return frames
 
     def _join_indis(self, indis):
-        # join indis to 1m klines
-        def htf_1h_ts(row):
-            return row.name - datetime.fromtimestamp(row.name).minute * 60
-
-        def htf_15m_ts(row):
-            return row.name - (datetime.fromtimestamp(row.name).minute - datetime.fromtimestamp(row.name).minute // 15 * 15) * 60
+        # join indis to 1m klines through the calendar buckets, in a single pass
+        klines = self.klines['1m']
+        calendar = CalendarIndex(klines.index)
+        columns = {}
 
-        timestamp_mapping_dict = {
-            '15m': htf_15m_ts,
-            '1h': htf_1h_ts
-        }
-        result = self.klines['1m']
         #add daily open
-        result['daily_open'] = result.apply(lambda row: row['Open'] if start_of_day(row.name) else np.nan , axis = 1).fillna(method="ffill")
+        opens = klines['Open'].to_numpy(dtype=np.float64)
+        columns['daily_open'] = pd.Series(np.where(calendar.start_of_day(), opens, np.nan)).ffill().to_numpy()
 
         for interval in indis:
-            result[interval] = result.apply(timestamp_mapping_dict[interval], axis = 1)
-            result = result.join(indis[interval], on=interval)
+            bucket = calendar.bucket(interval)
+            columns[interval] = bucket
+            aligned = indis[interval].reindex(bucket)
+            for name in aligned.columns:
+                columns[name] = aligned[name].to_numpy()
 
-        return result
\ No newline at end of file
+        return klines.assign(**columns)
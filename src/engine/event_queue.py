@@ -0,0 +1,151 @@
+import asyncio
+import itertools
+import threading
+import logging
+from collections import OrderedDict
+
+from src.engine.dispatcher import topic_key
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/event-queue.log', logging.DEBUG)
+
+OVERFLOW_POLICIES = ('block', 'spill', 'drop_oldest', 'drop_newest')
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+class EventQueue():
+    """Bounded FIFO of (topic, data) events between the websocket and the strategy
+
+    Events of a ``coalesce`` topic replace a pending event of the same topic and move
+    to the back, so a slow consumer only sees the latest state (e.g. the kline deque)
+    and the queue holds at most one of them per topic. Other events are kept in order;
+    when ``maxsize`` of them are pending, ``overflow`` decides:
+
+    - ``block``: the producer waits for the consumer. Never on a thread running an
+      asyncio loop, e.g. the websocket's, there the event spills instead
+    - ``spill``: the event is queued past ``maxsize``, in order, with a warning
+      when the queue goes over it; nothing is lost and the producer never waits
+    - ``drop_oldest``: the oldest pending event is discarded
+    - ``drop_newest``: the new event is discarded
+    """
+
+    def __init__(self, maxsize = 1024, coalesce = (), overflow = 'block'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"EventQueue: overflow must be one of {OVERFLOW_POLICIES}")
+        self.maxsize = maxsize
+        self.coalesce = set(coalesce)
+        self.overflow = overflow
+        self.events = OrderedDict()
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.unfinished = 0
+        self.closed = False
+        self.spilling = False
+        self.stats = {'put': 0, 'coalesced': 0, 'dropped': 0, 'blocked': 0, 'spilled': 0, 'high_water': 0}
+
+    def __len__(self):
+        return len(self.events)
+
+    def put(self, topic, data):
+        """Queue an event, False if it was dropped"""
+        with self.cond:
+            self.stats['put'] += 1
+            if topic_key(topic) in self.coalesce:
+                key = ('coalesce', topic)
+                if key in self.events:
+                    del self.events[key]
+                    self.events[key] = (topic, data)
+                    self.stats['coalesced'] += 1
+                    return True
+            else:
+                key = next(self.seq)
+
+            while len(self.events) >= self.maxsize and not self.closed:
+                if self.overflow == 'drop_newest':
+                    self.stats['dropped'] += 1
+                    logger.warning("put: queue full, dropped %s", topic)
+                    return False
+                if self.overflow == 'drop_oldest':
+                    _, (dropped, _) = self.events.popitem(last = False)
+                    self.unfinished -= 1
+                    self.stats['dropped'] += 1
+                    logger.warning("put: queue full, dropped %s", dropped)
+                    continue
+                if self.overflow == 'spill' or _on_event_loop():
+                    # waiting here would stop the loop from reading frames and answering pings
+                    if not self.spilling:
+                        self.spilling = True
+                        logger.warning("put: queue full, spilling past %s events from %s", self.maxsize, topic)
+                    self.stats['spilled'] += 1
+                    break
+                self.stats['blocked'] += 1
+                self.cond.wait()
+
+            self.events[key] = (topic, data)
+            self.unfinished += 1
+            self.stats['high_water'] = max(self.stats['high_water'], len(self.events))
+            self.cond.notify_all()
+            return True
+
+    def get(self, timeout = None):
+        """Oldest event, None once the queue is closed and empty or on timeout"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.events or self.closed, timeout):
+                return None
+            if not self.events:
+                return None
+            _, event = self.events.popitem(last = False)
+            if self.spilling and len(self.events) < self.maxsize:
+                self.spilling = False
+                logger.warning("get: queue back under %s events, %s spilled so far", self.maxsize, self.stats['spilled'])
+            self.cond.notify_all()
+            return event
+
+    def task_done(self):
+        with self.cond:
+            self.unfinished -= 1
+            if self.unfinished <= 0:
+                self.cond.notify_all()
+
+    def join(self, timeout = None):
+        """Wait until every queued event has been processed"""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.unfinished <= 0, timeout)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class EventWorker(threading.Thread):
+    """Consumes an EventQueue on its own thread, calling ``handler(topic, data)``"""
+
+    def __init__(self, events, handler, on_error = None, name = 'strategy-worker'):
+        super().__init__(name = name, daemon = True)
+        self.events = events
+        self.handler = handler
+        self.on_error = on_error
+        self.start()
+
+    def run(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                break
+            try:
+                self.handler(*event)
+            except Exception as err:
+                logger.exception("run: %s failed", event[0])
+                if self.on_error is not None:
+                    self.on_error(err)
+            finally:
+                self.events.task_done()
+
+    def stop(self, timeout = 5):
+        self.events.close()
+        self.join(timeout)
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+import logging
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from src.utils.utils import get_logger, interval_seconds, interval_bybit_notation
+
+logger = get_logger(logging.getLogger(__name__), 'logs/kline-downloader.log', logging.DEBUG)
+
+KLINE_FIELDS = itemgetter('open_time', 'open', 'high', 'low', 'close', 'volume', 'turnover')
+
+class TokenBucket():
+    """Thread safe token bucket, ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate, capacity = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def parse_klines(response):
+    """Bybit kline/list response -> (n, 7) float64 array of [ts, open, high, low, close, volume, turnover]"""
+    result = response.get('result') if isinstance(response, dict) else None
+    if result is None:
+        raise ValueError(f"parse_klines: bad response {str(response)[:200]}")
+    if not len(result):
+        return np.empty((0, 7))
+    return np.array(list(map(KLINE_FIELDS, result)), dtype=np.float64)
+
+class KlineDownloader():
+    """Fetches a kline range as concurrent windows of ``limit`` candles
+
+    Windows go through a shared token bucket. Finished windows are written to the
+    store (if any) and recorded in its coverage index, or in a checkpoint file, so
+    an interrupted download only fetches what is left when it runs again.
+    """
+    limit = 200
+
+    def __init__(self, restclient, symbol, interval, store = None, checkpoint = None, workers = 4, rate = 10, retries = 3):
+        self.restclient = restclient
+        self.symbol = symbol
+        self.interval = interval
+        self.step = interval_seconds(interval)
+        self.store = store
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.retries = retries
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def windows(self, start, end):
+        span = self.limit * self.step
+        return [(s, min(s + span, end)) for s in range(start, end, span)]
+
+    def _read_checkpoint(self):
+        if not self.checkpoint:
+            return None
+        try:
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return None
+        if state.get('symbol') != self.symbol or state.get('interval') != self.interval:
+            return None
+        return state
+
+    def _load_checkpoint(self, start):
+        state = self._read_checkpoint()
+        if state is None or state.get('start') != start:
+            return set()
+        # done windows are (start, end) pairs: with a later end the old last window
+        # is longer, so it only counts as done on an exact match. Bare starts of
+        # older checkpoints say nothing about their end and are fetched again.
+        return {tuple(w) for w in state.get('done', []) if isinstance(w, list) and len(w) == 2}
+
+    def pending_start(self):
+        """Start of an interrupted download recorded in the checkpoint, None if there is none"""
+        state = self._read_checkpoint()
+        return state.get('start') if state else None
+
+    def _save_checkpoint(self, start, end, done):
+        if not self.checkpoint:
+            return
+        os.makedirs(os.path.dirname(self.checkpoint) or '.', exist_ok=True)
+        tmp = f'{self.checkpoint}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'symbol': self.symbol, 'interval': self.interval, 'start': start, 'end': end, 'done': [list(w) for w in sorted(done)]}, f)
+        os.replace(tmp, self.checkpoint)
+
+    def _fetch(self, window):
+        start, end = window
+        for attempt in range(self.retries):
+            self.bucket.acquire()
+            try:
+                with self.lock:
+                    self.requests += 1
+                # retried here only, one token per request: transport retries on 429 would bypass the bucket
+                response = self.restclient.kline(symbol=self.symbol, interval=str(interval_bybit_notation(self.interval)), _from=start, limit=self.limit, retries=0)
+                data = parse_klines(response)
+                return data[(data[:, 0] >= start) & (data[:, 0] < end)]
+            except Exception as err:
+                logger.error(f"_fetch: {self.symbol} {self.interval} {start}, attempt {attempt + 1}: {err}")
+                time.sleep(0.5 * 2 ** attempt)
+        return None
+
+    def _download_windows(self, todo, on_done = None):
+        """Fetch windows on the worker pool, each finished one is written to the store
+        with the window as its coverage and passed to ``on_done``
+
+        :return: (list of fetched arrays, number of failed windows)
+        """
+        parts = []
+        failed = 0
+
+        def run(window):
+            nonlocal failed
+            data = self._fetch(window)
+            with self.lock:
+                if data is None:
+                    failed += 1
+                    return
+                if self.store is not None:
+                    self.store.write(self.symbol, self.interval, data[:, 0], data[:, 1:], span = window)
+                parts.append(data)
+                if on_done:
+                    on_done(window)
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            list(executor.map(run, todo))
+        return parts, failed
+
+    def _align(self, start, end):
+        """Range of whole candles: ``start`` rounded down, ``end`` defaults to now and
+        is rounded down as well, so the candle still forming is not fetched
+        """
+        end = int(end) if end is not None else int(time.time())
+        return int(start) - int(start) % self.step, end - end % self.step
+
+    def download(self, start, end = None):
+        """Download [start, end) and return the klines as a (n, 7) array sorted by time
+
+        Windows that are already checkpointed are not fetched again and, when a store
+        is used, are not part of the returned array.
+        """
+        start, end = self._align(start, end)
+        done = self._load_checkpoint(start)
+        todo = [w for w in self.windows(start, end) if w not in done]
+        logger.info(f"download: {self.symbol} {self.interval} {len(todo)} windows, {len(done)} already done")
+
+        def on_done(window):
+            done.add(window)
+            self._save_checkpoint(start, end, done)
+
+        parts, failed = self._download_windows(todo, on_done)
+        if failed:
+            logger.error(f"download: {failed} windows failed, run again to resume")
+        elif self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+        if not parts:
+            return np.empty((0, 7))
+        data = np.concatenate(parts)
+        return data[np.argsort(data[:, 0], kind='stable')]
+
+    def backfill(self, start, end = None):
+        """Fetch the parts of [start, end) missing from the store's coverage index
+
+        Every finished window is recorded in the index, so an interrupted backfill
+        only fetches what is left when it runs again.
+
+        :return: number of klines fetched
+        """
+        start, end = self._align(start, end)
+        holes = self.store.missing(self.symbol, self.interval, start, end)
+        todo = [w for hole_start, hole_end in holes for w in self.windows(hole_start, hole_end)]
+        logger.info(f"backfill: {self.symbol} {self.interval} {len(holes)} holes, {len(todo)} windows")
+
+        parts, failed = self._download_windows(todo)
+        if failed:
+            logger.error(f"backfill: {failed} windows failed, run again to resume")
+        return sum(len(p) for p in parts)
@@ -0,0 +1,125 @@
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict, deque
+import numpy as np
+
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/latency.log', logging.DEBUG)
+
+# in the order a trade goes through them
+STAGES = ('kline', 'dispatch', 'signal', 'order', 'execution', 'fill')
+
+# name: (from, to)
+SPANS = {
+    'queue': ('kline', 'dispatch'),         # candle closed on the websocket -> strategy worker picked it up
+    'decide': ('dispatch', 'signal'),       # indicators and signal
+    'order': ('signal', 'order'),           # place_active_order round trip
+    'exchange': ('signal', 'execution'),    # order sent -> execution frame received
+    'handoff': ('execution', 'fill'),       # execution frame -> LiveAccount.order_executed
+    'total': ('kline', 'fill'),
+}
+
+def correlation_id(start, symbol = None):
+    """Correlation id of the trade decided on the 1m candle opened at ``start``, sent as order_link_id"""
+    if symbol is None:
+        return f"skalpit-{int(start)}"
+    return f"skalpit-{symbol}-{int(start)}"
+
+class LatencyStats():
+    """Per endpoint request count, errors, retries and latency of the last ``window`` requests"""
+
+    def __init__(self, window = 1024):
+        self.window = window
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def _endpoint(self, path):
+        endpoint = self.endpoints.get(path)
+        if endpoint is None:
+            endpoint = self.endpoints[path] = {'count': 0, 'errors': 0, 'retries': 0, 'latency': deque(maxlen=self.window)}
+        return endpoint
+
+    def record(self, path, seconds, error = False):
+        with self.lock:
+            endpoint = self._endpoint(path)
+            endpoint['count'] += 1
+            endpoint['errors'] += bool(error)
+            endpoint['latency'].append(seconds)
+
+    def retry(self, path):
+        with self.lock:
+            self._endpoint(path)['retries'] += 1
+
+    def summary(self):
+        """{path: {count, errors, retries, p50, p99, max}}, latencies in milliseconds"""
+        with self.lock:
+            result = {}
+            for path, endpoint in self.endpoints.items():
+                latency = np.array(endpoint['latency']) * 1000
+                row = {k: endpoint[k] for k in ['count', 'errors', 'retries']}
+                if len(latency):
+                    p50, p99 = np.percentile(latency, [50, 99])
+                    row.update({'p50': p50, 'p99': p99, 'max': latency.max()})
+                result[path] = row
+            return result
+
+class LatencyTracker():
+    """Stage timestamps of every trade, keyed by correlation id
+
+    ``begin`` opens a trace when a candle closes, ``mark`` stamps the next stages
+    from whichever thread sees them. A span is recorded as soon as both of its
+    stages are stamped, so candles without a signal still feed 'queue' and
+    'decide'. The trace is complete at 'fill' and kept in ``traces``.
+    """
+
+    def __init__(self, clock = time.perf_counter, window = 1024, pending = 64, history = 256):
+        self.clock = clock
+        self.maxpending = pending
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()
+        self.traces = deque(maxlen = history)
+        self.stats = LatencyStats(window = window)
+
+    def begin(self, cid):
+        with self.lock:
+            self.pending[cid] = {'kline': self.clock()}
+            # candles coalesced away by a late worker never get dispatched
+            while len(self.pending) > self.maxpending:
+                self.pending.popitem(last = False)
+
+    def mark(self, cid, stage):
+        """Stamp ``stage`` of a pending trace, the completed trace at 'fill', None if ``cid`` is unknown"""
+        now = self.clock()
+        with self.lock:
+            trace = self.pending.get(cid)
+            if trace is None or stage in trace:
+                return None
+            trace[stage] = now
+            for span, (start, end) in SPANS.items():
+                if end == stage and start in trace:
+                    self.stats.record(span, now - trace[start])
+            if stage != 'fill':
+                return trace
+            del self.pending[cid]
+            completed = {'id': cid, 'stages': {s: round((trace[s] - trace['kline']) * 1000, 3) for s in STAGES if s in trace}}
+            self.traces.append(completed)
+            return completed
+
+    def discard(self, cid):
+        """Forget a trace that will not lead to a trade"""
+        with self.lock:
+            self.pending.pop(cid, None)
+
+    def summary(self):
+        """{span: {count, p50, p99, max}}, latencies in milliseconds"""
+        return {span: {k: v for k, v in row.items() if k in ('count', 'p50', 'p99', 'max')}
+            for span, row in self.stats.summary().items()}
+
+    def export(self, path):
+        with self.lock:
+            traces = list(self.traces)
+        with open(path, 'w') as outfile:
+            json.dump({'spans': self.summary(), 'traces': traces}, outfile, indent = 1)
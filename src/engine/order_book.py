@@ -0,0 +1,130 @@
+import numpy as np
+
+class BookSide():
+    """Price levels of one side, best first, in preallocated arrays
+
+    Levels are found by binary search on a key that increases away from the best
+    price, inserts and deletes shift the levels behind in place. ``prices`` and
+    ``sizes`` are views of the live levels and are not copied.
+    """
+
+    def __init__(self, side, capacity = 64):
+        self.side = side
+        # bids are kept in descending price order, asks ascending
+        self.sign = -1.0 if side == 'Buy' else 1.0
+        self.keys = np.empty(capacity)
+        self._prices = np.empty(capacity)
+        self._sizes = np.empty(capacity)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def prices(self):
+        return self._prices[:self.count]
+
+    @property
+    def sizes(self):
+        return self._sizes[:self.count]
+
+    def top(self, n):
+        """(prices, sizes) of the best ``n`` levels"""
+        n = min(n, self.count)
+        return self._prices[:n], self._sizes[:n]
+
+    def best(self):
+        return (self._prices[0], self._sizes[0]) if self.count else None
+
+    def _find(self, price):
+        key = self.sign * price
+        i = int(np.searchsorted(self.keys[:self.count], key))
+        return i, i < self.count and self.keys[i] == key
+
+    def _grow(self):
+        capacity = 2 * len(self.keys)
+        for name in ['keys', '_prices', '_sizes']:
+            grown = np.empty(capacity)
+            grown[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, grown)
+
+    def set(self, price, size):
+        """Insert or update the level at ``price``"""
+        i, found = self._find(price)
+        if found:
+            self._sizes[i] = size
+            return
+        if self.count == len(self.keys):
+            self._grow()
+        n = self.count
+        for array in (self.keys, self._prices, self._sizes):
+            array[i + 1:n + 1] = array[i:n]
+        self.keys[i] = self.sign * price
+        self._prices[i] = price
+        self._sizes[i] = size
+        self.count += 1
+
+    def delete(self, price):
+        i, found = self._find(price)
+        if not found:
+            return False
+        n = self.count
+        for array in (self.keys, self._prices, self._sizes):
+            array[i:n - 1] = array[i + 1:n]
+        self.count -= 1
+        return True
+
+    def clear(self):
+        self.count = 0
+
+class OrderBook():
+    """L2 book kept from the orderBookL2_25 snapshot and delta messages"""
+
+    def __init__(self):
+        self.bids = BookSide('Buy')
+        self.asks = BookSide('Sell')
+        self.updated = None
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+    def _side(self, level):
+        return self.bids if level['side'] == 'Buy' else self.asks
+
+    def snapshot(self, levels):
+        # inverse contracts send a list, linear contracts {'order_book': [...]}
+        if isinstance(levels, dict):
+            levels = levels.get('order_book', [])
+        self.bids.clear()
+        self.asks.clear()
+        for level in levels:
+            self._side(level).set(float(level['price']), float(level['size']))
+
+    def delta(self, data):
+        for level in data.get('delete', []):
+            self._side(level).delete(float(level['price']))
+        for level in data.get('update', []) + data.get('insert', []):
+            self._side(level).set(float(level['price']), float(level['size']))
+
+    def on_message(self, message):
+        if message['type'] == 'snapshot':
+            self.snapshot(message['data'])
+        else:
+            self.delta(message['data'])
+        self.updated = message.get('timestamp_e6')
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def mid(self):
+        if not (self.bids.count and self.asks.count):
+            return None
+        return (self.bids._prices[0] + self.asks._prices[0]) / 2
+
+    def spread(self):
+        if not (self.bids.count and self.asks.count):
+            return None
+        return self.asks._prices[0] - self.bids._prices[0]
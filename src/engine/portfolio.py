@@ -0,0 +1,114 @@
+import logging
+import pandas as pd
+
+from src.account.test_account import TestAccount
+from src.account.ledger import SIDE_NAMES
+from src.engine.engine import Engine
+from src.engine.vectorized import VectorizedExecutor
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/portfolio.log', logging.DEBUG)
+
+OPEN = 0
+CLOSE = 1
+
+class PortfolioAccount(TestAccount):
+    """TestAccount holding one position per symbol against a shared balance
+
+    Positions are sized from the balance at their entry, closed trades are booked
+    in the ledger in the order they close, tagged with their symbol.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.positions = {}
+
+    def open_position(self, symbol, side, price, stop, tp, risk, timestamp):
+        self.open(side, price, stop, tp, risk, timestamp = timestamp, symbol = symbol)
+        self.positions[symbol] = self.trade
+        self.trade = None
+
+    def close_position(self, symbol, price, stopped, timestamp):
+        self.trade = self.positions.pop(symbol)
+        self.stopped = stopped
+        self.close(price, is_maker = not stopped, timestamp = timestamp)
+
+class Portfolio():
+    """Runs the strategy over several symbols against one shared balance
+
+    Sizing scales a trade's profit but never its sign, and the risk management
+    (one position, daily won / lost, cool-down) is kept per symbol, so when and how
+    every symbol trades does not depend on the balance. Each symbol's trades are
+    found by a VectorizedExecutor pass over its own arrays, then the entries and
+    exits of all symbols are merged on their timestamps and booked in that order
+    against a PortfolioAccount. The cost is one executor pass per symbol plus a
+    sort of the trades.
+
+    :param tables: {symbol: joined indicator table}, see ``Engine._get_indis``
+    """
+
+    def __init__(self, strategy, tables, startbalance = 1):
+        self.strategy = strategy
+        self.tables = tables
+        self.startbalance = startbalance
+        self.risk = strategy.get('risk')
+        self.signals = [s.get('name') for s in strategy.get('signal')]
+
+    @classmethod
+    def from_klines(cls, strategy, klines, startbalance = 1):
+        """Build the indicator tables from {symbol: {interval: klines}}"""
+        tables = {}
+        for symbol, working_set in klines.items():
+            engine = Engine(strategy = strategy, symbol = symbol)
+            engine.klines = working_set
+            tables[symbol] = engine._get_indis()
+        return cls(strategy, tables, startbalance = startbalance)
+
+    def schedule(self, symbol):
+        """Closed trades of ``symbol`` traded on its own, plus the one still open at the end or None"""
+        account = TestAccount(startbalance = self.startbalance)
+        VectorizedExecutor(self.strategy, account).run(self.tables[symbol], self.signals)
+        return account.trades.array, account.trade
+
+    def events(self):
+        """(timestamp, OPEN / CLOSE, symbol, trade) of every symbol in booking order
+
+        Entries are at the bar's open, exits within a bar, so at the same timestamp
+        entries come first.
+        """
+        events = []
+        for rank, symbol in enumerate(self.tables):
+            closed, still_open = self.schedule(symbol)
+            for row in closed:
+                trade = {'side': SIDE_NAMES[int(row['side'])], 'entry': float(row['entry']), 'stop': float(row['stop']),
+                    'tp': float(row['tp']), 'exit': float(row['exit']), 'stopped': bool(row['stopped'])}
+                events.append((int(row['opentimestamp']), OPEN, rank, symbol, trade))
+                events.append((int(row['closetimestamp']), CLOSE, rank, symbol, trade))
+            if still_open is not None:
+                events.append((int(still_open['opentimestamp']), OPEN, rank, symbol, still_open))
+        events.sort(key = lambda e: e[:3])
+        return [(ts, kind, symbol, trade) for ts, kind, _, symbol, trade in events]
+
+    def run(self):
+        account = PortfolioAccount(startbalance = self.startbalance)
+        for ts, kind, symbol, trade in self.events():
+            if kind == OPEN:
+                account.open_position(symbol, trade['side'], trade['entry'], trade['stop'], trade['tp'], self.risk, ts)
+            else:
+                account.close_position(symbol, trade['exit'], trade['stopped'], ts)
+        logger.info("run: %s symbols, %s trades, %s still open", len(self.tables), len(account.trades), len(account.positions))
+        return account
+
+def breakdown(account):
+    """Per symbol trades, won, lost and profit of a portfolio run"""
+    trades = account.trades.frame()
+    if not len(trades.index):
+        return pd.DataFrame(columns = ['trades', 'won', 'lost', 'profit'])
+    trades['symbol'] = trades['symbol'].str.decode('utf-8')
+    grouped = trades.groupby('symbol')['profit']
+    return pd.DataFrame({
+        'trades': grouped.size(),
+        'won': grouped.agg(lambda p: int((p > 0).sum())),
+        'lost': grouped.agg(lambda p: int((p < 0).sum())),
+        'profit': grouped.sum(),
+    })
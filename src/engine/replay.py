@@ -0,0 +1,107 @@
+import json
+import time
+import asyncio
+import logging
+
+from src.engine.skalpit import Skalpit
+from src.engine.ws_recorder import read_log
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/replay.log', logging.DEBUG)
+
+class ReplayClock():
+    """Clock that follows the receive times of the replayed frames
+
+    ``later`` calls at once, so orders are recorded in the same order on every run.
+    """
+
+    def __init__(self, now = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def later(self, delay, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+class StubRest():
+    """Stands in for BybitRest during a replay, every call is kept in ``calls``"""
+
+    def __init__(self, balance = 1):
+        self.balance = balance
+        # symbol: 1m klines returned by get_hist_klines
+        self.history = {}
+        self.calls = []
+
+    def _call(self, name, **kwargs):
+        self.calls.append((name, kwargs))
+        return {'ret_code': 0, 'ret_msg': 'OK', 'result': {}}
+
+    def get_hist_klines(self, symbol, interval, start_str, end_str = None):
+        self.calls.append(('get_hist_klines', {'symbol': symbol, 'interval': interval, 'start_str': start_str}))
+        return self.history.get(symbol, [])
+
+    def get_balance(self, symbol = 'BTC'):
+        self.calls.append(('get_balance', {'symbol': symbol}))
+        return {'ret_code': 0, 'result': {symbol: {'available_balance': self.balance}}}
+
+    def place_active_order(self, **kwargs):
+        return self._call('place_active_order', **kwargs)
+
+    def cancel_active_order(self, **kwargs):
+        return self._call('cancel_active_order', **kwargs)
+
+    def cancel_active_orders_all(self, **kwargs):
+        return self._call('cancel_active_orders_all', **kwargs)
+
+class Replay():
+    """Feeds a recorder log through ``BybitWs._on_message`` into a Skalpit
+
+    :param symbols: symbols the recorded session traded, defaults to ``[symbol]``
+    :param speed: multiple of real time, None replays as fast as possible
+    :param threaded: run the strategy on Skalpit's worker like the live bot, by default
+        it runs inline so the result does not depend on thread scheduling
+    """
+
+    def __init__(self, path, strategy, symbol = 'BTCUSD', balance = 1, speed = None, export_dir = 'trades', threaded = False, symbols = None):
+        self.path = path
+        self.speed = speed
+        self.symbols = list(symbols or [symbol])
+        self.clock = ReplayClock()
+        self.restclient = StubRest(balance = balance)
+        self.skalpit = Skalpit(strategy = strategy, symbols = self.symbols, restclient = self.restclient,
+                               clock = self.clock, later = self.clock.later, connect = False, export_dir = export_dir,
+                               threaded = threaded)
+        self.ws = self.skalpit.bybitws
+        self.frames = 0
+
+    async def _run(self):
+        first = None
+        started = time.monotonic()
+        for received, kind, payload in read_log(self.path):
+            self.clock.now = max(self.clock.now, received)
+            if self.speed:
+                first = received if first is None else first
+                delay = (received - first) / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if kind == 'klines':
+                history = json.loads(payload)
+                # recordings of a single symbol bot hold the bare list
+                if isinstance(history, list):
+                    history = {'symbol': self.symbols[0], 'klines': history}
+                self.restclient.history[history['symbol']] = history['klines']
+                self.ws._setup_klines(history['symbol'])
+            else:
+                await self.ws._on_message(payload)
+                self.frames += 1
+
+    def run(self):
+        tic = time.perf_counter()
+        asyncio.run(self._run())
+        if self.skalpit.worker is not None:
+            self.skalpit.events.join()
+            self.skalpit.worker.stop()
+        toc = time.perf_counter()
+        logger.info(f"run: {self.frames} frames in {toc-tic:.4f}s")
+        return self.skalpit
@@ -0,0 +1,112 @@
+import hashlib
+import hmac
+import json
+import time
+import random
+import asyncio
+import urllib.parse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectTimeout, ConnectionError, Timeout
+
+from src.engine.latency import LatencyStats
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/rest-transport.log', logging.DEBUG)
+
+# worth another attempt, the request may not have been processed
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class RestError(Exception):
+    pass
+
+class RestTransport():
+    """Signed bybit requests over a pooled keep-alive session
+
+    Up to ``pool_size`` requests are in flight at once through ``submit`` or
+    ``arequest``; ``request`` blocks like the old client. Every attempt has a
+    (connect, read) ``timeout``. GETs are retried with exponential backoff on
+    timeouts, connection errors and 429/5xx answers; other methods only when the
+    connection could not be opened, so an order is never sent twice.
+    """
+
+    def __init__(self, url, api_key, secret, pool_size = 8, timeout = (3.05, 10), retries = 3, backoff = 0.25):
+        self.url = url
+        self.api_key = api_key
+        self.secret = secret
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.executor = ThreadPoolExecutor(pool_size, thread_name_prefix = 'rest')
+        self.stats = LatencyStats()
+
+    def sign(self, payload):
+        """Payload without None values plus api_key, timestamp and sign, in signing order"""
+        params = {k: v for k, v in payload.items() if v is not None}
+        params['api_key'] = self.api_key
+        params['timestamp'] = int(time.time() * 1000)
+        params = dict(sorted(params.items()))
+        params['sign'] = hmac.new(self.secret.encode('utf-8'), urllib.parse.urlencode(params).encode('utf-8'), hashlib.sha256).hexdigest()
+        return params
+
+    def _send(self, method, path, payload):
+        # signed per attempt, a retry must not reuse an old timestamp
+        params = self.sign(payload)
+        if method == 'GET':
+            return self.session.request(method, self.url + path, params = params, timeout = self.timeout)
+        return self.session.request(method, self.url + path, data = json.dumps(params), timeout = self.timeout)
+
+    def request(self, method, path, payload, idempotent = None, retries = None):
+        """Send a signed request and return the decoded json body
+
+        Error answers are returned like any other body once retries are exhausted,
+        RestError is raised when no answer was received. ``retries`` overrides the
+        transport's, e.g. 0 for callers that retry through their own rate limiter.
+        """
+        idempotent = method == 'GET' if idempotent is None else idempotent
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            tic = time.perf_counter()
+            try:
+                resp = self._send(method, path, payload)
+            except (ConnectTimeout, ConnectionError, Timeout) as err:
+                self.stats.record(path, time.perf_counter() - tic, error = True)
+                # a connect timeout never reached the server, anything else may have
+                retry = idempotent or isinstance(err, ConnectTimeout)
+                logger.error("request: %s %s attempt %s: %s", method, path, attempt + 1, err)
+                if last or not retry:
+                    raise RestError(f"{method} {path}: {err}") from err
+            else:
+                self.stats.record(path, time.perf_counter() - tic, error = resp.status_code >= 400)
+                if resp.status_code in RETRY_STATUS and idempotent and not last:
+                    logger.error("request: %s %s attempt %s: HTTP %s", method, path, attempt + 1, resp.status_code)
+                else:
+                    if resp.status_code >= 400:
+                        logger.error("request: %s %s: HTTP %s %s", method, path, resp.status_code, resp.text[:200])
+                    try:
+                        return resp.json()
+                    except ValueError as err:
+                        logger.error("request: %s %s: %s", method, path, err)
+                        return resp.text
+            self.stats.retry(path)
+            time.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+    def submit(self, method, path, payload, idempotent = None, retries = None):
+        """``request`` on the pool, returns a concurrent.futures.Future"""
+        return self.executor.submit(self.request, method, path, payload, idempotent, retries)
+
+    async def arequest(self, method, path, payload, idempotent = None, retries = None):
+        return await asyncio.wrap_future(self.submit(method, path, payload, idempotent, retries))
+
+    def close(self):
+        self.executor.shutdown(wait = False)
+        self.session.close()
@@ -1,118 +1,238 @@
+import os
+import itertools
 import logging
+import threading
 import time
 import numpy as np
 import pandas as pd
-import sys
 from datetime import datetime
 
-from src.utils.indicators import calc_indi
+from src.utils.streaming import StreamingSignals
 from src.utils.utils import get_logger, start_of_min15, start_of_hour, start_of_hour4, start_of_day, date_to_seconds
 from src.account.live_account import LiveAccount
 from src.engine.engine import Engine
 from src.engine.bybit_ws import BybitWs
-from src.engine.bybit_rest import BybitRest
+from src.engine.dispatcher import Dispatcher
+from src.engine.event_queue import EventQueue, EventWorker
+from src.utils.log import flush
+from src.engine.ws_recorder import WsRecorder
+from src.engine.latency import LatencyTracker, correlation_id
 
 logger = get_logger(logging.getLogger(__name__), 'logs/skalpit.log', logging.DEBUG)
 
+# seconds between a market order and its take profit, the position has to exist first
+TP_DELAY = 1
+
+def later(delay, fn, *args, **kwargs):
+    """Call ``fn`` on a timer thread after ``delay`` seconds"""
+    timer = threading.Timer(delay, fn, args, kwargs)
+    timer.daemon = True
+    timer.start()
+    return timer
+
 class Skalpit(Engine):
+    """Live bot for one or more symbols on a single websocket connection
+
+    Every symbol has its own kline buffer, streaming indicators and account; the
+    websocket loop, the strategy worker and the REST session are shared.
+    """
+
     def __init__(self, *args, **kwargs):
+        self.handlers = Dispatcher({
+            'auth': self._parse_auth,
+            'kline': self._parse_kline,
+            'position': self._parse_position,
+            'execution': self._parse_execution,
+            'order': self._parse_order,
+        })
+        self.worker = None
+        self.latency = LatencyTracker()
+
         if not kwargs.get('testmode'):
-            super().__init__(strategy =  kwargs.get('strategy'), symbol = kwargs.get('symbol'))
+            self.symbols = list(kwargs.get('symbols') or [kwargs.get('symbol')])
+            super().__init__(strategy =  kwargs.get('strategy'), symbol = self.symbols[0])
+            self.streams = {symbol: StreamingSignals(self.strategy) for symbol in self.symbols}
+            # replaced by a replay to run on the recorded clock
+            self.clock = kwargs.get('clock', time.time)
+            self.later = kwargs.get('later', later)
 
             api_key = kwargs.get('api_key')
             secret = kwargs.get('secret')
+            flags = kwargs.get('args') or []
+            recorder = WsRecorder(flags[flags.index('--record') + 1]) if '--record' in flags else None
             
+            # frames are read on the websocket loop, the strategy and its REST calls run on
+            # the worker; klines are coalesced per symbol, a late worker only sees the latest candles.
+            # Private topics must not be lost and the loop must not wait, they spill past maxsize
+            if kwargs.get('threaded', True):
+                self.events = EventQueue(maxsize = 1024, coalesce = ('kline',), overflow = 'spill')
+                self.worker = EventWorker(self.events, self._handle, on_error = self._fatal)
+
             try:
-                self.restclient = BybitRest(api_key = api_key, secret = secret, symbol = self.symbol)
-                self.account = self._create_account()
+                self.restclient = kwargs.get('restclient') or self._restclient(api_key, secret)
+                self.export_dir = kwargs.get('export_dir', 'trades')
+                self.accounts = {symbol: self._create_account(symbol, export_dir = self.export_dir) for symbol in self.symbols}
+                self.account = self.accounts[self.symbol]
                 self.ws_ready = False
-                self.bybitws = BybitWs(api_key = api_key, secret = secret, symbol = self.symbol, callback = self.callback, restclient = self.restclient)            
+                self.bybitws = BybitWs(api_key = api_key, secret = secret, symbol = self.symbol, symbols = self.symbols, callback = self.callback, restclient = self.restclient, ws = kwargs.get('connect', True), recorder = recorder, latency = self.latency)
             except Exception as err:
                 import traceback
                 traceback.print_exc()
+            finally:
+                if recorder is not None:
+                    recorder.close()
 
             logger.info("done")
 
     def callback(self, **kwargs):
         topic = kwargs.get("topic")
         data = kwargs.get("data")
-        try:
-            if "auth" in topic:
-                self.ws_ready = data.get('success')
-            if "kline" in topic:
-                self._parse_kline(topic, data)
-            if "position" in topic:
-                self._parse_position(topic, data)
-            if "execution" in topic:
-                self._parse_execution(topic, data)
-            if "order" in topic:
-                self._parse_order(topic, data)
-        except Exception as err:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"callback: {data}")
-            sys.exit()
+        if topic == 'execution':
+            # stamped on the websocket thread, before the frame waits for the worker
+            self.latency.mark(data.get('order_link_id'), 'execution')
+        if self.worker is None:
+            try:
+                self._handle(topic, data)
+            except Exception as err:
+                self._fatal(err)
+            return
+        if topic.startswith('kline'):
+            # the websocket keeps appending to its deque
+            data = self._kline_tail(topic, data)
+        self.events.put(topic, data)
+
+    def _kline_tail(self, topic, candles):
+        """Copy of the candles the worker still needs
+
+        Those from the last candle the symbol's indicators have seen on, so the copy
+        grows with how far the worker is behind, not with the history kept. A pending
+        event replaced by this one only held candles from an older position.
+        """
+        streams = self.streams.get(topic.split('.')[-1])
+        last = streams.last.get('1m') if streams is not None else None
+        if last is None:
+            return list(candles)
+        tail = list(itertools.takewhile(lambda candle: candle[0] >= last, reversed(candles)))
+        return tail[::-1]
+
+    def _handle(self, topic, data):
+        self.handlers.dispatch(topic, topic, data)
+
+    def _fatal(self, err):
+        import traceback
+        traceback.print_exc()
+        logger.error(f"callback: {err}")
+        flush()
+        # the worker is not the main thread, sys.exit would only end the worker
+        os._exit(1)
+
+    def _account(self, data):
+        """Account of the symbol a private topic entry belongs to, None for symbols not traded"""
+        return self.accounts.get(data.get('symbol', self.symbol))
+
+    def _parse_auth(self, topic, data):
+        self.ws_ready = data.get('success')
 
     def _parse_order(self, topic, data):
-        self.account.new_order(data)
+        account = self._account(data)
+        if account is not None:
+            account.new_order(data)
 
     def _parse_execution(self, topic, data):
-        self.account.order_executed(data)
+        account = self._account(data)
+        if account is None:
+            return
+        account.order_executed(data)
+        trace = self.latency.mark(data.get('order_link_id'), 'fill')
+        if trace is not None:
+            logger.info("_parse_execution: %s latency ms %s", trace['id'], trace['stages'])
+            self.export_latency()
+
+    def export_latency(self, path = None):
+        """Write the per span histograms and the last traces, by default to <export_dir>/latency.json"""
+        path = path or os.path.join(self.export_dir, 'latency.json')
+        try:
+            self.latency.export(path)
+        except OSError as err:
+            logger.error("export_latency: %s", err)
 
     def _parse_position(self, topic, data):
+        account = self._account(data)
+        if account is None:
+            return
+        symbol = data.get('symbol', self.symbol)
         size = data.get('size')
-        if size == 0 and not self.account.trade == None and int(time.time()) - self.account.lasttradeopened > 5:
-            logger.debug("_parse_position: position is 0, cancelling all orders")
-            self.restclient.cancel_active_orders_all()
-        elif size == 0 and not self.account.trade == None and int(time.time()) - self.account.lasttradeopened <= 5:
-            logger.debug("_parse_position: position is 0 too soon, ignoring...")
-        self.account.position_update(data)
+        if size == 0 and not account.trade == None and int(self.clock()) - account.lasttradeopened > 5:
+            logger.debug("_parse_position: %s position is 0, cancelling all orders", symbol)
+            self.restclient.cancel_active_orders_all(symbol = symbol)
+        elif size == 0 and not account.trade == None and int(self.clock()) - account.lasttradeopened <= 5:
+            logger.debug("_parse_position: %s position is 0 too soon, ignoring...", symbol)
+        account.position_update(data)
 
     def _parse_kline(self, topic, data):
-        logger.debug(f"_parse_kline: {topic}")
-        interval = topic.split('.')[1]
-        column_data = [i[1:] for i in data]
-        index = [int(i[0]) for i in data]
-        self.klines[interval] = pd.DataFrame(column_data, index = index, columns=['Open', 'High', 'Low', 'Close', 'Volume', 'TurnOver'])
+        logger.debug("_parse_kline: %s", topic)
+        _, interval, symbol = topic.split('.')
+        streams = self.streams[symbol]
+        streams.update_candles(interval, data)
 
         if interval == '1m' and self.ws_ready:
-            table = self._get_indis()
-            self.process_kline(table.iloc[-1], self.signals)
+            # the candle that just closed, see BybitWs._on_ws_kline
+            cid = correlation_id(data[-2][0], symbol) if len(data) > 1 else None
+            self.latency.mark(cid, 'dispatch')
+            self.process_kline(streams.row(), self.signals, cid = cid, symbol = symbol)
             
-    def process_kline(self, row, signals):
-        logger.debug(f"process_kline")
-        logger.debug(row)
-        if self._check_risk_management():
+    def process_kline(self, row, signals, cid = None, symbol = None):
+        """``cid`` is sent as order_link_id to follow the trade through the latency stages"""
+        logger.debug("process_kline: %s", row)
+        symbol = symbol or self.symbol
+        account = self.accounts[symbol]
+        signal = None
+        if self._check_risk_management(now = int(self.clock()), account = account):
             if self._check_time(row):
                 signal = self._check_signal(row, signals)
-                logger.debug(f"process_kline: signal = {signal}")
+                logger.debug("process_kline: %s signal = %s", symbol, signal)
+                self.latency.mark(cid, 'signal')
 
                 if signal == "long":
                     sl = round(row['Open'] - self.strategy.get('sl-atr') * row['atr'], 2)
                     tp = round(row['Open'] + self.strategy.get('tp-atr') * row['atr'], 2)
-                    size = self.account.open(self.risk, row['Open'], sl)
-                    logger.info(f"LONG {size} @ {row['Open']} - SL {sl} - TP {tp}")
-                    self.restclient.place_active_order(symbol = "BTCUSD", side = "Buy", order_type = "Market", qty = size, stop_loss = sl)
-                    time.sleep(1)
-                    self.restclient.place_active_order(symbol = "BTCUSD", side = "Sell", order_type = "Limit", qty = size, price = tp, reduce_only = "True", time_in_force = "GoodTillCancel")
+                    size = account.open(self.risk, row['Open'], sl)
+                    logger.info("%s LONG %s @ %s - SL %s - TP %s", symbol, size, row['Open'], sl, tp)
+                    self.restclient.place_active_order(symbol = symbol, side = "Buy", order_type = "Market", qty = size, stop_loss = sl, order_link_id = cid)
+                    self.latency.mark(cid, 'order')
+                    self.later(TP_DELAY, self._place_tp, symbol = symbol, side = "Sell", qty = size, price = tp, order_link_id = cid and f"{cid}-tp")
 
                 if signal == "short":
                     sl = round(row['Open'] + self.strategy.get('sl-atr') * row['atr'], 2)
                     tp = round(row['Open'] - self.strategy.get('tp-atr') * row['atr'], 2)
-                    size = self.account.open(self.risk, row['Open'], sl)
-                    logger.info(f"SHORT {size} @ {row['Open']} - SL {sl} - TP {tp}")
-                    self.restclient.place_active_order(symbol = "BTCUSD", side = "Sell", order_type = "Market", qty = size, stop_loss = sl)
-                    time.sleep(1)
-                    self.restclient.place_active_order(symbol = "BTCUSD", side = "Buy", order_type = "Limit", qty = size, price = tp, reduce_only = "True", time_in_force = "GoodTillCancel")
+                    size = account.open(self.risk, row['Open'], sl)
+                    logger.info("%s SHORT %s @ %s - SL %s - TP %s", symbol, size, row['Open'], sl, tp)
+                    self.restclient.place_active_order(symbol = symbol, side = "Sell", order_type = "Market", qty = size, stop_loss = sl, order_link_id = cid)
+                    self.latency.mark(cid, 'order')
+                    self.later(TP_DELAY, self._place_tp, symbol = symbol, side = "Buy", qty = size, price = tp, order_link_id = cid and f"{cid}-tp")
+
+            account.update(row.name, row)
+        if signal not in ('long', 'short'):
+            self.latency.discard(cid)
+
+    def _place_tp(self, symbol, side, qty, price, order_link_id = None):
+        # on a timer thread, the worker does not wait for it and goes on with the next symbol
+        try:
+            self.restclient.place_active_order(symbol = symbol, side = side, order_type = "Limit", qty = qty, price = price, reduce_only = "True", time_in_force = "GoodTillCancel", order_link_id = order_link_id)
+        except Exception as err:
+            self._fatal(err)
 
-            self.account.update(row.name, row)
+    def _restclient(self, api_key, secret):
+        # imported here, a replay brings its own client and does not load requests
+        from src.engine.bybit_rest import BybitRest
+        return BybitRest(api_key = api_key, secret = secret, symbol = self.symbol)
 
-    def _create_account(self):
-        coin = self.symbol[:3]
+    def _create_account(self, symbol, export_dir = 'trades'):
+        coin = symbol[:3]
         response = self.restclient.get_balance(coin)
         balance = response.get("result", {}).get(coin, {}).get("available_balance",{})
-        logger.info(f"_create_account: balance = {balance}")
-        return LiveAccount(startbalance=balance)
+        logger.info(f"_create_account: {symbol} balance = {balance}")
+        return LiveAccount(startbalance=balance, clock=self.clock, export_dir=export_dir, symbol=symbol)
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -0,0 +1,146 @@
+import copy
+import itertools
+import logging
+import os
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool, shared_memory
+
+from src.utils import indicators
+from src.utils.kline_store import COLUMNS
+from src.utils.report import equity
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/sweep.log', logging.DEBUG)
+
+def apply_params(strategy, params):
+    """Return a copy of ``strategy`` with ``params`` applied
+
+    Keys are either top level strategy keys (``tp-atr``, ``risk``, ``no-trade-hours``)
+    or ``<indicator>.<property>`` for the signal and atr indicators, e.g. ``hma.length``.
+    """
+    result = copy.deepcopy(strategy)
+    indis = {i.get('name'): i for i in result.get('signal') + [result.get('atr')]}
+    for key, value in params.items():
+        name, _, prop = key.partition('.')
+        if prop:
+            if name not in indis:
+                raise KeyError(f"apply_params: unknown indicator {name}")
+            indis[name]['properties'][prop] = value
+        else:
+            result[key] = value
+    return result
+
+def expand_grid(grid):
+    """All combinations of a {param: [values]} grid, as a list of {param: value}"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*[grid[k] for k in keys])]
+
+class SharedKlines():
+    """Kline frames of several intervals placed in shared memory
+
+    Workers attach by block name and wrap the buffers in DataFrames without copying,
+    so a sweep never pickles the klines.
+    """
+
+    def __init__(self, klines):
+        self.blocks = {}
+        self.descriptor = {}
+        for interval, frame in klines.items():
+            n = len(frame.index)
+            block = shared_memory.SharedMemory(create=True, size=max(1, 8 * n * (1 + len(COLUMNS))))
+            ts, values = self._views(block, n)
+            ts[:] = frame.index.to_numpy(dtype=np.int64)
+            values[:] = frame[COLUMNS].to_numpy(dtype=np.float64)
+            self.blocks[interval] = block
+            self.descriptor[interval] = (block.name, n)
+
+    @staticmethod
+    def _views(block, n):
+        ts = np.ndarray((n,), dtype=np.int64, buffer=block.buf)
+        values = np.ndarray((n, len(COLUMNS)), dtype=np.float64, buffer=block.buf, offset=8 * n)
+        return ts, values
+
+    @staticmethod
+    def attach(descriptor):
+        """Return ({interval: DataFrame}, [blocks]) for a descriptor built in another process"""
+        klines, blocks = {}, []
+        for interval, (name, n) in descriptor.items():
+            block = shared_memory.SharedMemory(name=name)
+            ts, values = SharedKlines._views(block, n)
+            klines[interval] = pd.DataFrame(values, index = ts, columns = COLUMNS, copy = False)
+            blocks.append(block)
+        return klines, blocks
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+# per worker process state
+_worker = {}
+
+def _init_worker(descriptor, cache_path):
+    _worker['klines'], _worker['blocks'] = SharedKlines.attach(descriptor)
+    if cache_path:
+        indicators.configure_cache(path = cache_path)
+
+def backtest(strategy, klines):
+    """Backtest one strategy on an already loaded working set and return its account"""
+    from src.engine.backtester import Backtester
+    bt = Backtester(strategy = strategy, testmode = True)
+    bt.klines = dict(klines)
+    bt.execute_strategy(bt._get_indis())
+    return bt.account
+
+def run_strategy(strategy, klines):
+    """Backtest one strategy on an already loaded working set and return its result"""
+    return backtest(strategy, klines).getResult()
+
+def _run_combination(args):
+    strategy, params, with_equity = args
+    try:
+        account = backtest(strategy, _worker['klines'])
+        return params, account.getResult(), equity(account) if with_equity else None
+    except Exception as err:
+        logger.error(f"_run_combination: {params}: {err}")
+        return params, None, None
+
+class Sweep():
+    """Runs every combination of a parameter grid across a process pool"""
+
+    def __init__(self, strategy, klines, processes = None):
+        self.strategy = strategy
+        self.klines = klines
+        self.processes = processes or os.cpu_count()
+
+    def run(self, grid, rank_by = 'balance', report = None):
+        """Table of every combination's parameters and result, best ``rank_by`` first
+
+        :param report: optional ``Report``, every combination's equity is charted to it
+            as <rank>.png once the table is ranked
+        """
+        combinations = expand_grid(grid)
+        # neighbouring jobs share indicator specs, so each worker mostly hits its indicator cache
+        combinations.sort(key = lambda params: [repr(params[k]) for k in sorted(params) if '.' in k])
+        jobs = [(apply_params(self.strategy, params), params, report is not None) for params in combinations]
+        logger.info(f"run: {len(jobs)} combinations on {self.processes} processes")
+
+        shared = SharedKlines(self.klines)
+        try:
+            with Pool(self.processes, initializer=_init_worker, initargs=(shared.descriptor, indicators.cache.path)) as pool:
+                results = pool.map(_run_combination, jobs, chunksize=max(1, len(jobs) // (self.processes * 4)))
+        finally:
+            shared.close()
+
+        results = [r for r in results if r[1] is not None]
+        table = pd.DataFrame([{**params, **result} for params, result, _ in results])
+        if len(table.index):
+            table = table.sort_values(rank_by, ascending=False)
+            if report is not None:
+                for rank, i in enumerate(table.index):
+                    params, _, (ts, balance) = results[i]
+                    report.submit(f'{rank:04d}', ts, balance, title = ', '.join(f'{k}={v}' for k, v in params.items()))
+            table = table.reset_index(drop=True)
+        return table
@@ -0,0 +1,179 @@
+import logging
+import numpy as np
+
+from src.utils.utils import get_logger
+from src.utils.calendar_index import CalendarIndex
+
+logger = get_logger(logging.getLogger(__name__), 'logs/vectorized.log', logging.DEBUG)
+
+SIGNAL_TRUE = 1
+SIGNAL_FALSE = 0
+SIGNAL_NONE = -1
+
+def signal_state(values):
+    """Encode a joined signal column (True / False / None / NaN) as int8
+
+    Uses the same equality semantics as ``Engine._check_signal``.
+    """
+    values = np.asarray(values)
+    state = np.full(len(values), SIGNAL_NONE, dtype=np.int8)
+    state[values == True] = SIGNAL_TRUE
+    state[values == False] = SIGNAL_FALSE
+    return state
+
+class VectorizedExecutor():
+    """Array based replacement for ``Backtester.process_kline`` applied row by row
+
+    Entry conditions and SL/TP hits are resolved over NumPy arrays and the loop only
+    jumps from one trade to the next. Fees and balance are booked through the given
+    ``TestAccount`` so both execution modes produce identical trades.
+    """
+
+    def __init__(self, strategy, account):
+        self.strategy = strategy
+        self.account = account
+        self.risk = strategy.get('risk')
+        self.sl_atr = strategy.get('sl-atr')
+        self.tp_atr = strategy.get('tp-atr')
+        self.no_trade_hours = strategy.get('no-trade-hours')
+
+    def entries(self, table, signals, calendar = None):
+        """Return (long, short) boolean arrays of the bars where a signal fires
+        outside of the no-trade hours
+        """
+        calendar = calendar if calendar is not None else CalendarIndex(table.index)
+        opens = table['Open'].to_numpy(dtype=np.float64)
+        daily_open = table['daily_open'].to_numpy(dtype=np.float64)
+        states = [signal_state(table[s].to_numpy()) for s in signals]
+
+        all_true = np.ones(len(table), dtype=bool)
+        all_false = np.ones(len(table), dtype=bool)
+        for state in states:
+            all_true &= state == SIGNAL_TRUE
+            all_false &= state == SIGNAL_FALSE
+
+        long = all_true & (opens > daily_open)
+        short = ~long & all_false & (opens < daily_open)
+
+        tradeable = ~calendar.hours_in(self.no_trade_hours)
+        return long & tradeable, short & tradeable
+
+    def prepare(self, table, signals):
+        """The arrays ``execute`` and ``trades`` work on
+
+        Every indicator looks back only, so the bars [lo, hi) of them are what a
+        backtest of the whole table sees at that point, warm-up included.
+        """
+        calendar = CalendarIndex(table.index)
+        long, short = self.entries(table, signals, calendar)
+        return {
+            'ts': calendar.ts,
+            'day': calendar.day,
+            'open': table['Open'].to_numpy(dtype=np.float64),
+            'high': table['High'].to_numpy(dtype=np.float64),
+            'low': table['Low'].to_numpy(dtype=np.float64),
+            'atr': table['atr'].to_numpy(dtype=np.float64),
+            'long': long,
+            'short': short,
+            'candidates': np.flatnonzero(long | short),
+        }
+
+    def run(self, table, signals):
+        self.execute(self.prepare(table, signals))
+
+    def execute(self, arrays, lo = 0, hi = None):
+        """Trade the bars [lo, hi) of prepared arrays, a trade still open at ``hi`` stays open"""
+        ts = arrays['ts']
+        hi = len(ts) if hi is None else hi
+        trades = self.trades(arrays, lo, hi, self.account.lasttradeclosed)
+        closed = None
+        for c, side, sl, tp, j, stopped in iter(lambda: trades.send(closed), None):
+            logger.info("%s: %s %s SL %s TP %s", ts[c], side.upper(), arrays['open'][c], sl, tp)
+            self.account.open(side, arrays['open'][c], sl, tp, self.risk, timestamp = int(ts[c]))
+            if j is None:
+                break
+            self.account.stopped = stopped
+            self.account.close(sl if stopped else tp, is_maker = not stopped, timestamp = int(ts[j]))
+            closed = (self.account.won, self.account.lost)
+
+        if hi > lo:
+            self.account.lastbardate = int(ts[hi - 1])
+
+    def trades(self, arrays, lo = 0, hi = None, lastclosed = 0):
+        """Generator of the trades the strategy takes on the bars [lo, hi) of prepared arrays
+
+        Yields (c, side, sl, tp, j, stopped) with c the entry and j the exit bar, j is
+        None for a trade still open at ``hi`` and the last one yielded. The daily risk
+        management depends on the outcome, so the caller sends back (won, lost) of
+        every closed trade. Yields None once done, see ``execute``.
+        """
+        ts = arrays['ts']
+        opens = arrays['open']
+        atr = arrays['atr']
+        days = arrays['day']
+        long = arrays['long']
+        candidates = arrays['candidates']
+        hi = len(ts) if hi is None else hi
+
+        # won / lost per day, as seen by the risk management check
+        daily = {}
+        pos = lo
+
+        while True:
+            # 2 min cool-down after the last close
+            start = max(pos, int(np.searchsorted(ts, lastclosed + 120, side = 'right')))
+            k = np.searchsorted(candidates, start)
+            if k >= len(candidates) or candidates[k] >= hi:
+                break
+            c = int(candidates[k])
+
+            # daily counters are reset on the first update of a new day, after the entry check
+            if c > lo:
+                won, lost = daily.get(days[c - 1], (0, 0))
+                if won >= 1 or lost > 3:
+                    pos = int(np.searchsorted(days, days[c - 1], side = 'right')) + 1
+                    continue
+
+            side = 'long' if long[c] else 'short'
+            if side == 'long':
+                sl = round(opens[c] - self.sl_atr * atr[c], 2)
+                tp = round(opens[c] + self.tp_atr * atr[c], 2)
+            else:
+                sl = round(opens[c] + self.sl_atr * atr[c], 2)
+                tp = round(opens[c] - self.tp_atr * atr[c], 2)
+
+            j, stopped = self._find_exit(arrays, side, c, hi, sl, tp)
+            if j is None:
+                # still open at the end of the range
+                yield c, side, sl, tp, None, None
+                break
+
+            won, lost = yield c, side, sl, tp, j, stopped
+            day_won, day_lost = daily.get(days[j], (0, 0))
+            daily[days[j]] = (day_won + won, day_lost + lost)
+            lastclosed = int(ts[j])
+            pos = j + 1
+        yield None
+
+    def _find_exit(self, arrays, side, start, end, stop, tp):
+        """First bar in [start, end) that hits the stop or the take profit
+
+        Scans in growing chunks, so short trades only touch a few bars.
+        """
+        chunk = 256
+        while start < end:
+            stop_at = min(end, start + chunk)
+            low = arrays['low'][start:stop_at]
+            high = arrays['high'][start:stop_at]
+            if side == 'long':
+                stopped = low <= stop
+                hits = stopped | (high >= tp)
+            else:
+                stopped = high >= stop
+                hits = stopped | (low <= tp)
+            if hits.any():
+                i = int(np.argmax(hits))
+                return start + i, bool(stopped[i])
+            start = stop_at
+            chunk *= 2
+        return None, None
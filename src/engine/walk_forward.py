@@ -0,0 +1,176 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from src.account.test_account import TestAccount
+from src.account.ledger import TradeLedger
+from src.engine.engine import Engine
+from src.engine.sweep import apply_params, expand_grid
+from src.engine.vectorized import VectorizedExecutor
+from src.utils.time_range import range_bounds
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/walk-forward.log', logging.DEBUG)
+
+DAY = 86400
+
+def windows(start, end, train, test, step = None):
+    """(train_start, test_start, test_end) of every window that fits in [start, end)
+
+    :param train: train length in seconds
+    :param test: test length in seconds
+    :param step: shift between windows, defaults to ``test`` so the test ranges tile
+    """
+    step = step or test
+    result = []
+    t = start
+    while t + train + test <= end:
+        result.append((t, t + train, t + train + test))
+        t += step
+    return result
+
+def parse_windows(spec):
+    """'<train days>:<test days>[:<step days>]' -> (train, test, step) in seconds"""
+    days = [float(d) for d in spec.split(':')]
+    if len(days) not in (2, 3):
+        raise ValueError(f"parse_windows: expected train:test[:step] days, got {spec}")
+    train, test = int(days[0] * DAY), int(days[1] * DAY)
+    step = int(days[2] * DAY) if len(days) == 3 else None
+    return train, test, step
+
+def trade_return(fees, risk, side, entry, stop, exit, stopped):
+    """Profit of a trade as a fraction of the balance it was sized from
+
+    ``TestAccount`` sizes a position in proportion to the balance, so booking the
+    trade there multiplies the balance by 1 + this.
+    """
+    size = risk / 100 / abs(1 / entry - 1 / stop)
+    pnl = (1 / exit - 1 / entry) * size if side == 'short' else (1 / entry - 1 / exit) * size
+    pnl -= size / entry * fees['taker']
+    pnl += -size / exit * fees['taker'] if stopped else size / exit * fees['maker']
+    return pnl
+
+def summarize(returns, startbalance = 1):
+    """``TestAccount.getResult`` of an account that booked trades with these returns"""
+    n = len(returns)
+    after = startbalance * np.cumprod(1 + np.asarray(returns, dtype = np.float64))
+    before = np.concatenate([[startbalance], after[:-1]])
+    account = TestAccount(startbalance = startbalance)
+    account.trades = TradeLedger(capacity = max(n, 1))
+    account.trades.data['before'][:n] = before
+    account.trades.data['after'][:n] = after
+    account.trades.data['profit'][:n] = after - before
+    account.trades.count = n
+    account.balance = float(after[-1]) if n else startbalance
+    return account.getResult()
+
+class TradePath():
+    """The trades of one parameter set over the whole span, shared by every window
+
+    A window trades a fresh account, so its first trades can differ from the ones of
+    the whole span at that point. What the strategy does after a trade closes only
+    depends on that bar and the day's won / lost count, so once a window closes a
+    trade on the same bar with the same count as the whole span did, the rest of its
+    trades are the ones of the whole span up to the window's end. A window only
+    walks its trades until then and takes the rest as a slice of ``returns``.
+    """
+
+    def __init__(self, strategy, arrays, fees):
+        self.executor = VectorizedExecutor(strategy, None)
+        self.arrays = arrays
+        self.fees = fees
+        self.closed_at = {}
+        exits, returns, counts = [], [], []
+        for j, r, count in self._walk(0, len(arrays['ts'])):
+            self.closed_at[j] = len(exits)
+            exits.append(j)
+            returns.append(r)
+            counts.append(count)
+        self.exits = np.array(exits, dtype = np.int64)
+        self.returns = np.array(returns, dtype = np.float64)
+        self.counts = counts
+
+    def _walk(self, lo, hi):
+        """(exit bar, return, day's (won, lost) after it) of the trades closed in [lo, hi)"""
+        days = self.arrays['day']
+        opens = self.arrays['open']
+        trades = self.executor.trades(self.arrays, lo, hi)
+        daily = {}
+        closed = None
+        for c, side, sl, tp, j, stopped in iter(lambda: trades.send(closed), None):
+            if j is None:
+                break
+            r = trade_return(self.fees, self.executor.risk, side, opens[c], sl, sl if stopped else tp, stopped)
+            won, lost = daily.get(days[j], (0, 0))
+            daily[days[j]] = (won + bool(r > 0), lost + bool(r < 0))
+            yield j, r, daily[days[j]]
+            closed = (r > 0, r < 0)
+
+    def window(self, lo, hi):
+        """Returns of the trades a fresh account closes on the bars [lo, hi)"""
+        returns = []
+        for j, r, count in self._walk(lo, hi):
+            returns.append(r)
+            k = self.closed_at.get(j)
+            if k is not None and self.counts[k] == count:
+                end = int(np.searchsorted(self.exits, hi))
+                return np.concatenate([returns, self.returns[k + 1:end]])
+        return np.array(returns, dtype = np.float64)
+
+class WalkForward():
+    """Scores a strategy, or picks the best of a parameter grid, over rolling train / test windows
+
+    Indicators are computed and joined once over the whole span for every parameter
+    set, and the trades of the whole span are found once (see ``TradePath``). Every
+    indicator looks back only, so a window's slice of them carries the warm-up of
+    all the history before it. Each window trades a fresh account, joining the
+    trades of the whole span after its first few, so scoring many overlapping
+    windows costs little more than a backtest of the whole span.
+
+    :param klines: {interval: frame} working set covering every window
+    :param grid: optional {param: [values]}, see ``sweep.expand_grid``; the combination
+        ranked best by ``rank_by`` on the train range is scored on the test range
+    """
+
+    def __init__(self, strategy, klines, train, test, step = None, grid = None, rank_by = 'balance', symbol = None):
+        self.strategy = strategy
+        self.klines = klines
+        self.grid = grid
+        self.rank_by = rank_by
+        self.symbol = symbol
+        self.fees = TestAccount().fees
+        ts = klines['1m'].index
+        self.windows = windows(int(ts[0]), int(ts[-1]) + 60, train, test, step)
+
+    def path(self, strategy):
+        engine = Engine(strategy = strategy, symbol = self.symbol)
+        engine.klines = self.klines
+        arrays = VectorizedExecutor(strategy, None).prepare(engine._get_indis(), engine.signals)
+        return TradePath(strategy, arrays, self.fees)
+
+    def score(self, path, start, end):
+        """Result of a fresh account trading the timestamps [start, end)"""
+        lo, hi = range_bounds(path.arrays['ts'], start, end)
+        return summarize(path.window(lo, hi))
+
+    def run(self):
+        """One row per window: its range, the parameters used, train and test results"""
+        candidates = [(params, self.path(apply_params(self.strategy, params)))
+            for params in (expand_grid(self.grid) if self.grid else [{}])]
+        logger.info("run: %s windows, %s parameter sets", len(self.windows), len(candidates))
+
+        rows = []
+        for train_start, test_start, test_end in self.windows:
+            scored = [(self.score(path, train_start, test_start), params, path) for params, path in candidates]
+            train, params, path = max(scored, key = lambda s: s[0][self.rank_by])
+            test = self.score(path, test_start, test_end)
+            rows.append({
+                'train_start': train_start,
+                'test_start': test_start,
+                'test_end': test_end,
+                **params,
+                'train_trades': train['trades'],
+                'train_balance': train['balance'],
+                **{f'test_{k}': v for k, v in test.items()},
+            })
+        return pd.DataFrame(rows)
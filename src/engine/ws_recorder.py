@@ -0,0 +1,61 @@
+import os
+import gzip
+import time
+import zlib
+import logging
+
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/ws-recorder.log', logging.DEBUG)
+
+#
+# Append-only gzip log of raw websocket frames
+#
+# One line per record: "<receive time>\t<kind>\t<payload>". ``ws`` records hold the
+# raw frame as received, ``klines`` records the 1m history of a symbol fetched over REST
+# when the socket (re)connects, as {"symbol": ..., "klines": [...]}. Every session appends a new gzip member, so a log that was
+# cut short by a crash still reads up to the last flush.
+#
+
+class WsRecorder():
+    def __init__(self, path, flush_interval = 1.0):
+        """
+        :param path: log file, appended to if it exists
+        :param flush_interval: seconds between flushes of the compressor
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = gzip.open(path, 'ab')
+        self.last_flush = time.monotonic()
+        self.records = 0
+
+    def record(self, payload, kind = 'ws', received = None):
+        received = time.time() if received is None else received
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
+        self.file.write(f"{received:.6f}\t{kind}\t{payload}\n".encode('utf-8'))
+        self.records += 1
+        now = time.monotonic()
+        if now - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = now
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            logger.info(f"close: {self.records} records in {self.path}")
+
+def read_log(path):
+    """Yield (received, kind, payload) records of a recorder log, in order"""
+    with gzip.open(path, 'rb') as f:
+        try:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                received, kind, payload = line.decode('utf-8').rstrip('\n').split('\t', 2)
+                yield float(received), kind, payload
+        except (EOFError, zlib.error) as err:
+            # last member was not closed, everything flushed before it is still there
+            logger.warning(f"read_log: {path} is truncated, {err}")
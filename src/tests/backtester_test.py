@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.engine.backtester import Backtester
+from src.engine.vectorized import VectorizedExecutor
+from src.engine.strategy import strategy
+
+def synthetic_table(n = 20 * 1440, seed = 7):
+    rng = np.random.default_rng(seed)
+    index = np.arange(n, dtype=np.int64) * 60 + 1609459200
+    close = 30000 + np.cumsum(rng.normal(0, 15, n))
+    opens = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(opens, close) + rng.uniform(0, 20, n)
+    low = np.minimum(opens, close) - rng.uniform(0, 20, n)
+
+    table = pd.DataFrame({'Open': opens, 'High': high, 'Low': low, 'Close': close}, index = index)
+    table['daily_open'] = table['Open'].where(index % 86400 == 0).ffill()
+    table['atr'] = np.where(np.arange(n) < 60, np.nan, 40 + rng.uniform(0, 20, n))
+    for name, block in [('hma', 240), ('ao', 45), ('aroon', 30)]:
+        states = np.repeat(rng.choice([True, False], n // block + 1), block)[:n].astype(object)
+        states[:90] = None
+        table[name] = states
+    return table
+
+class TestBacktester(unittest.TestCase):
+    def setUp(self):
+        self.table = synthetic_table()
+
+    def _rowwise(self):
+        bt = Backtester(strategy = strategy, symbol = 'BTCUSD', testmode = True)
+        bt.rowwise = True
+        bt.execute_strategy(self.table)
+        return bt.account
+
+    def _vectorized(self):
+        bt = Backtester(strategy = strategy, symbol = 'BTCUSD', testmode = True)
+        bt.execute_strategy(self.table)
+        return bt.account
+
+    def test_same_trades(self):
+        rowwise = self._rowwise()
+        vectorized = self._vectorized()
+
+        self.assertGreater(len(rowwise.trades), 10)
+        self.assertEqual(len(rowwise.trades), len(vectorized.trades))
+        for r, v in zip(rowwise.trades, vectorized.trades):
+            self.assertEqual(r['side'], v['side'])
+            self.assertEqual(r['opentimestamp'], v['opentimestamp'])
+            self.assertEqual(r['closetimestamp'], v['closetimestamp'])
+            self.assertEqual(r['exit'], v['exit'])
+            self.assertEqual(r['result']['stopped'], v['result']['stopped'])
+        self.assertEqual(rowwise.balance, vectorized.balance)
+
+    def test_entries_respect_no_trade_hours(self):
+        executor = VectorizedExecutor(strategy, self._vectorized())
+        long, short = executor.entries(self.table, ['hma', 'ao', 'aroon'])
+        hours = self.table.index[long | short] // 3600 % 24
+        self.assertFalse(set(hours) & set(strategy['no-trade-hours']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic(self):
+        from src.engine.benchmark import synthetic_ohlcv
+        a, b = synthetic_ohlcv(2), synthetic_ohlcv(2)
+        self.assertTrue(a.equals(b))
+        self.assertEqual(len(a.index), 2 * 1440)
+        self.assertTrue((a['High'] >= a[['Open', 'Close']].max(axis = 1)).all())
+        self.assertTrue((a['Low'] <= a[['Open', 'Close']].min(axis = 1)).all())
+        self.assertFalse(a.equals(synthetic_ohlcv(2, seed = 12)))
+
+    def test_run(self):
+        from src.engine.benchmark import Benchmark, STAGES
+        result = Benchmark(days = 10, repeat = 2).run()
+        self.assertEqual(list(result['stages']), list(STAGES))
+        for row in result['stages'].values():
+            self.assertGreater(row['min'], 0)
+            self.assertGreaterEqual(row['median'], row['min'])
+            self.assertGreater(row['peak_mb'], 0)
+        self.assertEqual(result['meta']['rows'], 10 * 1440)
+        # same klines, same trades
+        self.assertEqual(result['result'], Benchmark(days = 10, repeat = 1).run()['result'])
+        json.dumps(result)
+
+    def test_compare(self):
+        from src.engine.benchmark import compare
+        baseline = {'stages': {'load': {'min': 1.0, 'peak_mb': 10.0}, 'join': {'min': 2.0, 'peak_mb': 5.0}}}
+        current = {'stages': {'load': {'min': 1.5, 'peak_mb': 10.0}, 'join': {'min': 1.0, 'peak_mb': 5.5}}}
+        rows = {(r['stage'], r['metric']): r for r in compare(baseline, current, tolerance = 0.2)}
+        self.assertTrue(rows[('load', 'min')]['regression'])
+        self.assertEqual(rows[('load', 'min')]['change'], 0.5)
+        self.assertFalse(rows[('join', 'min')]['regression'])
+        self.assertFalse(rows[('join', 'peak_mb')]['regression'])
+
+    def test_startup(self):
+        from src.engine.benchmark import startup, compare, STARTUP
+        result = startup(repeat = 1)
+        self.assertEqual(list(result['stages']), [f'startup {engine}' for engine in STARTUP])
+        modules = result['result']['modules']
+        # every engine only loads its own dependencies
+        self.assertEqual(modules['main'], [])
+        self.assertNotIn('websockets', modules['backtester'])
+        self.assertNotIn('requests', modules['replay'])
+        for engine in STARTUP:
+            self.assertNotIn('matplotlib', modules[engine])
+            self.assertNotIn('dateparser', modules[engine])
+        self.assertTrue(all(row['regression'] is False for row in compare(result, result)))
+
+    def test_main(self):
+        from src.engine.benchmark import _main
+        tmp = tempfile.mkdtemp()
+        try:
+            out = os.path.join(tmp, 'bench', 'result.json')
+            self.assertEqual(_main(['--days', '5', '--repeat', '1', '--out', out]), 0)
+            with open(out) as f:
+                result = json.load(f)
+            # a baseline ten times faster and smaller than anything measured
+            for row in result['stages'].values():
+                row['min'] /= 10
+                row['peak_mb'] /= 10
+            with open(out, 'w') as f:
+                json.dump(result, f)
+            self.assertEqual(_main(['--days', '5', '--repeat', '1', '--compare', out]), 1)
+        finally:
+            shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    unittest.main()
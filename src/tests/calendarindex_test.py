@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+class TestCalendarIndex(unittest.TestCase):
+    def setUp(self):
+        from src.utils.calendar_index import CalendarIndex
+        self.ts = np.arange(1614556800 - 7200, 1614556800 + 2 * 86400, 60)
+        self.calendar = CalendarIndex(self.ts)
+
+    def test_fields(self):
+        for i in [0, 1, 119, 120, 500, 1439, 2000, len(self.ts) - 1]:
+            dt = datetime.fromtimestamp(int(self.ts[i]), tz = timezone.utc)
+            self.assertEqual(self.calendar.hour[i], dt.hour)
+            self.assertEqual(self.calendar.minute_of_day[i], dt.hour * 60 + dt.minute)
+            self.assertEqual(self.calendar.bucket('15m')[i], self.ts[i] - dt.minute % 15 * 60)
+            self.assertEqual(self.calendar.bucket('1h')[i], self.ts[i] - dt.minute * 60)
+
+    def test_days(self):
+        self.assertEqual(int(self.calendar.start_of_day().sum()), 2)
+        self.assertEqual(list(np.flatnonzero(self.calendar.new_day())), [120, 1560])
+
+    def test_join_indis(self):
+        from src.engine.engine import Engine
+        from src.engine.strategy import strategy
+        engine = Engine(strategy = strategy, symbol = 'BTCUSD')
+        engine.klines['1m'] = pd.DataFrame({'Open': np.arange(len(self.ts), dtype=float)}, index = self.ts)
+        hours = np.arange(self.ts[0], self.ts[-1], 3600)
+        indis = {'1h': pd.DataFrame({'atr': hours / 3600.0}, index = hours)}
+        table = engine._join_indis(indis)
+
+        self.assertTrue(np.isnan(table['daily_open'].iloc[119]))
+        self.assertEqual(table['daily_open'].iloc[120], 120)
+        self.assertEqual(table['daily_open'].iloc[1559], 120)
+        self.assertEqual(table['daily_open'].iloc[1560], 1560)
+        self.assertTrue((table['atr'].to_numpy() == (self.ts - self.ts % 3600) / 3600.0).all())
+        self.assertNotIn('daily_open', engine.klines['1m'])
+
+if __name__ == '__main__':
+    unittest.main()
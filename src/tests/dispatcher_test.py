@@ -0,0 +1,59 @@
+import json
+import asyncio
+import unittest
+
+class TestDispatcher(unittest.TestCase):
+    def test_peek_topic(self):
+        from src.engine.dispatcher import peek_topic
+        self.assertEqual(peek_topic('{"topic":"klineV2.1.BTCUSD","data":[]}'), 'klineV2.1.BTCUSD')
+        self.assertEqual(peek_topic(json.dumps({'topic': 'order', 'data': []})), 'order')
+        self.assertIsNone(peek_topic('{"success":true,"ret_msg":"pong","request":{"op":"ping","args":null}}'))
+
+    def test_exact_routes(self):
+        from src.engine.dispatcher import Dispatcher
+        calls = []
+        routes = Dispatcher({'order': lambda t: calls.append(('order', t)), 'kline': lambda t: calls.append(('kline', t))})
+        for topic in ['order', 'stop_order', 'orderBookL2_25.BTCUSD', 'kline.1m', 'klineV2.1.BTCUSD', 'order']:
+            routes.dispatch(topic, topic)
+        self.assertEqual(calls, [('order', 'order'), ('kline', 'kline.1m'), ('order', 'order')])
+
+    def test_bybit_ws_routes(self):
+        from src.engine.bybit_ws import BybitWs
+        callbacks = []
+        ws = BybitWs(None, None, 'BTCUSD', callback = lambda topic, data: callbacks.append(topic), ws = False)
+        frames = [
+            {'success': True, 'request': {'op': 'auth'}},
+            {'topic': 'stop_order', 'data': [{'stop_order_id': '1'}]},
+            {'topic': 'order', 'data': [{'order_id': '2'}]},
+            {'topic': 'orderBookL2_25.BTCUSD', 'type': 'snapshot', 'data': [{'price': '100', 'side': 'Buy', 'size': 1}]},
+            {'topic': 'trade.BTCUSD', 'data': [{'price': 100, 'size': 1}, {'price': 101, 'size': 2}]},
+            {'topic': 'instrument_info.100ms.BTCUSD', 'type': 'snapshot', 'data': {'last_price': '100'}},
+            {'topic': 'unknown.BTCUSD', 'data': 'not decoded'},
+        ]
+        async def run():
+            for frame in frames:
+                await ws._on_message(json.dumps(frame))
+        asyncio.run(run())
+        self.assertEqual(callbacks, ['auth', 'stop_order', 'order'])
+        self.assertEqual(ws.ws_data['order'][0], {'order_id': '2'})
+        self.assertEqual(ws.ws_data['stop_order'][0], {'stop_order_id': '1'})
+        self.assertEqual(len(ws.ws_data['trade.BTCUSD']), 2)
+        self.assertEqual(ws.ws_data['instrument_info.100ms.BTCUSD']['last_price'], '100')
+        self.assertEqual(ws.get_orderbook('Buy').best(), (100.0, 1.0))
+
+    def test_skalpit_callback(self):
+        from src.engine.skalpit import Skalpit
+        calls = []
+        class Recording(Skalpit):
+            def _parse_order(self, topic, data):
+                calls.append(('order', topic))
+            def _parse_kline(self, topic, data):
+                calls.append(('kline', topic))
+        skalpit = Recording(testmode = True)
+        for topic in ['auth', 'stop_order', 'order', 'kline.1m']:
+            skalpit.callback(topic = topic, data = {'success': True})
+        self.assertTrue(skalpit.ws_ready)
+        self.assertEqual(calls, [('order', 'order'), ('kline', 'kline.1m')])
+
+if __name__ == '__main__':
+    unittest.main()
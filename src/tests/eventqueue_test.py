@@ -0,0 +1,109 @@
+import time
+import threading
+import unittest
+
+class TestEventQueue(unittest.TestCase):
+    def _drain(self, events):
+        result = []
+        while len(events):
+            result.append(events.get())
+            events.task_done()
+        return result
+
+    def test_coalesce_keeps_latest_in_order(self):
+        from src.engine.event_queue import EventQueue
+        events = EventQueue(coalesce = ('kline',))
+        events.put('kline.1m', 1)
+        events.put('order', 'a')
+        events.put('kline.1m', 2)
+        events.put('execution', 'b')
+        events.put('kline.1m', 3)
+        self.assertEqual(self._drain(events), [('order', 'a'), ('execution', 'b'), ('kline.1m', 3)])
+        self.assertEqual(events.stats['coalesced'], 2)
+        self.assertTrue(events.join(0))
+
+    def test_drop_policies(self):
+        from src.engine.event_queue import EventQueue
+        events = EventQueue(maxsize = 2, overflow = 'drop_newest')
+        self.assertEqual([events.put('order', i) for i in range(4)], [True, True, False, False])
+        self.assertEqual(self._drain(events), [('order', 0), ('order', 1)])
+
+        events = EventQueue(maxsize = 2, overflow = 'drop_oldest')
+        for i in range(4):
+            events.put('order', i)
+        self.assertEqual(self._drain(events), [('order', 2), ('order', 3)])
+        self.assertEqual(events.stats['dropped'], 2)
+        self.assertTrue(events.join(0))
+
+        with self.assertRaises(ValueError):
+            EventQueue(overflow = 'wait')
+
+    def test_block_until_consumed(self):
+        from src.engine.event_queue import EventQueue, EventWorker
+        events = EventQueue(maxsize = 2)
+        seen = []
+        release = threading.Event()
+        def handler(topic, data):
+            release.wait(5)
+            seen.append(data)
+        worker = EventWorker(events, handler)
+        tic = time.monotonic()
+        threading.Timer(0.2, release.set).start()
+        for i in range(5):
+            events.put('order', i)
+        # the producer waited for the worker to make room
+        self.assertGreaterEqual(time.monotonic() - tic, 0.15)
+        self.assertTrue(events.join(5))
+        worker.stop()
+        self.assertEqual(seen, list(range(5)))
+        self.assertGreater(events.stats['blocked'], 0)
+
+    def test_spill_keeps_order(self):
+        from src.engine.event_queue import EventQueue
+        events = EventQueue(maxsize = 2, coalesce = ('kline',), overflow = 'spill')
+        self.assertTrue(all(events.put('order', i) for i in range(4)))
+        events.put('kline.1m', 0)
+        events.put('kline.1m', 1)
+        self.assertEqual(self._drain(events), [('order', i) for i in range(4)] + [('kline.1m', 1)])
+        self.assertEqual(events.stats['spilled'], 3)
+        self.assertFalse(events.spilling)
+
+    def test_block_never_waits_on_event_loop(self):
+        import asyncio
+        from src.engine.event_queue import EventQueue
+        events = EventQueue(maxsize = 2, overflow = 'block')
+        events.put('order', 0)
+        events.put('order', 1)
+
+        async def receive():
+            # like BybitWs._on_message, the callback puts from the loop thread
+            tic = time.monotonic()
+            events.put('execution', 2)
+            return time.monotonic() - tic
+
+        elapsed = []
+        # on its own thread, a regression blocks that thread instead of the test
+        producer = threading.Thread(target = lambda: elapsed.append(asyncio.run(receive())), daemon = True)
+        producer.start()
+        producer.join(2)
+        self.assertFalse(producer.is_alive())
+        self.assertLess(elapsed[0], 0.1)
+        self.assertEqual(self._drain(events), [('order', 0), ('order', 1), ('execution', 2)])
+        self.assertEqual((events.stats['blocked'], events.stats['spilled']), (0, 1))
+
+    def test_worker_errors(self):
+        from src.engine.event_queue import EventQueue, EventWorker
+        events = EventQueue()
+        errors = []
+        def handler(topic, data):
+            if data == 1:
+                raise ValueError('bad event')
+        worker = EventWorker(events, handler, on_error = errors.append)
+        for i in range(3):
+            events.put('order', i)
+        self.assertTrue(events.join(5))
+        worker.stop()
+        self.assertEqual([str(e) for e in errors], ['bad event'])
+
+if __name__ == '__main__':
+    unittest.main()
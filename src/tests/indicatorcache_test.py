@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+class TestIndicatorCache(unittest.TestCase):
+    def setUp(self):
+        from src.utils import indicators
+        self.indicators = indicators
+        self.cache = indicators.configure_cache(maxsize = 2)
+        n = 300
+        close = 100 + np.cumsum(np.random.default_rng(5).normal(0, 1, n))
+        self.klines = {'1h': pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close}, index = np.arange(n) * 3600)}
+        self.hma = {'name': 'hma', 'properties': {'interval': '1h', 'length': 21, 'offset': 2}}
+        self.atr = {'name': 'atr', 'properties': {'interval': '1h', 'length': 24}}
+
+    def tearDown(self):
+        self.indicators.configure_cache()
+
+    def test_hit(self):
+        first = self.indicators.calc_indi(self.hma, self.klines, 'BTCUSD')
+        second = self.indicators.calc_indi(self.hma, self.klines, 'BTCUSD')
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key(self):
+        key = self.cache.key(self.hma, self.klines, 'BTCUSD')
+        self.assertNotEqual(key, self.cache.key(self.hma, self.klines, 'ETHUSD'))
+        self.assertNotEqual(key, self.cache.key({'name': 'hma', 'properties': {'interval': '1h', 'length': 34, 'offset': 2}}, self.klines, 'BTCUSD'))
+        changed = {'1h': self.klines['1h'].copy()}
+        changed['1h'].iloc[-1, 3] += 1
+        self.assertNotEqual(key, self.cache.key(self.hma, changed, 'BTCUSD'))
+
+    def test_lru_eviction(self):
+        self.indicators.calc_indi(self.hma, self.klines)
+        self.indicators.calc_indi(self.atr, self.klines)
+        self.indicators.calc_indi({'name': 'aroon', 'properties': {'interval': '1h', 'length': 17}}, self.klines)
+        self.assertEqual(len(self.cache.entries), 2)
+        self.indicators.calc_indi(self.hma, self.klines)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.indicators.configure_cache(path = path)
+            interval, expected = self.indicators.calc_indi(self.atr, self.klines)
+            cache = self.indicators.configure_cache(path = path)
+            result = self.indicators.calc_indi(self.atr, self.klines)
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(result[0], interval)
+            self.assertEqual(result[1].name, 'atr')
+            np.testing.assert_array_equal(result[1].to_numpy(), expected.to_numpy())
+            np.testing.assert_array_equal(result[1].index, expected.index)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import math
+import numpy as np
+import pandas as pd
+
+def reference_wma(series, length):
+    weights = np.arange(1, length + 1)
+    return series.rolling(length, min_periods=length).apply(lambda x: np.dot(x, weights) / weights.sum(), raw=True)
+
+def reference_hma(series, length):
+    wmaf = reference_wma(series, int(length / 2))
+    wmas = reference_wma(series, length)
+    return reference_wma(2 * wmaf - wmas, int(math.sqrt(length)))
+
+class TestIndicators(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 600
+        close = 30000 + np.cumsum(rng.normal(0, 20, n))
+        self.klines = {'1h': pd.DataFrame({
+            'Open': close,
+            'High': close + rng.uniform(0, 30, n),
+            'Low': close - rng.uniform(0, 30, n),
+            'Close': close,
+        }, index = np.arange(n) * 3600)}
+
+    def test_hma_kernel(self):
+        from src.utils.indicators import _hma
+        close = self.klines['1h']['Close']
+        expected = reference_hma(close, 55).to_numpy()
+        np.testing.assert_allclose(_hma(close.to_numpy(), 55), expected, rtol=1e-12)
+
+    def test_hma_signal(self):
+        from src.utils.indicators import hma
+        close = self.klines['1h']['Close']
+        expected = reference_hma(close, 55)
+        interval, signal = hma({'interval': '1h', 'length': 55, 'offset': 2}, self.klines)
+        valid = expected.notna() & expected.shift(2).notna()
+        self.assertEqual(interval, '1h')
+        self.assertTrue(signal[~valid].isna().all())
+        self.assertTrue(((signal[valid] == 1.0) == (expected > expected.shift(2))[valid]).all())
+
+    def test_ao(self):
+        from src.utils.indicators import ao
+        k = self.klines['1h']
+        median = 0.5 * (k['High'] + k['Low'])
+        expected = median.rolling(6).mean() - median.rolling(38).mean()
+        _, signal = ao({'interval': '1h', 'fast': 6, 'slow': 38, 'offset': 2}, self.klines)
+        self.assertEqual(int(signal.isna().sum()), 39)
+        self.assertTrue(((signal[39:] == 1.0) == (expected > expected.shift(2))[39:]).all())
+
+    def test_aroon(self):
+        from src.utils.indicators import _aroon_osc
+        k = self.klines['1h']
+        hh = k['High'].rolling(18).apply(lambda x: int(np.argmax(x[::-1])), raw=True)
+        ll = k['Low'].rolling(18).apply(lambda x: int(np.argmin(x[::-1])), raw=True)
+        expected = (100 * (1 - hh / 17) - 100 * (1 - ll / 17)).to_numpy()
+        np.testing.assert_allclose(_aroon_osc(k['High'].to_numpy(), k['Low'].to_numpy(), 17), expected, atol=1e-9)
+
+    def test_atr(self):
+        from src.utils.indicators import atr
+        k = self.klines['1h']
+        prev = k['Close'].shift(1)
+        tr = pd.concat([k['High'] - k['Low'], (k['High'] - prev).abs(), (k['Low'] - prev).abs()], axis=1).max(axis=1)
+        tr.iloc[:1] = np.nan
+        expected = tr.ewm(alpha=1 / 24, min_periods=24).mean()
+        _, result = atr({'interval': '1h', 'length': 24}, self.klines)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+START = 1614556800
+NOW = START + 3 * 86400
+
+class KlineHandler(BaseHTTPRequestHandler):
+    """Stand-in for GET /v2/public/kline/list"""
+    fail_once = set()
+    requests = []
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        _from, limit, step = int(query['from']), int(query['limit']), int(query['interval']) * 60
+        KlineHandler.requests.append(_from)
+        if _from in KlineHandler.fail_once:
+            KlineHandler.fail_once.discard(_from)
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b'error')
+            return
+
+        first = _from - _from % step
+        result = [{'symbol': query['symbol'], 'interval': query['interval'], 'open_time': ts,
+                   'open': str(ts / 100), 'high': str(ts / 100 + 1), 'low': str(ts / 100 - 1), 'close': str(ts / 100),
+                   'volume': '10', 'turnover': '0.1'}
+                  for ts in range(first, min(first + limit * step, NOW), step)]
+        body = json.dumps({'ret_code': 0, 'result': result}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestKlineDownloader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), KlineHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        from src.engine.bybit_rest import BybitRest
+        self.rest = BybitRest(api_key = 'key', secret = 'secret', symbol = 'BTCUSD')
+        self.rest.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.tmp = tempfile.TemporaryDirectory()
+        KlineHandler.requests = []
+        KlineHandler.fail_once = set()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_download(self):
+        from src.engine.kline_downloader import KlineDownloader
+        data = KlineDownloader(self.rest, 'BTCUSD', '1m', workers = 4, rate = 100).download(START, NOW)
+        self.assertEqual(data.shape, (3 * 1440, 7))
+        self.assertEqual(data[0, 0], START)
+        self.assertEqual(data[-1, 0], NOW - 60)
+        self.assertTrue((data[1:, 0] - data[:-1, 0] == 60).all())
+        self.assertEqual(data[10, 2], (START + 600) / 100 + 1)
+        self.assertEqual(len(KlineHandler.requests), 22)
+
+    def test_resume(self):
+        from src.engine.kline_downloader import KlineDownloader
+        from src.utils.kline_store import KlineStore
+        store = KlineStore(self.tmp.name)
+        checkpoint = os.path.join(self.tmp.name, 'BTCUSD', '1m.download.json')
+        failing = START + 5 * 200 * 60
+        KlineHandler.fail_once = {failing}
+
+        downloader = KlineDownloader(self.rest, 'BTCUSD', '1m', store = store, checkpoint = checkpoint, rate = 100, retries = 1)
+        downloader.download(START, NOW)
+        self.assertTrue(os.path.exists(checkpoint))
+        self.assertEqual(downloader.pending_start(), START)
+        self.assertEqual(len(store.load('BTCUSD', '1m').index), 3 * 1440 - 200)
+
+        KlineHandler.requests = []
+        KlineDownloader(self.rest, 'BTCUSD', '1m', store = store, checkpoint = checkpoint, rate = 100).download(START, NOW)
+        self.assertEqual(KlineHandler.requests, [failing])
+        self.assertFalse(os.path.exists(checkpoint))
+        self.assertEqual(len(store.load('BTCUSD', '1m').index), 3 * 1440)
+
+    def test_resume_later_end(self):
+        from src.engine.kline_downloader import KlineDownloader
+        from src.utils.kline_store import KlineStore
+        from src.utils.time_range import find_gaps
+        store = KlineStore(self.tmp.name)
+        checkpoint = os.path.join(self.tmp.name, 'BTCUSD', '1m.download.json')
+        KlineHandler.fail_once = {START}
+
+        # 2.5 windows, the last one cut short at the first end
+        KlineDownloader(self.rest, 'BTCUSD', '1m', store = store, checkpoint = checkpoint, rate = 100, retries = 1).download(START, START + 500 * 60)
+        self.assertTrue(os.path.exists(checkpoint))
+
+        # resumed to a later end, the cut short window is fetched again in full
+        KlineHandler.requests = []
+        KlineDownloader(self.rest, 'BTCUSD', '1m', store = store, checkpoint = checkpoint, rate = 100).download(START, START + 800 * 60)
+        self.assertEqual(sorted(KlineHandler.requests), [START, START + 400 * 60, START + 600 * 60])
+        ts = store.load('BTCUSD', '1m').index.to_numpy()
+        self.assertEqual(len(ts), 800)
+        self.assertEqual(find_gaps(ts, START, START + 800 * 60, 60), [])
+
+    def test_one_token_per_request(self):
+        from src.engine.kline_downloader import KlineDownloader
+        KlineHandler.fail_once = {START + 200 * 60}
+        # the transport would retry the 500 on its own, outside the token bucket
+        self.assertGreater(self.rest.transport.retries, 0)
+        downloader = KlineDownloader(self.rest, 'BTCUSD', '1m', rate = 100)
+        data = downloader.download(START, START + 600 * 60)
+        self.assertEqual(len(data), 600)
+        self.assertEqual(len(KlineHandler.requests), 4)
+        self.assertEqual(downloader.requests, len(KlineHandler.requests))
+
+    def test_backfill_holes(self):
+        from src.engine.kline_downloader import KlineDownloader
+        from src.utils.kline_store import KlineStore
+        store = KlineStore(self.tmp.name)
+        downloader = KlineDownloader(self.rest, 'BTCUSD', '1m', store = store, rate = 100)
+        self.assertEqual(downloader.backfill(START + 86400, START + 2 * 86400), 1440)
+        self.assertEqual(len(KlineHandler.requests), 8)
+
+        # an older start only fetches what is before the data on disk, plus the rest up to now
+        KlineHandler.requests = []
+        self.assertEqual(downloader.backfill(START, NOW + 30), 2 * 1440)
+        self.assertEqual(len(KlineHandler.requests), 16)
+        self.assertTrue(all(r < START + 86400 or r >= START + 2 * 86400 for r in KlineHandler.requests))
+        self.assertEqual(store.coverage('BTCUSD', '1m'), [(START, NOW)])
+
+        # nothing is missing, nothing is fetched and the store is unchanged
+        KlineHandler.requests = []
+        self.assertEqual(downloader.backfill(START, NOW), 0)
+        self.assertEqual(KlineHandler.requests, [])
+        frame = store.load('BTCUSD', '1m')
+        self.assertEqual(len(frame.index), 3 * 1440)
+        self.assertTrue(frame.index.is_unique)
+
+    def test_token_bucket(self):
+        from src.engine.kline_downloader import TokenBucket
+        bucket = TokenBucket(rate = 50, capacity = 5)
+        tic = time.perf_counter()
+        for _ in range(15):
+            bucket.acquire()
+        self.assertGreater(time.perf_counter() - tic, 0.18)
+
+    def test_get_hist_klines(self):
+        rows = self.rest.get_hist_klines('BTCUSD', 15, str(NOW - 86400), str(NOW))
+        self.assertGreater(len(rows), 0)
+        self.assertEqual(rows[0][0], NOW - 86400)
+        self.assertEqual(len(rows[0]), 7)
+        self.assertEqual(len(rows), 96)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+class TestKlineStore(unittest.TestCase):
+    def setUp(self):
+        from src.utils.kline_store import KlineStore
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = KlineStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _klines(self, start, n, step = 60):
+        ts = np.arange(start, start + n * step, step)
+        values = np.column_stack([ts / 10 + i for i in range(6)])
+        return ts, values
+
+    def test_write_partitions_by_day(self):
+        ts, values = self._klines(1614556800 - 600, 30)
+        self.store.write('BTCUSD', '1m', ts, values)
+        self.assertEqual(self.store.days('BTCUSD', '1m'), [18686, 18687])
+        self.assertEqual(self.store.first_timestamp('BTCUSD', '1m'), ts[0])
+        self.assertEqual(self.store.last_timestamp('BTCUSD', '1m'), ts[-1])
+
+    def test_load_range(self):
+        ts, values = self._klines(1614556800, 3 * 1440)
+        self.store.write('BTCUSD', '1m', ts, values)
+        frame = self.store.load('BTCUSD', '1m', int(ts[100]), int(ts[2000]))
+        self.assertEqual(len(frame.index), 1900)
+        self.assertEqual(frame.index[0], ts[100])
+        self.assertEqual(frame.index[-1], ts[1999])
+        self.assertEqual(frame['Close'].iloc[0], values[100, 3])
+
+    def test_merge_replaces_and_dedups(self):
+        ts, values = self._klines(1614556800, 10)
+        self.store.write('BTCUSD', '1m', ts, values)
+        self.store.write('BTCUSD', '1m', ts[5:], values[5:] + 1)
+        frame = self.store.load('BTCUSD', '1m')
+        self.assertEqual(len(frame.index), 10)
+        self.assertTrue(frame.index.is_monotonic_increasing)
+        self.assertEqual(frame['Open'].iloc[4], values[4, 0])
+        self.assertEqual(frame['Open'].iloc[5], values[5, 0] + 1)
+
+    def test_coverage(self):
+        ts, values = self._klines(1614556800, 10)
+        self.store.write('BTCUSD', '1m', ts, values)
+        self.store.write('BTCUSD', '1m', ts[:4] + 3600, values[:4])
+        # a window the exchange returned nothing for is covered as well
+        self.store.write('BTCUSD', '1m', [], [], span = (1614556800 + 7200, 1614556800 + 7800))
+        start = 1614556800
+        self.assertEqual(self.store.coverage('BTCUSD', '1m'), [(start, start + 600), (start + 3600, start + 3840), (start + 7200, start + 7800)])
+        self.assertEqual(self.store.missing('BTCUSD', '1m', start, start + 7800), [(start + 600, start + 3600), (start + 3840, start + 7200)])
+
+        # stores written before the index get it rebuilt from their klines
+        os.remove(os.path.join(self.tmp.name, 'BTCUSD', '1m.coverage.json'))
+        self.assertEqual(self.store.coverage('BTCUSD', '1m'), [(start, start + 600), (start + 3600, start + 3840)])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'BTCUSD', '1m.coverage.json')))
+
+    def test_import_csv(self):
+        ts, values = self._klines(1614556800, 5)
+        filename = os.path.join(self.tmp.name, 'kline_1m.csv')
+        with open(filename, 'w') as f:
+            for t, row in zip(ts, values):
+                f.write(','.join([str(t)] + [str(v) for v in row] + ['2021-03-01 00:00:00.01']) + '\n')
+        self.assertEqual(self.store.import_csv('BTCUSD', '1m', filename), 5)
+        self.assertEqual(len(self.store.load('BTCUSD', '1m').index), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from src.engine.strategy import strategy
+from src.tests.replay_test import kline_frame
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_spans(self):
+        from src.engine.latency import LatencyTracker
+        clock = FakeClock()
+        tracker = LatencyTracker(clock = clock)
+        tracker.begin('a')
+        for stage, at in [('dispatch', 0.002), ('signal', 0.010), ('execution', 0.150), ('order', 0.160), ('fill', 0.165)]:
+            clock.now = at
+            trace = tracker.mark('a', stage)
+        self.assertEqual(trace['id'], 'a')
+        self.assertEqual(trace['stages'], {'kline': 0, 'dispatch': 2, 'signal': 10, 'order': 160, 'execution': 150, 'fill': 165})
+        self.assertEqual(list(tracker.traces), [trace])
+        self.assertNotIn('a', tracker.pending)
+
+        summary = tracker.summary()
+        self.assertAlmostEqual(summary['exchange']['p50'], 140)
+        self.assertAlmostEqual(summary['order']['max'], 150)
+        self.assertAlmostEqual(summary['total']['p99'], 165)
+        self.assertEqual(summary['handoff']['count'], 1)
+
+    def test_discard(self):
+        from src.engine.latency import LatencyTracker
+        clock = FakeClock()
+        tracker = LatencyTracker(clock = clock, pending = 2)
+        tracker.begin('a')
+        clock.now = 0.001
+        tracker.mark('a', 'dispatch')
+        tracker.discard('a')
+        # a candle without a signal still counts for its first spans
+        self.assertEqual(tracker.summary()['queue']['count'], 1)
+        self.assertIsNone(tracker.mark('a', 'signal'))
+        self.assertIsNone(tracker.mark(None, 'fill'))
+        for cid in 'bcd':
+            tracker.begin(cid)
+        self.assertEqual(list(tracker.pending), ['c', 'd'])
+
+class TestSignalToFill(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_trade(self):
+        import asyncio
+        from src.engine.replay import Replay
+        from src.engine.latency import correlation_id
+        from src.tests.sweep_test import synthetic_klines
+        from src.engine.ws_recorder import WsRecorder
+        import numpy as np
+
+        klines = synthetic_klines(days = 4)['1m']
+        path = os.path.join(self.dir, 'session.log.gz')
+        recorder = WsRecorder(path)
+        recorder.record(json.dumps(np.column_stack([klines.index, klines.to_numpy()]).tolist()), kind = 'klines', received = klines.index[-1])
+        recorder.record(json.dumps({'success': True, 'request': {'op': 'auth'}}), received = klines.index[-1])
+        recorder.close()
+
+        replay = Replay(path, strategy, export_dir = self.dir)
+        skalpit = replay.run()
+        skalpit._check_risk_management = lambda now, account = None: True
+        skalpit._check_time = lambda row: True
+        skalpit._check_signal = lambda row, signals: 'long'
+
+        last = klines.index[-1]
+        cid = correlation_id(last, 'BTCUSD')
+        ws = replay.ws
+        asyncio.run(ws._on_message(kline_frame(last + 60, 50000, 50000, 50000, 50000)))
+
+        orders = [kwargs for name, kwargs in replay.restclient.calls if name == 'place_active_order']
+        self.assertEqual([o['order_link_id'] for o in orders], [cid, f'{cid}-tp'])
+        self.assertEqual(set(skalpit.latency.pending[cid]), {'kline', 'dispatch', 'signal', 'order'})
+
+        execution = {'topic': 'execution', 'data': [{'order_id': 'x', 'order_link_id': cid, 'exec_qty': 1}]}
+        asyncio.run(ws._on_message(json.dumps(execution)))
+        self.assertNotIn(cid, skalpit.latency.pending)
+        with open(os.path.join(self.dir, 'latency.json')) as f:
+            exported = json.load(f)
+        self.assertEqual(exported['traces'][0]['id'], cid)
+        self.assertEqual(list(exported['traces'][0]['stages']), ['kline', 'dispatch', 'signal', 'order', 'execution', 'fill'])
+        self.assertEqual(set(exported['spans']), {'queue', 'decide', 'order', 'exchange', 'handoff', 'total'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        from src.account.test_account import TestAccount
+        self.account = TestAccount(startbalance = 1)
+        self.account.trades.data = self.account.trades.data[:4]
+        rng = np.random.default_rng(5)
+        ts = 1614556800
+        for i in range(20):
+            price = 50000 + rng.normal(0, 500)
+            side = 'long' if i % 2 else 'short'
+            direction = 1 if side == 'long' else -1
+            self.account.open(side, price, price - direction * 500, price + direction * 500, 2, timestamp = ts)
+            self.account.stopped = bool(rng.random() < 0.4)
+            exit = price - direction * 500 if self.account.stopped else price + direction * 500
+            self.account.close(exit, is_maker = not self.account.stopped, timestamp = ts + 600)
+            ts += 3600
+
+    def test_grows(self):
+        self.assertEqual(len(self.account.trades), 20)
+        self.assertGreaterEqual(len(self.account.trades.data), 20)
+
+    def test_trade_dicts(self):
+        trades = list(self.account.trades)
+        self.assertEqual(trades[-1], self.account.get_last_trade())
+        first = trades[0]
+        self.assertEqual(first['side'], 'short')
+        self.assertEqual(first['opentimestamp'], 1614556800)
+        self.assertEqual(first['closetimestamp'], 1614556800 + 600)
+        self.assertEqual(first['result']['exit'], first['exit'])
+        self.assertEqual(first['meta']['initialstop'], first['stop'])
+        for before, after in zip(trades, trades[1:]):
+            self.assertEqual(before['result']['balance']['after'], after['result']['balance']['before'])
+        self.assertEqual(trades[-1]['result']['balance']['after'], self.account.balance)
+
+    def test_missing_values(self):
+        from src.account.test_account import TestAccount
+        account = TestAccount(startbalance = 1)
+        account.open("long", 50000, 49000, risk = 5)
+        account.close(51000)
+        trade = account.trades[0]
+        self.assertIsNone(trade['tp'])
+        self.assertIsNone(trade['opentimestamp'])
+        self.assertIsNone(trade['closetimestamp'])
+
+    def test_summary(self):
+        from src.utils.utils import percent
+        summary = self.account.trades.summary(self.account.startbalance)
+        profits = [t['result']['profit'] for t in self.account.trades]
+        self.assertEqual(summary['trades'], 20)
+        self.assertEqual(summary['won'], self.account.totalwon)
+        self.assertEqual(summary['lost'], self.account.totallost)
+        self.assertEqual(summary['even'], self.account.totaleven)
+        self.assertAlmostEqual(summary['maxdrawdown'], self.account.maxdrawdown)
+        self.assertAlmostEqual(summary['balance'], self.account.balance)
+        self.assertAlmostEqual(summary['profitfactor'], sum(p for p in profits if p > 0) / -sum(p for p in profits if p < 0))
+        self.assertEqual(self.account.getResult()['growth'], f'{percent(1, self.account.balance):.2f}%')
+
+    def test_empty(self):
+        from src.account.test_account import TestAccount
+        result = TestAccount(startbalance = 1).getResult()
+        self.assertEqual(result['trades'], 0)
+        self.assertEqual(result['strikerate'], '0.00%')
+        self.assertEqual(result['maxdrawdown'], '0.00%')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import logging
+import tempfile
+import unittest
+
+class Rendered():
+    """Counts how often it is rendered into a log message"""
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return 'rendered'
+
+class TestLog(unittest.TestCase):
+    def setUp(self):
+        from src.utils.log import get_logger
+        self.dir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dir, 'test.log')
+        self.logger = get_logger(logging.getLogger(f'src.tests.log_test.{self.id()}'), self.fname, logging.INFO)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _lines(self):
+        from src.utils.log import flush
+        self.assertTrue(flush())
+        if not os.path.exists(self.fname):
+            return []
+        with open(self.fname) as f:
+            return f.read().splitlines()
+
+    def test_written_by_writer(self):
+        self.logger.info("value %s", 5)
+        lines = self._lines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith(f'{self.logger.name} - INFO - value 5'))
+
+    def test_disabled_level_not_formatted(self):
+        value = Rendered()
+        self.logger.debug("value %s", value)
+        self.assertEqual(self._lines(), [])
+        self.assertEqual(value.count, 0)
+
+    def test_mutable_args_rendered_at_call(self):
+        trade = {'size': 1}
+        self.logger.info("trade %s", trade)
+        trade['size'] = 2
+        self.assertTrue(self._lines()[0].endswith("trade {'size': 1}"))
+
+    def test_lazy_date(self):
+        from src.utils.log import LazyDate
+        self.logger.info("%s: closed", LazyDate(1614556800))
+        self.assertTrue(self._lines()[0].endswith('2021-03-01 00:00:00: closed'))
+
+    def test_sampling(self):
+        for i in range(250):
+            self.logger.info("frame %s", i, extra = {'sample': 100})
+        self.assertEqual([l.rsplit(' ', 1)[1] for l in self._lines()], ['0', '100', '200'])
+
+    def test_sampler(self):
+        from src.utils.log import Sampler
+        sample = Sampler(3)
+        self.assertEqual([sample() for _ in range(7)], [True, False, False, True, False, False, True])
+
+    def test_levels_by_prefix(self):
+        from src.utils.log import set_levels, parse_levels
+        self.assertEqual(parse_levels("src.engine=info, src.engine.bybit_ws=WARNING"),
+                         {'src.engine': logging.INFO, 'src.engine.bybit_ws': logging.WARNING})
+        set_levels({'src.tests.log_test': 'ERROR', self.logger.name: 'DEBUG'})
+        try:
+            self.assertEqual(self.logger.level, logging.DEBUG)
+            other = logging.getLogger('src.tests.log_test.other')
+            from src.utils.log import get_logger
+            get_logger(other, self.fname, logging.INFO)
+            self.assertEqual(other.level, logging.ERROR)
+        finally:
+            from src.utils.log import config
+            del config.levels['src.tests.log_test'], config.levels[self.logger.name]
+
+    def test_unknown_level_skipped(self):
+        from src.utils.log import set_levels, parse_levels, config
+        with self.assertLogs('src.utils.log', logging.WARNING):
+            self.assertEqual(parse_levels("src.engine=VERBOSE,src.utils=debug"), {'src.utils': logging.DEBUG})
+        with self.assertLogs('src.utils.log', logging.WARNING):
+            set_levels({self.logger.name: 'VERBOSE'})
+        self.assertNotIn(self.logger.name, config.levels)
+        self.assertEqual(self.logger.level, logging.INFO)
+
+        import sys
+        import subprocess
+        # a typo in LOG_LEVELS must not stop the engines from importing
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.run([sys.executable, '-c', 'import src.engine.backtester'], cwd = self.dir,
+                             env = {**os.environ, 'PYTHONPATH': root, 'LOG_LEVELS': 'src.engine=VERBOSE'},
+                             capture_output = True, text = True)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertIn('VERBOSE', out.stderr)
+
+    def test_nothing_opened_on_import(self):
+        import sys
+        import subprocess
+        # every module registers its logger on import, files and the writer thread wait for a record
+        code = ("import os, threading, src.engine.backtester, src.engine.skalpit, src.engine.replay; "
+                "print(os.path.exists('logs'), any(t.name == 'log-writer' for t in threading.enumerate()))")
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.run([sys.executable, '-c', code], cwd = self.dir, env = {**os.environ, 'PYTHONPATH': root},
+                             capture_output = True, text = True, check = True)
+        self.assertEqual(out.stdout.split(), ['False', 'False'])
+
+if __name__ == '__main__':
+    unittest.main()
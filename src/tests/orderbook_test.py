@@ -0,0 +1,70 @@
+import json
+import asyncio
+import unittest
+import numpy as np
+
+def level(price, side, size = None):
+    result = {'price': f'{price:.1f}', 'symbol': 'BTCUSD', 'id': int(price * 10000), 'side': side}
+    if size is not None:
+        result['size'] = size
+    return result
+
+class TestOrderBook(unittest.TestCase):
+    def setUp(self):
+        from src.engine.order_book import OrderBook
+        self.book = OrderBook()
+        self.book.snapshot([level(50000 - 0.5 * i, 'Buy', 100 + i) for i in range(25)] + [level(50000.5 + 0.5 * i, 'Sell', 200 + i) for i in range(25)])
+
+    def test_snapshot(self):
+        self.assertEqual(len(self.book), 50)
+        self.assertEqual(self.book.best_bid(), (50000.0, 100.0))
+        self.assertEqual(self.book.best_ask(), (50000.5, 200.0))
+        self.assertEqual(self.book.spread(), 0.5)
+        self.assertEqual(self.book.mid(), 50000.25)
+        self.assertTrue((np.diff(self.book.bids.prices) < 0).all())
+        self.assertTrue((np.diff(self.book.asks.prices) > 0).all())
+
+    def test_delta_applies_every_part(self):
+        self.book.delta({'delete': [level(50000, 'Buy')], 'update': [level(50000.5, 'Sell', 5)], 'insert': [level(50001.5, 'Buy', 7)]})
+        self.assertEqual(self.book.best_bid(), (50001.5, 7.0))
+        self.assertEqual(self.book.best_ask(), (50000.5, 5.0))
+        self.assertEqual(len(self.book.bids), 25)
+        self.assertNotIn(50000.0, self.book.bids.prices)
+
+    def test_top_is_a_view(self):
+        prices, sizes = self.book.bids.top(5)
+        self.assertEqual(list(prices), [50000, 49999.5, 49999, 49998.5, 49998])
+        self.book.delta({'update': [level(50000, 'Buy', 1)]})
+        self.assertEqual(sizes[0], 1)
+        self.assertTrue(np.shares_memory(prices, self.book.bids._prices))
+
+    def test_random_deltas(self):
+        from src.engine.order_book import OrderBook
+        rng = np.random.default_rng(3)
+        book = OrderBook()
+        book.bids = type(book.bids)('Buy', capacity = 4)
+        reference = {}
+        for _ in range(3000):
+            price = float(rng.integers(0, 200)) / 2
+            if rng.random() < 0.3:
+                book.delta({'delete': [level(price, 'Buy')]})
+                reference.pop(price, None)
+            else:
+                size = float(rng.integers(1, 100))
+                book.delta({'update': [level(price, 'Buy', size)]})
+                reference[price] = size
+        expected = sorted(reference.items(), reverse = True)
+        self.assertEqual(list(book.bids.prices), [p for p, _ in expected])
+        self.assertEqual(list(book.bids.sizes), [s for _, s in expected])
+
+    def test_bybit_ws(self):
+        from src.engine.bybit_ws import BybitWs
+        ws = BybitWs(None, None, 'BTCUSD', callback = lambda **kwargs: None, ws = False)
+        topic = 'orderBookL2_25.BTCUSD'
+        asyncio.run(ws._on_message(json.dumps({'topic': topic, 'type': 'snapshot', 'data': [level(100, 'Buy', 1), level(101, 'Sell', 2)]})))
+        asyncio.run(ws._on_message(json.dumps({'topic': topic, 'type': 'delta', 'data': {'delete': [], 'update': [], 'insert': [level(100.5, 'Sell', 3)]}})))
+        self.assertEqual(ws.get_orderbook('Sell').best(), (100.5, 3.0))
+        self.assertEqual(ws.get_orderbook('Buy').best(), (100.0, 1.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from src.engine.strategy import strategy
+from src.tests.sweep_test import synthetic_klines
+
+class TestPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.klines = {'BTCUSD': synthetic_klines(seed = 11), 'ETHUSD': synthetic_klines(seed = 12), 'XRPUSD': synthetic_klines(seed = 13)}
+
+    def _solo(self, symbol):
+        from src.engine.sweep import run_strategy
+        return run_strategy(strategy, self.klines[symbol])
+
+    def test_single_symbol(self):
+        from src.engine.portfolio import Portfolio
+        account = Portfolio.from_klines(strategy, {'BTCUSD': self.klines['BTCUSD']}).run()
+        solo = self._solo('BTCUSD')
+        self.assertEqual(account.getResult(), solo)
+        self.assertEqual(account.trades[0]['symbol'], 'BTCUSD')
+
+    def test_shared_balance(self):
+        from src.engine.portfolio import Portfolio, breakdown
+        portfolio = Portfolio.from_klines(strategy, self.klines)
+        account = portfolio.run()
+        trades = account.trades.array
+        solo = {symbol: self._solo(symbol) for symbol in self.klines}
+
+        self.assertGreater(len(trades), 10)
+        # the same trades as every symbol on its own, booked in the order they close
+        self.assertEqual(len(trades), sum(r['trades'] for r in solo.values()))
+        self.assertTrue((trades['closetimestamp'][1:] >= trades['closetimestamp'][:-1]).all())
+        self.assertTrue((trades['before'][1:] == trades['after'][:-1]).all())
+        self.assertEqual(trades['after'][-1], account.balance)
+
+        table = breakdown(account)
+        self.assertEqual(list(table.index), ['BTCUSD', 'ETHUSD', 'XRPUSD'])
+        for symbol, result in solo.items():
+            self.assertEqual(table.loc[symbol, 'trades'], result['trades'])
+            self.assertEqual(table.loc[symbol, 'won'], result['won'])
+            self.assertEqual(table.loc[symbol, 'lost'], result['lost'])
+        self.assertAlmostEqual(table['profit'].sum(), account.balance - 1)
+
+    def test_concurrent_positions(self):
+        from src.engine.portfolio import Portfolio
+        # two copies of the same market open every position at once, sized from the same balance
+        account = Portfolio.from_klines(strategy, {'A': self.klines['BTCUSD'], 'B': self.klines['BTCUSD']}).run()
+        trades = account.trades.array
+        a, b = trades[trades['symbol'] == b'A'], trades[trades['symbol'] == b'B']
+        self.assertEqual(len(a), len(b))
+        self.assertTrue((a['opentimestamp'] == b['opentimestamp']).all())
+        self.assertTrue((a['size'] == b['size']).all())
+        self.assertTrue((a['profit'] == b['profit']).all())
+
+if __name__ == '__main__':
+    unittest.main()
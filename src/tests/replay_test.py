@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from src.engine.strategy import strategy
+from src.tests.sweep_test import synthetic_klines
+
+def kline_frame(ts, o, h, l, c, symbol = 'BTCUSD'):
+    return json.dumps({'topic': f'klineV2.1.{symbol}', 'data': [{'start': int(ts), 'end': int(ts) + 60, 'open': o, 'high': h,
+        'low': l, 'close': c, 'volume': 1.0, 'turnover': 1.0, 'confirm': False}]})
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'session.log.gz')
+        # fits in the 6000 candles the websocket client keeps
+        self.klines = synthetic_klines(days = 4)
+        self.live = 120
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _record(self):
+        from src.engine.ws_recorder import WsRecorder
+        frame = self.klines['1m']
+        history, live = frame.iloc[:-self.live], frame.iloc[-self.live:]
+        recorder = WsRecorder(self.path)
+        recorder.record(json.dumps(np.column_stack([history.index, history.to_numpy()]).tolist()), kind = 'klines', received = live.index[0])
+        recorder.record(json.dumps({'success': True, 'request': {'op': 'auth'}}), received = live.index[0])
+        for ts, row in live.iterrows():
+            # a first tick at the open, then the final candle
+            recorder.record(kline_frame(ts, row['Open'], row['Open'], row['Open'], row['Open']), received = ts + 1)
+            recorder.record(kline_frame(ts, row['Open'], row['High'], row['Low'], row['Close']), received = ts + 59)
+        recorder.record(json.dumps({'topic': 'order', 'data': [{'order_id': 'abc', 'order_status': 'New'}]}), received = live.index[-1] + 59)
+        recorder.close()
+
+    def test_recorder_roundtrip(self):
+        from src.engine.ws_recorder import WsRecorder, read_log
+        self._record()
+        # a second session appends
+        recorder = WsRecorder(self.path)
+        recorder.record(b'{"op": "pong"}', received = 1.5)
+        recorder.close()
+        records = list(read_log(self.path))
+        self.assertEqual(len(records), 2 + 2 * self.live + 2)
+        self.assertEqual(records[0][1], 'klines')
+        self.assertEqual(records[-1], (1.5, 'ws', '{"op": "pong"}'))
+
+    def test_truncated_log(self):
+        from src.engine.ws_recorder import WsRecorder, read_log
+        recorder = WsRecorder(self.path, flush_interval = 0)
+        for i in range(10):
+            recorder.record(json.dumps({'i': i}), received = i)
+        # never closed, like a crashed session
+        recorder.file.fileobj.flush()
+        self.assertEqual([json.loads(p)['i'] for _, _, p in read_log(self.path)], list(range(10)))
+
+    def test_replay(self):
+        from src.engine.replay import Replay
+        from src.engine.engine import Engine
+        from src.utils.resample import resample
+        self._record()
+        replay = Replay(self.path, strategy, export_dir = self.dir)
+        skalpit = replay.run()
+        self.assertEqual(replay.frames, 2 * self.live + 2)
+        self.assertTrue(skalpit.ws_ready)
+        self.assertIn('abc', skalpit.account.orders)
+        self.assertEqual(replay.clock(), self.klines['1m'].index[-1] + 59)
+
+        # the last candle was passed on with its first tick only
+        frame = self.klines['1m'].copy()
+        frame.iloc[-1, frame.columns.get_indexer(['High', 'Low', 'Close'])] = frame['Open'].iloc[-1]
+        engine = Engine(strategy = strategy, symbol = 'BTCUSD')
+        engine.klines = {'1m': frame, '15m': resample(frame, '15m'), '1h': resample(frame, '1h')}
+        expected = engine._get_indis().iloc[-1]
+        row = skalpit.streams['BTCUSD'].row()
+        self.assertEqual(row.name, expected.name)
+        for column in ['Open', 'Close', 'daily_open', 'hma', 'ao', 'aroon']:
+            self.assertEqual(row[column], expected[column])
+        self.assertAlmostEqual(row['atr'], expected['atr'])
+
+    def test_threaded(self):
+        from src.engine.replay import Replay
+        self._record()
+        inline = Replay(self.path, strategy, export_dir = self.dir).run()
+        threaded = Replay(self.path, strategy, export_dir = self.dir, threaded = True).run()
+        self.assertIsNotNone(threaded.worker)
+        self.assertFalse(threaded.worker.is_alive())
+        self.assertTrue(threaded.streams['BTCUSD'].row().equals(inline.streams['BTCUSD'].row()))
+
+    def test_multi_symbol(self):
+        from src.engine.replay import Replay
+        from src.engine.ws_recorder import WsRecorder
+        self._record()
+        single = Replay(self.path, strategy, export_dir = self.dir).run()
+
+        eth = synthetic_klines(days = 4, seed = 12)['1m']
+        path = os.path.join(self.dir, 'multi.log.gz')
+        recorder = WsRecorder(path)
+        for symbol, frame in [('BTCUSD', self.klines['1m']), ('ETHUSD', eth)]:
+            history = frame.iloc[:-self.live]
+            recorder.record(json.dumps({'symbol': symbol, 'klines': np.column_stack([history.index, history.to_numpy()]).tolist()}),
+                kind = 'klines', received = frame.index[-self.live])
+        recorder.record(json.dumps({'success': True, 'request': {'op': 'auth'}}))
+        for (ts, btc), (_, row) in zip(self.klines['1m'].iloc[-self.live:].iterrows(), eth.iloc[-self.live:].iterrows()):
+            recorder.record(kline_frame(ts, btc['Open'], btc['Open'], btc['Open'], btc['Open']), received = ts + 1)
+            recorder.record(kline_frame(ts, row['Open'], row['Open'], row['Open'], row['Open'], 'ETHUSD'), received = ts + 1)
+            recorder.record(kline_frame(ts, btc['Open'], btc['High'], btc['Low'], btc['Close']), received = ts + 59)
+            recorder.record(kline_frame(ts, row['Open'], row['High'], row['Low'], row['Close'], 'ETHUSD'), received = ts + 59)
+        recorder.record(json.dumps({'topic': 'order', 'data': [{'order_id': 'a', 'symbol': 'BTCUSD'}, {'order_id': 'b', 'symbol': 'ETHUSD'},
+            {'order_id': 'c', 'symbol': 'XRPUSD'}]}))
+        recorder.close()
+
+        multi = Replay(path, strategy, symbols = ['BTCUSD', 'ETHUSD'], export_dir = self.dir, threaded = True).run()
+        # one connection, independent candles, indicators and accounts
+        self.assertEqual(multi.bybitws.symbols, ['BTCUSD', 'ETHUSD'])
+        self.assertTrue(multi.streams['BTCUSD'].row().equals(single.streams['BTCUSD'].row()))
+        self.assertEqual(multi.streams['ETHUSD'].row()['Open'], eth['Open'].iloc[-1])
+        self.assertEqual(multi.bybitws.ws_data['klines']['ETHUSD']['1m'][-1][0], eth.index[-1])
+        self.assertEqual(list(multi.accounts['BTCUSD'].orders), ['a'])
+        self.assertEqual(list(multi.accounts['ETHUSD'].orders), ['b'])
+
+        multi._check_risk_management = lambda now, account = None: True
+        multi._check_time = lambda row: True
+        multi._check_signal = lambda row, signals: 'short'
+        multi.process_kline(multi.streams['ETHUSD'].row(), multi.signals, symbol = 'ETHUSD')
+        orders = [kwargs for name, kwargs in multi.restclient.calls if name == 'place_active_order']
+        self.assertEqual([o['symbol'] for o in orders], ['ETHUSD', 'ETHUSD'])
+        self.assertEqual((multi.accounts['ETHUSD'].dailytrades, multi.accounts['BTCUSD'].dailytrades), (1, 0))
+
+        # live the take profits wait on timers, the worker does not sleep between symbols
+        from src.engine.skalpit import later, TP_DELAY
+        multi.later = later
+        multi.restclient.calls = []
+        tic = time.monotonic()
+        for symbol in ['BTCUSD', 'ETHUSD']:
+            multi.process_kline(multi.streams[symbol].row(), multi.signals, symbol = symbol)
+        self.assertLess(time.monotonic() - tic, TP_DELAY / 2)
+        orders = [kwargs for name, kwargs in multi.restclient.calls if name == 'place_active_order']
+        self.assertEqual([(o['symbol'], o['order_type']) for o in orders], [('BTCUSD', 'Market'), ('ETHUSD', 'Market')])
+        time.sleep(TP_DELAY + 0.5)
+        orders = [kwargs for name, kwargs in multi.restclient.calls if name == 'place_active_order']
+        self.assertEqual(sorted((o['symbol'], o['order_type']) for o in orders[2:]), [('BTCUSD', 'Limit'), ('ETHUSD', 'Limit')])
+
+    def test_speed(self):
+        from src.engine.replay import Replay
+        self._record()
+        tic = time.monotonic()
+        Replay(self.path, strategy, speed = 72000, export_dir = self.dir).run()
+        # 2 hours of frames at 72000x real time
+        self.assertGreaterEqual(time.monotonic() - tic, 0.09)
+
+if __name__ == '__main__':
+    unittest.main()
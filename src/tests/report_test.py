@@ -0,0 +1,68 @@
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+import numpy as np
+
+class TestDownsample(unittest.TestCase):
+    def test_keeps_extremes(self):
+        from src.utils.report import downsample
+        rng = np.random.default_rng(3)
+        x = np.arange(100000) * 60
+        y = np.cumsum(rng.normal(0, 1, len(x)))
+        xs, ys = downsample(x, y, buckets = 100)
+        self.assertLessEqual(len(xs), 2 * 100 + 2)
+        self.assertEqual((xs[0], xs[-1]), (x[0], x[-1]))
+        self.assertTrue((np.diff(xs) > 0).all())
+        self.assertEqual(ys.max(), y.max())
+        self.assertEqual(ys.min(), y.min())
+        # every bucket keeps its own min and max
+        edges = np.linspace(x[0], x[-1], 101)
+        for lo, hi in zip(edges[:-1], edges[1:]):
+            inside, kept = (x >= lo) & (x < hi), (xs >= lo) & (xs < hi)
+            self.assertEqual(ys[kept].max(), y[inside].max())
+            self.assertEqual(ys[kept].min(), y[inside].min())
+
+    def test_short_series(self):
+        from src.utils.report import downsample, drawdown
+        x, y = np.arange(10), np.arange(10.0)
+        self.assertTrue((downsample(x, y)[1] == y).all())
+        self.assertEqual(list(drawdown([1, 2, 1, 4])), [0, 0, -50, 0])
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_charts(self):
+        from src.utils.report import Report
+        report = Report(directory = self.tmp.name, processes = 2)
+        ts = 1609459200 + np.arange(5000) * 600
+        balance = np.cumprod(1 + np.random.default_rng(5).normal(0, 0.01, len(ts)))
+        paths = [report.submit(f'run {i}', ts, balance * (1 + i / 10)) for i in range(3)]
+        self.assertEqual(report.close(), paths)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['run_0.png', 'run_1.png', 'run_2.png'])
+        for path in paths:
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+    def test_sweep_report(self):
+        from src.utils.report import Report
+        from src.engine.sweep import Sweep
+        from src.engine.strategy import strategy
+        from src.tests.sweep_test import synthetic_klines
+        report = Report(directory = self.tmp.name)
+        table = Sweep(strategy, synthetic_klines(), processes = 2).run({'risk': [1, 2]}, report = report)
+        self.assertEqual(len(table.index), 2)
+        self.assertEqual(sorted(os.path.basename(p) for p in report.close()), ['0000.png', '0001.png'])
+
+    def test_no_matplotlib_on_import(self):
+        code = "import sys, src.engine.backtester; print('matplotlib' in sys.modules)"
+        out = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, check = True)
+        self.assertEqual(out.stdout.strip(), 'False')
+
+if __name__ == '__main__':
+    unittest.main()
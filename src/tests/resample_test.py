@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+
+from src.tests.sweep_test import synthetic_klines
+
+class TestResample(unittest.TestCase):
+    def setUp(self):
+        self.klines = synthetic_klines(days = 3)
+
+    def test_resample(self):
+        from src.utils.resample import resample
+        for interval in ['15m', '1h']:
+            result = resample(self.klines['1m'], interval)
+            expected = self.klines[interval]
+            np.testing.assert_array_equal(result.index, expected.index)
+            for column in ['Open', 'High', 'Low', 'Close']:
+                np.testing.assert_array_equal(result[column].to_numpy(), expected[column].to_numpy())
+            np.testing.assert_allclose(result['Volume'].to_numpy(), expected['Volume'].to_numpy())
+
+    def test_partial_bucket(self):
+        from src.utils.resample import resample
+        frame = self.klines['1m'].iloc[30:100]
+        result = resample(frame, '1h')
+        self.assertEqual(list(result.index), [frame.index[0] - frame.index[0] % 3600, frame.index[0] - frame.index[0] % 3600 + 3600])
+        self.assertEqual(result['Open'].iloc[0], frame['Open'].iloc[0])
+        self.assertEqual(result['Close'].iloc[-1], frame['Close'].iloc[-1])
+        self.assertEqual(result['High'].iloc[1], frame['High'].iloc[30:].max())
+
+    def test_cached(self):
+        from src.utils.resample import Resampler
+        resampler = Resampler()
+        first = resampler.resample(self.klines['1m'], '15m')
+        self.assertIs(resampler.resample(self.klines['1m'], '15m'), first)
+        self.assertIs(resampler.resample(self.klines['1m'], '1m'), self.klines['1m'])
+
+if __name__ == '__main__':
+    unittest.main()
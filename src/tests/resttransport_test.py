@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import json
+import time
+import asyncio
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECRET = 'secret'
+
+def verify(params):
+    sign = params.pop('sign')
+    expected = hmac.new(SECRET.encode('utf-8'), urllib.parse.urlencode(dict(sorted(params.items()))).encode('utf-8'), hashlib.sha256).hexdigest()
+    return sign == expected
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Stand-in bybit api: /ok echoes, /flaky fails ``failures`` times, /slow sleeps"""
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+    calls = {}
+    lock = threading.Lock()
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, params):
+        path = urllib.parse.urlparse(self.path).path
+        with ApiHandler.lock:
+            ApiHandler.calls[path] = ApiHandler.calls.get(path, 0) + 1
+            failing = ApiHandler.failures.get(path, 0) > 0
+            if failing:
+                ApiHandler.failures[path] -= 1
+        if failing:
+            return self._reply(503, {'ret_code': 10002, 'ret_msg': 'busy'})
+        if path == '/slow':
+            time.sleep(float(params.get('seconds', 0.2)))
+        self._reply(200, {'ret_code': 0, 'result': params, 'signed': verify(dict(params)), 'port': self.client_address[1]})
+
+    def do_GET(self):
+        self._handle(dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query)))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self._handle({k: str(v) for k, v in json.loads(body).items()})
+
+    def log_message(self, *args):
+        pass
+
+class TestRestTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ApiHandler)
+        cls.server.daemon_threads = True
+        # the timeout test hangs up before /slow answers
+        cls.server.handle_error = lambda request, client_address: None
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        from src.engine.rest_transport import RestTransport
+        ApiHandler.failures = {}
+        ApiHandler.calls = {}
+        self.transport = RestTransport(f'http://127.0.0.1:{self.server.server_address[1]}', 'key', SECRET, backoff = 0.01)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_signed(self):
+        response = self.transport.request('GET', '/ok', {'symbol': 'BTCUSD', 'limit': None})
+        self.assertTrue(response['signed'])
+        self.assertNotIn('limit', response['result'])
+        self.assertEqual(response['result']['api_key'], 'key')
+        response = self.transport.request('POST', '/ok', {'symbol': 'BTCUSD', 'qty': 5})
+        self.assertTrue(response['signed'])
+
+    def test_keep_alive(self):
+        ports = {self.transport.request('GET', '/ok', {})['port'] for _ in range(5)}
+        self.assertEqual(len(ports), 1)
+
+    def test_retry_idempotent(self):
+        ApiHandler.failures['/flaky'] = 2
+        response = self.transport.request('GET', '/flaky', {})
+        self.assertEqual(response['ret_code'], 0)
+        self.assertEqual(ApiHandler.calls['/flaky'], 3)
+        stats = self.transport.stats.summary()['/flaky']
+        self.assertEqual((stats['count'], stats['errors'], stats['retries']), (3, 2, 2))
+
+    def test_no_retry_post(self):
+        ApiHandler.failures['/flaky'] = 1
+        response = self.transport.request('POST', '/flaky', {'side': 'Buy'})
+        self.assertEqual(response['ret_code'], 10002)
+        self.assertEqual(ApiHandler.calls['/flaky'], 1)
+
+    def test_timeout(self):
+        from src.engine.rest_transport import RestError
+        self.transport.timeout = (1, 0.1)
+        self.transport.retries = 1
+        with self.assertRaises(RestError):
+            self.transport.request('GET', '/slow', {'seconds': 0.5})
+        self.assertEqual(ApiHandler.calls['/slow'], 2)
+
+    def test_concurrent(self):
+        tic = time.perf_counter()
+        futures = [self.transport.submit('GET', '/slow', {'seconds': 0.2, 'i': i}) for i in range(8)]
+        results = [f.result() for f in futures]
+        self.assertLess(time.perf_counter() - tic, 0.2 * 4)
+        self.assertEqual(sorted(int(r['result']['i']) for r in results), list(range(8)))
+        stats = self.transport.stats.summary()['/slow']
+        self.assertEqual(stats['count'], 8)
+        self.assertGreaterEqual(stats['p50'], 200)
+        self.assertGreaterEqual(stats['max'], stats['p99'])
+
+    def test_awaitable(self):
+        async def run():
+            return await asyncio.gather(*[self.transport.arequest('GET', '/slow', {'seconds': 0.2}) for _ in range(4)])
+        tic = time.perf_counter()
+        results = asyncio.run(run())
+        self.assertLess(time.perf_counter() - tic, 0.6)
+        self.assertTrue(all(r['ret_code'] == 0 for r in results))
+
+    def test_bybit_rest(self):
+        from src.engine.bybit_rest import BybitRest
+        rest = BybitRest(api_key = 'key', secret = SECRET, symbol = 'BTCUSD')
+        rest.url = self.transport.url
+        self.assertEqual(rest.submit('get_ticker').result()['result']['symbol'], 'BTCUSD')
+        self.assertEqual(asyncio.run(rest.call('get_balance', 'ETH'))['result']['coin'], 'ETH')
+        self.assertIn('/v2/public/tickers', rest.transport.stats.summary())
+        rest.transport.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.engine.strategy import strategy
+from src.tests.sweep_test import synthetic_klines
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.klines = synthetic_klines(days = 6)
+        self.k = self.klines['1h']
+
+    def _stream(self, indi, revise = True):
+        """Feed every candle, first as a partial candle and then revised with its final values"""
+        result = []
+        for ts, row in self.k.iterrows():
+            if revise:
+                indi.update(ts, row['Open'] + 1, row['Open'] - 1, row['Open'])
+            result.append(indi.update(ts, row['High'], row['Low'], row['Close']))
+        return np.array(result)
+
+    def _assert_signal(self, streamed, batch):
+        np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batch))
+        valid = ~np.isnan(batch)
+        self.assertTrue(valid.sum() > 50)
+        self.assertTrue((streamed[valid] == batch[valid]).all())
+
+    def test_hma(self):
+        from src.utils.streaming import StreamingHMA
+        from src.utils.indicators import hma
+        _, batch = hma({'interval': '1h', 'length': 21, 'offset': 2}, self.klines)
+        self._assert_signal(self._stream(StreamingHMA(21, 2)), batch.to_numpy())
+
+    def test_ao(self):
+        from src.utils.streaming import StreamingAO
+        from src.utils.indicators import ao
+        _, batch = ao({'interval': '1h', 'fast': 6, 'slow': 38, 'offset': 2}, self.klines)
+        self._assert_signal(self._stream(StreamingAO(6, 38, 2)), batch.to_numpy())
+
+    def test_aroon(self):
+        from src.utils.streaming import StreamingAroon
+        from src.utils.indicators import aroon
+        _, batch = aroon({'interval': '1h', 'length': 17}, self.klines)
+        self._assert_signal(self._stream(StreamingAroon(17)), batch.to_numpy())
+
+    def test_atr(self):
+        from src.utils.streaming import StreamingATR
+        from src.utils.indicators import atr
+        _, batch = atr({'interval': '1h', 'length': 24}, self.klines)
+        np.testing.assert_allclose(self._stream(StreamingATR(24)), batch.to_numpy(), rtol=1e-9)
+
+    def _expected_row(self):
+        from src.engine.engine import Engine
+        engine = Engine(strategy = strategy, symbol = 'BTCUSD')
+        engine.klines = self.klines
+        return engine._get_indis().iloc[-1]
+
+    def _feed(self, streams, intervals):
+        for interval in intervals:
+            frame = self.klines[interval]
+            candles = np.column_stack([frame.index.to_numpy(), frame[['Open', 'High', 'Low', 'Close']].to_numpy()])
+            # the second call only feeds the last candle again
+            streams.update_candles(interval, candles[:-1].tolist())
+            streams.update_candles(interval, candles.tolist())
+
+    def _assert_row(self, row, expected):
+        self.assertEqual(row.name, expected.name)
+        for column in ['Open', 'daily_open', 'hma', 'ao', 'aroon']:
+            self.assertEqual(row[column], expected[column])
+        self.assertAlmostEqual(row['atr'], expected['atr'])
+
+    def test_row_matches_join(self):
+        from src.utils.streaming import StreamingSignals
+        streams = StreamingSignals(strategy, derive = False)
+        self._feed(streams, ['1h', '15m', '1m'])
+        self._assert_row(streams.row(), self._expected_row())
+
+    def test_row_derived_from_1m(self):
+        from src.utils.streaming import StreamingSignals
+        streams = StreamingSignals(strategy)
+        self._feed(streams, ['1m'])
+        self._assert_row(streams.row(), self._expected_row())
+
+if __name__ == '__main__':
+    unittest.main()
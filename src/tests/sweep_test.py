@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.engine.strategy import strategy
+from src.engine.benchmark import synthetic_ohlcv
+
+def synthetic_klines(days = 10, seed = 11):
+    frame = synthetic_ohlcv(days, seed = seed)
+
+    klines = {'1m': frame}
+    for interval, seconds in [('15m', 900), ('1h', 3600)]:
+        grouped = frame.groupby(frame.index - frame.index % seconds)
+        klines[interval] = pd.DataFrame({
+            'Open': grouped['Open'].first(),
+            'High': grouped['High'].max(),
+            'Low': grouped['Low'].min(),
+            'Close': grouped['Close'].last(),
+            'Volume': grouped['Volume'].sum(),
+            'TurnOver': grouped['TurnOver'].sum(),
+        })
+    return klines
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.klines = synthetic_klines()
+
+    def test_apply_params(self):
+        from src.engine.sweep import apply_params
+        result = apply_params(strategy, {'hma.length': 34, 'atr.length': 12, 'tp-atr': 1.5})
+        self.assertEqual(result['signal'][0]['properties']['length'], 34)
+        self.assertEqual(result['atr']['properties']['length'], 12)
+        self.assertEqual(result['tp-atr'], 1.5)
+        self.assertEqual(strategy['signal'][0]['properties']['length'], 55)
+        with self.assertRaises(KeyError):
+            apply_params(strategy, {'macd.length': 3})
+
+    def test_expand_grid(self):
+        from src.engine.sweep import expand_grid
+        self.assertEqual(len(expand_grid({'a': [1, 2, 3], 'b': [1, 2], 'c': [0]})), 6)
+
+    def test_sweep_matches_single_runs(self):
+        from src.engine.sweep import Sweep, apply_params, run_strategy
+        grid = {'tp-atr': [0.5, 0.95], 'hma.length': [21, 55]}
+        results = Sweep(strategy, self.klines, processes = 2).run(grid)
+
+        self.assertEqual(len(results.index), 4)
+        self.assertTrue(results['balance'].is_monotonic_decreasing)
+        for _, row in results.iterrows():
+            params = {'tp-atr': row['tp-atr'], 'hma.length': int(row['hma.length'])}
+            single = run_strategy(apply_params(strategy, params), self.klines)
+            self.assertEqual(single['balance'], row['balance'])
+            self.assertEqual(single['trades'], row['trades'])
+
+if __name__ == '__main__':
+    unittest.main()
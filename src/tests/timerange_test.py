@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+class TestTimeRange(unittest.TestCase):
+    def setUp(self):
+        ts = np.arange(1614556800, 1614556800 + 100 * 60, 60)
+        # drop two separate runs of candles
+        ts = np.delete(ts, [10, 11, 12, 50])
+        self.frame = pd.DataFrame({'Close': np.arange(len(ts), dtype=np.float64)}, index = ts)
+        self.start = 1614556800
+
+    def test_slice_range(self):
+        from src.utils.time_range import slice_range
+        result = slice_range(self.frame, self.start + 5 * 60, self.start + 20 * 60)
+        expected = self.frame[(self.frame.index >= self.start + 5 * 60) & (self.frame.index < self.start + 20 * 60)]
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(len(slice_range(self.frame, 0, self.start).index), 0)
+
+    def test_find_gaps(self):
+        from src.utils.time_range import find_gaps
+        ts = self.frame.index.to_numpy()
+        self.assertEqual(find_gaps(ts, self.start, self.start + 100 * 60, 60),
+                         [(self.start + 10 * 60, self.start + 13 * 60), (self.start + 50 * 60, self.start + 51 * 60)])
+        self.assertEqual(find_gaps(ts, self.start, self.start + 10 * 60, 60), [])
+        # range ends after the data
+        self.assertEqual(find_gaps(ts, self.start + 60 * 60, self.start + 110 * 60, 60), [(self.start + 100 * 60, self.start + 110 * 60)])
+        # start not aligned to the step
+        self.assertEqual(find_gaps(ts, self.start + 30, self.start + 10 * 60, 60), [])
+
+    def test_select_range(self):
+        from src.utils.time_range import select_range
+        selected, gaps = select_range(self.frame, self.start, self.start + 20 * 60, 60)
+        self.assertEqual(len(selected.index), 17)
+        self.assertEqual(gaps, [(self.start + 10 * 60, self.start + 13 * 60)])
+
+    def test_interval_sets(self):
+        from src.utils.time_range import merge_ranges, subtract_ranges, runs
+        self.assertEqual(merge_ranges([(50, 60), (0, 10), (10, 20), (15, 30), (40, 40)]), [(0, 30), (50, 60)])
+        ranges = [(0, 30), (50, 60)]
+        self.assertEqual(subtract_ranges(0, 100, ranges), [(30, 50), (60, 100)])
+        self.assertEqual(subtract_ranges(10, 55, ranges), [(30, 50)])
+        self.assertEqual(subtract_ranges(0, 30, ranges), [])
+        self.assertEqual(subtract_ranges(-10, 5, []), [(-10, 5)])
+        ts = self.frame.index.to_numpy()
+        self.assertEqual(runs(ts, 60), [(self.start, self.start + 10 * 60), (self.start + 13 * 60, self.start + 50 * 60),
+                                        (self.start + 51 * 60, self.start + 100 * 60)])
+        self.assertEqual(runs([], 60), [])
+
+if __name__ == '__main__':
+    unittest.main()
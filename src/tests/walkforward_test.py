@@ -0,0 +1,69 @@
+import unittest
+
+from src.engine.strategy import strategy
+from src.tests.sweep_test import synthetic_klines
+
+class TestWindows(unittest.TestCase):
+    def test_windows(self):
+        from src.engine.walk_forward import windows
+        self.assertEqual(windows(0, 100, 40, 20), [(0, 40, 60), (20, 60, 80), (40, 80, 100)])
+        self.assertEqual(windows(0, 100, 40, 20, 50), [(0, 40, 60)])
+        self.assertEqual(windows(0, 50, 40, 20), [])
+
+    def test_parse_windows(self):
+        from src.engine.walk_forward import parse_windows, DAY
+        self.assertEqual(parse_windows('90:30'), (90 * DAY, 30 * DAY, None))
+        self.assertEqual(parse_windows('90:30:5'), (90 * DAY, 30 * DAY, 5 * DAY))
+        with self.assertRaises(ValueError):
+            parse_windows('90')
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self):
+        self.klines = synthetic_klines(days = 60)
+
+    def test_windows_match_fresh_runs(self):
+        from src.engine.walk_forward import WalkForward, DAY
+        from src.engine.vectorized import VectorizedExecutor
+        from src.account.test_account import TestAccount
+        from src.utils.time_range import range_bounds
+
+        wf = WalkForward(strategy, self.klines, 10 * DAY, 5 * DAY, 2 * DAY)
+        path = wf.path(strategy)
+        self.assertGreater(len(path.returns), 20)
+        for start, _, end in wf.windows:
+            lo, hi = range_bounds(path.arrays['ts'], start, end)
+            account = TestAccount(startbalance = 1)
+            VectorizedExecutor(strategy, account).execute(path.arrays, lo, hi)
+            expected = account.getResult()
+            result = wf.score(path, start, end)
+            for key in ['trades', 'won', 'lost', 'strikerate', 'growth']:
+                self.assertEqual(result[key], expected[key])
+            self.assertAlmostEqual(result['balance'], expected['balance'])
+
+    def test_full_span_matches_backtest(self):
+        from src.engine.walk_forward import WalkForward, DAY
+        from src.engine.sweep import run_strategy
+        wf = WalkForward(strategy, self.klines, 10 * DAY, 5 * DAY)
+        ts = self.klines['1m'].index
+        result = wf.score(wf.path(strategy), int(ts[0]), int(ts[-1]) + 60)
+        expected = run_strategy(strategy, self.klines)
+        self.assertEqual(result['trades'], expected['trades'])
+        self.assertAlmostEqual(result['balance'], expected['balance'])
+
+    def test_grid_picks_best_train(self):
+        from src.engine.walk_forward import WalkForward, DAY
+        from src.engine.sweep import apply_params
+        grid = {'tp-atr': [0.5, 0.95], 'risk': [1, 2]}
+        wf = WalkForward(strategy, self.klines, 20 * DAY, 10 * DAY, grid = grid)
+        results = wf.run()
+        self.assertEqual(len(results.index), 4)
+        self.assertEqual(list(results.columns[:5]), ['train_start', 'test_start', 'test_end', 'tp-atr', 'risk'])
+        self.assertIn('test_balance', results.columns)
+
+        row = results.iloc[0]
+        best = max(wf.score(wf.path(apply_params(strategy, {'tp-atr': tp, 'risk': risk})), row['train_start'], row['test_start'])['balance']
+            for tp in grid['tp-atr'] for risk in grid['risk'])
+        self.assertAlmostEqual(row['train_balance'], best)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import numpy as np
+
+from src.utils.utils import interval_seconds
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+class CalendarIndex():
+    """Integer calendar fields for a sorted array of UTC timestamps (seconds)
+
+    Computed once per dataset with floor division, so bucketing, daily opens
+    and trading hours need no datetime objects.
+    """
+
+    def __init__(self, timestamps):
+        self.ts = np.asarray(timestamps, dtype=np.int64)
+        self.day = self.ts // DAY
+        self.minute_of_day = self.ts % DAY // MINUTE
+        self.hour = self.minute_of_day // 60
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self.ts)
+
+    def bucket(self, interval):
+        """Open timestamp of the ``interval`` candle each timestamp falls in"""
+        if interval not in self._buckets:
+            seconds = interval_seconds(interval)
+            self._buckets[interval] = self.ts - self.ts % seconds
+        return self._buckets[interval]
+
+    def bucket_id(self, interval):
+        return self.bucket(interval) // interval_seconds(interval)
+
+    def start_of_day(self):
+        return self.ts % DAY == 0
+
+    def new_day(self):
+        """True on the first bar of every day after the first bar"""
+        result = np.zeros(len(self.ts), dtype=bool)
+        result[1:] = self.day[1:] != self.day[:-1]
+        return result
+
+    def hours_in(self, hours):
+        return np.isin(self.hour, hours)
@@ -1,5 +1,2 @@
-PATH_HIST_KLINES = {
-    '1m': "hist_data/kline_1m.csv",
-    '15m': "hist_data/kline_15m.csv",
-    '1h': "hist_data/kline_1h.csv",
-}
\ No newline at end of file
+PATH_HIST_KLINES = "hist_data/klines"
+PATH_REPORTS = "reports"
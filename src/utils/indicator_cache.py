@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/indicator-cache.log', logging.DEBUG)
+
+FINGERPRINT_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+def fingerprint(frame):
+    """Digest of a kline frame: its length, time range and OHLC values"""
+    h = hashlib.blake2b(digest_size=16)
+    index = frame.index.to_numpy(dtype=np.int64)
+    h.update(np.array([len(index), index[0] if len(index) else 0, index[-1] if len(index) else 0], dtype=np.int64).tobytes())
+    for column in FINGERPRINT_COLUMNS:
+        if column in frame:
+            h.update(np.ascontiguousarray(frame[column].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+class IndicatorCache():
+    """LRU cache of indicator results keyed by indicator spec and input data
+
+    :param maxsize: number of results kept in memory
+    :param path: optional directory for a persistent tier shared between runs and processes
+    """
+
+    def __init__(self, maxsize = 256, path = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def key(self, indi_obj, klines, symbol = None):
+        props = indi_obj.get('properties', {})
+        interval = props.get('interval')
+        spec = json.dumps([indi_obj.get('name'), props, interval, symbol], sort_keys=True, default=str)
+        return hashlib.blake2b(f"{spec}:{fingerprint(klines[interval])}".encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        result = self._load(key)
+        if result is not None:
+            self.hits += 1
+            self._remember(key, result)
+            return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        self._remember(key, result)
+        self._save(key, result)
+
+    def clear(self):
+        self.entries.clear()
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _filename(self, key):
+        return os.path.join(self.path, f'{key}.npz')
+
+    def _save(self, key, result):
+        if not self.path:
+            return
+        interval, series = result
+        tmp = self._filename(key) + f'.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, index=series.index.to_numpy(), values=series.to_numpy(),
+                    meta=np.array([interval, series.name]))
+            os.replace(tmp, self._filename(key))
+        except Exception as err:
+            logger.error(f"_save: {err}")
+
+    def _load(self, key):
+        if not self.path or not os.path.exists(self._filename(key)):
+            return None
+        try:
+            with np.load(self._filename(key), allow_pickle=False) as data:
+                interval, name = [str(v) for v in data['meta']]
+                return interval, pd.Series(data['values'], index = data['index'], name = name)
+        except Exception as err:
+            logger.error(f"_load: {err}")
+            return None
@@ -1,42 +1,132 @@
-import pandas_ta as ta
 import pandas as pd
 import numpy as np
 import math
 import logging
+from numpy.lib.stride_tricks import sliding_window_view
 
 from src.utils.utils import get_logger
+from src.utils.indicator_cache import IndicatorCache
 logger = get_logger(logging.getLogger(__name__), 'logs/indicators.log', logging.DEBUG)
 
-def calc_indi(indi_obj, klines):
+cache = IndicatorCache()
+
+def configure_cache(maxsize = 256, path = None):
+    """Replace the indicator cache, e.g. to add an on-disk tier"""
+    global cache
+    cache = IndicatorCache(maxsize = maxsize, path = path)
+    return cache
+
+def calc_indi(indi_obj, klines, symbol = None):
     try:
-        name = indi_obj.get("name")
-        props = indi_obj.get("properties")
-        return globals()[f'{name}'](props,klines)
+        key = cache.key(indi_obj, klines, symbol)
+        result = cache.get(key)
+        if result is None:
+            name = indi_obj.get("name")
+            props = indi_obj.get("properties")
+            result = globals()[f'{name}'](props,klines)
+            cache.put(key, result)
+        return result
     except Exception as err:
         logger.error(f"calc_indi: {err}")
 
+#
+# Array kernels, same definitions as pandas_ta
+#
+
+def _nan(n):
+    return np.full(n, np.nan)
+
+def _shift(x, offset):
+    """Shift forward by ``offset`` bars, like ``Series.shift``"""
+    if not offset:
+        return x
+    result = _nan(len(x))
+    if offset < len(x):
+        result[offset:] = x[:len(x) - offset]
+    return result
+
+def _wma(x, length):
+    """Linearly weighted moving average, NaN until a full window is available"""
+    result = _nan(len(x))
+    if length < 1 or len(x) < length:
+        return result
+    weights = np.arange(1, length + 1, dtype=np.float64)
+    result[length - 1:] = sliding_window_view(x, length) @ weights / weights.sum()
+    return result
+
+def _sma(x, length):
+    return pd.Series(x).rolling(length, min_periods=length).mean().to_numpy()
+
+def _hma(close, length):
+    wmaf = _wma(close, int(length / 2))
+    wmas = _wma(close, length)
+    return _wma(2 * wmaf - wmas, int(math.sqrt(length)))
+
+def _ao(high, low, fast, slow):
+    median = 0.5 * (high + low)
+    return _sma(median, fast) - _sma(median, slow)
+
+def _aroon_osc(high, low, length, scalar = 100):
+    """Aroon oscillator, (periods since lowest low - periods since highest high) scaled by length"""
+    result = _nan(len(high))
+    window = length + 1
+    if len(high) < window:
+        return result
+    highs = sliding_window_view(high, window)[:, ::-1]
+    lows = sliding_window_view(low, window)[:, ::-1]
+    # argmax on the reversed window gives the most recent extreme
+    from_hh = np.argmax(highs, axis=1)
+    from_ll = np.argmin(lows, axis=1)
+    osc = scalar * (from_ll - from_hh) / length
+    valid = ~(np.isnan(highs).any(axis=1) | np.isnan(lows).any(axis=1))
+    result[length:] = np.where(valid, osc, np.nan)
+    return result
+
+def _atr(high, low, close, length):
+    prev_close = _shift(close, 1)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[:1] = np.nan
+    return pd.Series(tr).ewm(alpha=1 / length, min_periods=length).mean().to_numpy()
+
+def _compare(a, b):
+    """a > b as 1.0 / 0.0, NaN where either side is NaN
+
+    Floats keep the True / False / None semantics of ``Engine._check_signal``.
+    """
+    result = (a > b).astype(np.float64)
+    result[np.isnan(a) | np.isnan(b)] = np.nan
+    return result
+
+def _column(klines, interval, name):
+    return klines[interval][name].to_numpy(dtype=np.float64)
+
+#
+# Signals
+#
+
 def hma(props, klines):
     interval = props.get('interval')
     length = props.get('length')
     offset = props.get('offset')
-    hma = pd.DataFrame({'hma' : ta.hma(klines[interval]['Close'], length) , 'hmao': ta.hma(klines[interval]['Close'], length, offset)})
-    return interval, pd.Series(hma.apply(lambda row: row['hma'] > row['hmao'] if not (math.isnan(row['hma']) or math.isnan(row['hmao'])) else None, axis = 1), name ='hma')
+    hma = _hma(_column(klines, interval, 'Close'), length)
+    return interval, pd.Series(_compare(hma, _shift(hma, offset)), index = klines[interval].index, name ='hma')
 
 def aroon(props, klines):
     interval = props.get('interval')
     length = props.get('length')
-    aroon = ta.aroon(klines[interval]['High'], klines[interval]['Low'], length)
-    return interval, pd.Series(aroon.apply(lambda row: row[f'AROONOSC_{length}'] > 0 if not math.isnan(row[f'AROONOSC_{length}']) else None, axis = 1), name = 'aroon')
+    osc = _aroon_osc(_column(klines, interval, 'High'), _column(klines, interval, 'Low'), length)
+    return interval, pd.Series(_compare(osc, np.zeros(len(osc))), index = klines[interval].index, name = 'aroon')
 
 def ao(props, klines):
     interval = props.get('interval')
     fast = props.get('fast')
     slow = props.get('slow')
     offset = props.get('offset')
-    ao = pd.DataFrame({'ao': ta.ao(klines[interval]['High'], klines[interval]['Low'], fast, slow), 'aoo': ta.ao(klines[interval]['High'], klines[interval]['Low'], fast, slow, offset)})
-    return interval, pd.Series(ao.apply(lambda row: row['ao'] > row['aoo'] if not (math.isnan(row['ao']) or math.isnan(row['aoo'])) else None, axis = 1), name ='ao')
+    ao = _ao(_column(klines, interval, 'High'), _column(klines, interval, 'Low'), fast, slow)
+    return interval, pd.Series(_compare(ao, _shift(ao, offset)), index = klines[interval].index, name ='ao')
 
 def atr(props, klines):
     interval = props.get('interval')
     length = props.get('length')
-    return interval, pd.Series(ta.atr(klines['1h']['High'], klines['1h']['Low'], klines['1h']['Close'], 24), name = 'atr')
+    atr = _atr(_column(klines, interval, 'High'), _column(klines, interval, 'Low'), _column(klines, interval, 'Close'), length)
+    return interval, pd.Series(atr, index = klines[interval].index, name = 'atr')
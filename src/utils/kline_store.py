@@ -0,0 +1,184 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+from src.utils.constants import PATH_HIST_KLINES
+from src.utils.time_range import merge_ranges, subtract_ranges, runs
+from src.utils.utils import get_logger, interval_seconds
+
+logger = get_logger(logging.getLogger(__name__), 'logs/kline-store.log', logging.DEBUG)
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'TurnOver']
+DAY = 86400
+
+class KlineStore():
+    """Columnar kline store, partitioned by symbol / interval / day
+
+    Every day is a directory holding ``ts.npy`` (int64 open times) and ``ohlcv.npy``
+    (float64, one row per column in ``COLUMNS``). Partitions are opened memory mapped,
+    so reading a range only touches the pages of that range and concurrent backtests
+    share them through the page cache.
+
+    Next to the days, ``<interval>.coverage.json`` keeps the interval set of the
+    ranges the store holds, including ranges the exchange returned no klines for,
+    so a backfill only asks for what is missing.
+    """
+
+    def __init__(self, root = PATH_HIST_KLINES):
+        self.root = root
+
+    def _interval_dir(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def _day_dir(self, symbol, interval, day):
+        return os.path.join(self._interval_dir(symbol, interval), str(day))
+
+    def days(self, symbol, interval):
+        """Sorted day ids (timestamp // 86400) with data on disk"""
+        try:
+            entries = os.listdir(self._interval_dir(symbol, interval))
+        except FileNotFoundError:
+            return []
+        return sorted(int(e) for e in entries if e.isdigit())
+
+    def _read_day(self, symbol, interval, day):
+        path = self._day_dir(symbol, interval, day)
+        ts = np.load(os.path.join(path, 'ts.npy'), mmap_mode='r')
+        values = np.load(os.path.join(path, 'ohlcv.npy'), mmap_mode='r')
+        return ts, values
+
+    def _write_day(self, symbol, interval, day, ts, values):
+        path = self._day_dir(symbol, interval, day)
+        os.makedirs(path, exist_ok=True)
+        # write next to the target and rename, so readers never see a partial file
+        for name, data in [('ts.npy', ts), ('ohlcv.npy', values)]:
+            tmp = os.path.join(path, f'.{name}.{os.getpid()}')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(data))
+            os.replace(tmp, os.path.join(path, name))
+
+    def _coverage_file(self, symbol, interval):
+        return os.path.join(self.root, symbol, f'{interval}.coverage.json')
+
+    def coverage(self, symbol, interval):
+        """Sorted, disjoint [from, to) ranges held by the store
+
+        Stores written before the index existed get it rebuilt from the klines on disk.
+        """
+        try:
+            with open(self._coverage_file(symbol, interval)) as f:
+                return [tuple(r) for r in json.load(f)]
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            pass
+        step = interval_seconds(interval)
+        ranges = []
+        for day in self.days(symbol, interval):
+            ranges.extend(runs(self._read_day(symbol, interval, day)[0], step))
+        ranges = merge_ranges(ranges)
+        if ranges:
+            self._save_coverage(symbol, interval, ranges)
+        return ranges
+
+    def _save_coverage(self, symbol, interval, ranges):
+        filename = self._coverage_file(symbol, interval)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = f'{filename}.{os.getpid()}'
+        with open(tmp, 'w') as f:
+            json.dump([list(r) for r in ranges], f)
+        os.replace(tmp, filename)
+
+    def missing(self, symbol, interval, start, end):
+        """[from, to) ranges of [start, end) not held by the store"""
+        return subtract_ranges(start, end, self.coverage(symbol, interval))
+
+    def first_timestamp(self, symbol, interval):
+        days = self.days(symbol, interval)
+        return int(self._read_day(symbol, interval, days[0])[0][0]) if days else None
+
+    def last_timestamp(self, symbol, interval):
+        days = self.days(symbol, interval)
+        return int(self._read_day(symbol, interval, days[-1])[0][-1]) if days else None
+
+    def write(self, symbol, interval, ts, values, span = None):
+        """Merge klines into the store
+
+        :param ts: open timestamps in seconds
+        :param values: array of shape (len(ts), 6) in ``COLUMNS`` order
+        :param span: [from, to) range the klines are complete for, e.g. a downloaded
+            window, added to the coverage index; defaults to the runs of ``ts``
+        Rows already on disk with the same timestamp are replaced, so writing the
+        same klines twice leaves the store as it was.
+        """
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(ts), len(COLUMNS))
+        if not len(ts):
+            self._cover(symbol, interval, [span] if span is not None else [])
+            return
+
+        order = np.argsort(ts, kind='stable')
+        ts, values = ts[order], values[order]
+        day_ids = ts // DAY
+        bounds = np.flatnonzero(np.diff(day_ids)) + 1
+        existing = set(self.days(symbol, interval))
+
+        for day_ts, day_values in zip(np.split(ts, bounds), np.split(values, bounds)):
+            day = int(day_ts[0] // DAY)
+            day_values = day_values.T
+            if day in existing:
+                old_ts, old_values = self._read_day(symbol, interval, day)
+                merged_ts = np.concatenate([np.asarray(old_ts), day_ts])
+                merged_values = np.concatenate([np.asarray(old_values), day_values], axis = 1)
+                # keep the last occurrence of every timestamp, i.e. the new data
+                rev_ts = merged_ts[::-1]
+                day_ts, first = np.unique(rev_ts, return_index=True)
+                day_values = merged_values[:, ::-1][:, first]
+            else:
+                day_ts, first = np.unique(day_ts[::-1], return_index=True)
+                day_values = day_values[:, ::-1][:, first]
+            self._write_day(symbol, interval, day, day_ts, day_values)
+
+        # after the klines, so the index never claims what is not on disk
+        self._cover(symbol, interval, [span] if span is not None else runs(np.unique(ts), interval_seconds(interval)))
+        logger.debug("write: %s %s %s klines", symbol, interval, len(ts))
+
+    def _cover(self, symbol, interval, ranges):
+        if ranges:
+            self._save_coverage(symbol, interval, merge_ranges(self.coverage(symbol, interval) + list(ranges)))
+
+    def load(self, symbol, interval, start = None, end = None):
+        """Load klines with ``start <= ts < end`` as a DataFrame indexed by timestamp"""
+        days = self.days(symbol, interval)
+        if start is not None:
+            days = [d for d in days if d >= start // DAY]
+        if end is not None:
+            days = [d for d in days if d * DAY < end]
+
+        ts_parts, value_parts = [], []
+        for day in days:
+            ts, values = self._read_day(symbol, interval, day)
+            lo = np.searchsorted(ts, start) if start is not None else 0
+            hi = np.searchsorted(ts, end) if end is not None else len(ts)
+            if hi > lo:
+                ts_parts.append(ts[lo:hi])
+                value_parts.append(values[:, lo:hi])
+
+        if not ts_parts:
+            return pd.DataFrame(columns = COLUMNS, index = pd.Index([], dtype=np.int64))
+
+        ts = np.concatenate(ts_parts)
+        values = np.concatenate(value_parts, axis = 1)
+        return pd.DataFrame(dict(zip(COLUMNS, values)), index = ts)
+
+    def import_csv(self, symbol, interval, filename):
+        """Import one of the legacy ``hist_data/kline_*.csv`` files"""
+        frame = pd.read_csv(filename, index_col=0, names = COLUMNS + ['Date'])
+        self.write(symbol, interval, frame.index.to_numpy(), frame[COLUMNS].to_numpy())
+        return len(frame.index)
+
+if __name__ == "__main__":
+    # python -m src.utils.kline_store BTCUSD 1m hist_data/kline_1m.csv
+    from sys import argv
+    symbol, interval, filename = argv[1:4]
+    print(f"imported {KlineStore().import_csv(symbol, interval, filename)} klines")
@@ -0,0 +1,202 @@
+import os
+import queue
+import numbers
+import atexit
+import logging
+import threading
+from logging import handlers
+from datetime import datetime, timezone
+
+#
+# Queue based logging
+#
+# Loggers only put records on an in-process queue; a single writer thread formats
+# them and writes them to their rotating log files, which are opened on the first
+# record. Calls below a logger's level cost one level check, so pass values as
+# %-style arguments (logger.debug("x %s", x)) instead of f-strings on hot paths.
+#
+# Levels can be set per module with LOG_LEVELS, longest prefix wins:
+#   LOG_LEVELS="src.engine=INFO,src.engine.bybit_ws=WARNING"
+#
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# not queued: there is no writer yet when LOG_LEVELS is parsed, goes to stderr
+_warn = logging.getLogger(__name__).warning
+
+def parse_level(level):
+    """Level name or number -> int, None if it is not a level"""
+    if isinstance(level, str):
+        # getLevelName returns 'Level X' for unknown names, which setLevel rejects
+        level = logging.getLevelName(level.strip().upper())
+    return level if isinstance(level, int) else None
+
+def parse_levels(spec):
+    """"name=LEVEL,..." -> {name: level}, entries with an unknown level are skipped"""
+    levels = {}
+    for item in filter(None, (s.strip() for s in (spec or '').split(','))):
+        name, _, level = item.partition('=')
+        value = parse_level(level)
+        if value is None:
+            _warn("parse_levels: unknown level %r for %s, ignored", level.strip(), name.strip())
+            continue
+        levels[name.strip()] = value
+    return levels
+
+class _Writer(threading.Thread):
+    """Background thread writing queued records to one rotating file per log name"""
+
+    def __init__(self):
+        super().__init__(name = 'log-writer', daemon = True)
+        self.queue = queue.SimpleQueue()
+        self.files = {}
+        self.formatter = logging.Formatter(FORMAT)
+
+    def _file(self, fname):
+        handler = self.files.get(fname)
+        if handler is None:
+            os.makedirs(os.path.dirname(fname) or '.', exist_ok=True)
+            handler = handlers.RotatingFileHandler(fname, maxBytes=5000000, backupCount=10, delay=True)
+            handler.setFormatter(self.formatter)
+            self.files[fname] = handler
+        return handler
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                for handler in self.files.values():
+                    handler.flush()
+                item.set()
+                continue
+            self._file(item.logfile).handle(item)
+
+        for handler in self.files.values():
+            handler.close()
+
+class QueueHandler(logging.Handler):
+    """Puts records for ``fname`` on the writer queue, formatting is left to the writer"""
+
+    def __init__(self, config, fname):
+        super().__init__()
+        self.config = config
+        self.fname = fname
+
+    def emit(self, record):
+        # a single dict argument is kept as record.args itself
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        if record.args and not all(isinstance(a, _IMMUTABLE) for a in args):
+            # the caller may change a dict or frame after the call, render it now
+            record.msg = record.getMessage()
+            record.args = None
+        record.logfile = self.fname
+        (self.config.writer or self.config._start()).queue.put(record)
+
+class LazyDate():
+    """Log argument rendering a timestamp as a UTC date, only when the record is written"""
+    __slots__ = ('ts',)
+
+    def __init__(self, ts):
+        self.ts = ts
+
+    def __str__(self):
+        return datetime.fromtimestamp(int(self.ts), tz = timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+# argument types that cannot change between the call and the write
+_IMMUTABLE = (str, bytes, numbers.Number, type(None), LazyDate)
+
+class SampleFilter(logging.Filter):
+    """Keeps one in ``sample`` records of a call site for records logged with extra={'sample': n}"""
+
+    def __init__(self):
+        super().__init__()
+        self.counts = {}
+
+    def filter(self, record):
+        every = getattr(record, 'sample', None)
+        if not every:
+            return True
+        key = (record.pathname, record.lineno)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        return count % every == 0
+
+class Sampler():
+    """True on every ``every``-th call, to skip building records of high-rate messages at all"""
+    __slots__ = ('every', 'count')
+
+    def __init__(self, every):
+        self.every = every
+        self.count = -1
+
+    def __call__(self):
+        self.count += 1
+        return self.count % self.every == 0
+
+class LogConfig():
+    def __init__(self):
+        self.writer = None
+        self.registered = False
+        self.lock = threading.Lock()
+        self.sampler = SampleFilter()
+        self.levels = parse_levels(os.getenv('LOG_LEVELS'))
+        self.loggers = {}
+
+    def _start(self):
+        with self.lock:
+            if self.writer is None:
+                self.writer = _Writer()
+                self.writer.start()
+                if not self.registered:
+                    atexit.register(self.stop)
+                    self.registered = True
+        return self.writer
+
+    def level_for(self, name, default):
+        best = None
+        for prefix in self.levels:
+            if name == prefix or name.startswith(prefix + '.'):
+                best = prefix if best is None or len(prefix) > len(best) else best
+        return self.levels[best] if best is not None else default
+
+    def get_logger(self, logger, fname, level = logging.INFO):
+        if not any(isinstance(h, QueueHandler) for h in logger.handlers):
+            handler = QueueHandler(self, fname)
+            handler.addFilter(self.sampler)
+            logger.addHandler(handler)
+        self.loggers[logger.name] = (logger, level)
+        logger.setLevel(self.level_for(logger.name, level))
+        return logger
+
+    def set_levels(self, levels):
+        """Override levels by module prefix, e.g. {'src.engine.bybit_ws': logging.WARNING}"""
+        for name, level in levels.items():
+            value = parse_level(level)
+            if value is None:
+                _warn("set_levels: unknown level %r for %s, ignored", level, name)
+                continue
+            self.levels[name] = value
+        for logger, default in self.loggers.values():
+            logger.setLevel(self.level_for(logger.name, default))
+
+    def flush(self, timeout = 5):
+        """Block until every record queued so far is written"""
+        if self.writer is None:
+            return True
+        done = threading.Event()
+        self.writer.queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self):
+        with self.lock:
+            writer, self.writer = self.writer, None
+        if writer is not None:
+            writer.queue.put(None)
+            writer.join(5)
+
+config = LogConfig()
+get_logger = config.get_logger
+set_levels = config.set_levels
+flush = config.flush
@@ -0,0 +1,156 @@
+import os
+import re
+import logging
+import numpy as np
+from datetime import datetime
+from multiprocessing import Pool
+
+from src.utils.constants import PATH_REPORTS
+from src.utils.utils import get_logger
+
+logger = get_logger(logging.getLogger(__name__), 'logs/report.log', logging.DEBUG)
+
+#
+# Headless reporting
+#
+# Equity and drawdown charts are rendered by worker processes with matplotlib's Agg
+# canvas, which never opens a window. Matplotlib is only imported in the workers,
+# the caller downsamples the series and hands them over without waiting.
+#
+
+WIDTH = 800
+HEIGHT = 500
+DPI = 100
+
+def downsample(x, y, buckets = WIDTH):
+    """Keep the min and the max point of ``buckets`` equal width ranges of a sorted x
+
+    A line through the kept points, in x order, covers the same pixel columns as
+    one through all of them, peaks and troughs included.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype = np.float64)
+    if len(x) <= 2 * buckets:
+        return x, y
+    edges = np.linspace(x[0], x[-1], buckets + 1)[1:-1]
+    bucket = np.searchsorted(edges, x, side = 'right')
+    # x is sorted so every bucket is a run, at the same positions once sorted by y within buckets
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+    ends = np.concatenate([starts[1:], [len(x)]]) - 1
+    order = np.lexsort((y, bucket))
+    keep = np.unique(np.concatenate([[0, len(x) - 1], order[starts], order[ends]]))
+    return x[keep], y[keep]
+
+def drawdown(balance):
+    """Percent below the running peak of a balance series, <= 0"""
+    balance = np.asarray(balance, dtype = np.float64)
+    peak = np.maximum.accumulate(balance)
+    return (balance - peak) / peak * 100
+
+def equity(account):
+    """(close timestamps, balance) of an account's closed trades, starting at its start balance"""
+    trades = account.trades.array
+    start = trades['opentimestamp'][:1]
+    return np.concatenate([start, trades['closetimestamp']]), np.concatenate([[account.startbalance][:len(start)], trades['after']])
+
+def curves(ts, balance, buckets = WIDTH):
+    """Downsampled equity and drawdown, what ``render`` draws"""
+    return downsample(ts, balance, buckets), downsample(ts, drawdown(balance), buckets)
+
+# per worker process figure, creating the axes and their ticks costs more than drawing
+_figure = {}
+
+def _canvas():
+    if not _figure:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        import matplotlib.dates as mdates
+
+        figure = Figure(figsize = (WIDTH / DPI, HEIGHT / DPI), dpi = DPI)
+        FigureCanvasAgg(figure)
+        top, bottom = figure.subplots(2, 1, sharex = True, gridspec_kw = {'height_ratios': [3, 1]})
+        lines = []
+        for ax, label in [(top, 'balance'), (bottom, 'drawdown %')]:
+            lines.append(ax.plot([], [], linewidth = 0.8)[0])
+            ax.set_ylabel(label)
+            ax.grid(True)
+        locator = mdates.AutoDateLocator()
+        bottom.xaxis.set_major_locator(locator)
+        bottom.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        _figure.update(figure = figure, axes = (top, bottom), lines = lines, fill = None)
+    return _figure
+
+def render(path, title, equity_curve, drawdown_curve):
+    """Write an equity chart with its drawdown below to ``path``"""
+    from matplotlib.dates import date2num
+
+    canvas = _canvas()
+    top, bottom = canvas['axes']
+    for ax, line, (ts, values) in zip(canvas['axes'], canvas['lines'], [equity_curve, drawdown_curve]):
+        line.set_data(date2num(np.asarray(ts, dtype = 'datetime64[s]')), values)
+        ax.relim()
+        ax.autoscale_view()
+    if canvas['fill'] is not None:
+        canvas['fill'].remove()
+    canvas['fill'] = bottom.fill_between(canvas['lines'][1].get_xdata(), drawdown_curve[1], 0,
+        color = canvas['lines'][1].get_color(), alpha = 0.3)
+    top.set_title(title)
+    canvas['figure'].savefig(path)
+    return path
+
+def _render(args):
+    # errors are logged by the caller, the log writer thread does not run in the workers
+    try:
+        return render(*args), None
+    except Exception as err:
+        return args[0], repr(err)
+
+def filename(label):
+    """A file name safe version of a run label, e.g. a sweep's parameters"""
+    return re.sub(r'[^\w.=,+-]+', '_', str(label)).strip('_') or 'run'
+
+class Report():
+    """Writes the charts of one run, e.g. a backtest or a sweep, to its own directory
+
+    Charts are rendered on a process pool created with the first one, ``submit``
+    returns at once. ``close`` waits for the charts and returns their paths.
+
+    :param directory: output directory, defaults to reports/<start time>
+    """
+
+    def __init__(self, directory = None, processes = 1, buckets = WIDTH):
+        self.directory = directory or os.path.join(PATH_REPORTS, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.processes = processes
+        self.buckets = buckets
+        self.pool = None
+        self.pending = []
+
+    def submit(self, label, ts, balance, title = None):
+        """Chart a balance series as <directory>/<label>.png"""
+        if self.pool is None:
+            os.makedirs(self.directory, exist_ok = True)
+            self.pool = Pool(self.processes)
+        path = os.path.join(self.directory, f'{filename(label)}.png')
+        equity_curve, drawdown_curve = curves(ts, balance, self.buckets)
+        self.pending.append(self.pool.apply_async(_render, ((path, title or str(label), equity_curve, drawdown_curve),)))
+        return path
+
+    def account(self, label, account, title = None):
+        """Chart the closed trades of a TestAccount"""
+        return self.submit(label, *equity(account), title = title)
+
+    def close(self):
+        paths = []
+        for path, err in (job.get() for job in self.pending):
+            if err:
+                logger.error(f"close: {path}: {err}")
+            else:
+                paths.append(path)
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        self.pending = []
+        if paths:
+            logger.info(f"close: {len(paths)} charts in {self.directory}")
+        return paths
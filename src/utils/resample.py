@@ -0,0 +1,60 @@
+import logging
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from src.utils.calendar_index import CalendarIndex
+from src.utils.indicator_cache import fingerprint
+from src.utils.utils import get_logger, interval_seconds
+
+logger = get_logger(logging.getLogger(__name__), 'logs/resample.log', logging.DEBUG)
+
+def resample(frame, interval, calendar = None):
+    """Aggregate sorted 1m klines into ``interval`` klines in one vectorized pass
+
+    Buckets are aligned on UTC like the exchange candles, the last bucket may be partial.
+    """
+    if not len(frame.index):
+        return frame.iloc[:0].copy()
+
+    calendar = calendar if calendar is not None else CalendarIndex(frame.index)
+    bucket = calendar.bucket(interval)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+
+    columns = {}
+    if 'Open' in frame:
+        columns['Open'] = frame['Open'].to_numpy(dtype=np.float64)[starts]
+    if 'High' in frame:
+        columns['High'] = np.maximum.reduceat(frame['High'].to_numpy(dtype=np.float64), starts)
+    if 'Low' in frame:
+        columns['Low'] = np.minimum.reduceat(frame['Low'].to_numpy(dtype=np.float64), starts)
+    if 'Close' in frame:
+        ends = np.concatenate([starts[1:], [len(bucket)]]) - 1
+        columns['Close'] = frame['Close'].to_numpy(dtype=np.float64)[ends]
+    for name in ['Volume', 'TurnOver']:
+        if name in frame:
+            columns[name] = np.add.reduceat(frame[name].to_numpy(dtype=np.float64), starts)
+
+    return pd.DataFrame(columns, index = bucket[starts])
+
+class Resampler():
+    """LRU cache in front of ``resample``, keyed by interval and a digest of the 1m data"""
+
+    def __init__(self, maxsize = 32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def resample(self, frame, interval):
+        if interval_seconds(interval) == 60:
+            return frame
+        key = (interval, fingerprint(frame))
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        result = resample(frame, interval)
+        self.entries[key] = result
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return result
+
+resampler = Resampler()
@@ -0,0 +1,353 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from src.utils.calendar_index import DAY
+from src.utils.utils import interval_seconds
+
+#
+# Incremental versions of the kernels in src/utils/indicators.py
+#
+# Every indicator keeps a committed state (all closed candles) and evaluates the
+# current candle on top of it without committing. ``update`` with the timestamp of
+# the current candle revises it, a new timestamp commits the current candle first.
+# Both are O(1).
+#
+
+class _Candles():
+    def __init__(self):
+        self.ts = None
+        self.index = -1
+
+    def advance(self, ts):
+        """True if ts opens a new candle, i.e. the previous one has to be committed"""
+        if ts == self.ts:
+            return False
+        new = self.ts is not None
+        self.ts = ts
+        self.index += 1
+        return new
+
+class RollingWMA():
+    """Linearly weighted moving average over the committed values plus one tentative value"""
+    resync = 1024
+
+    def __init__(self, length):
+        self.length = length
+        self.total = length * (length + 1) / 2
+        self.window = deque(maxlen=max(length - 1, 0))
+        self.weighted = 0.0
+        self.sum = 0.0
+        self.commits = 0
+
+    def value(self, x):
+        if len(self.window) < self.length - 1 or x is None or math.isnan(x):
+            return np.nan
+        return (self.weighted + self.length * x) / self.total
+
+    def commit(self, x):
+        if x is None or math.isnan(x):
+            return
+        if self.length == 1:
+            return
+        if len(self.window) == self.window.maxlen:
+            self.weighted += (self.length - 1) * x - self.sum
+            self.sum += x - self.window[0]
+        else:
+            self.weighted += (len(self.window) + 1) * x
+            self.sum += x
+        self.window.append(x)
+        self.commits += 1
+        if self.commits % self.resync == 0:
+            self.weighted = sum((i + 1) * v for i, v in enumerate(self.window))
+            self.sum = sum(self.window)
+
+class RollingSMA():
+    resync = 1024
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque(maxlen=max(length - 1, 0))
+        self.sum = 0.0
+        self.commits = 0
+
+    def value(self, x):
+        if len(self.window) < self.length - 1:
+            return np.nan
+        return (self.sum + x) / self.length
+
+    def commit(self, x):
+        if self.length == 1:
+            return
+        if len(self.window) == self.window.maxlen:
+            self.sum -= self.window[0]
+        self.sum += x
+        self.window.append(x)
+        self.commits += 1
+        if self.commits % self.resync == 0:
+            self.sum = sum(self.window)
+
+class _Offset():
+    """Committed values ``offset`` candles back, for the offset comparisons"""
+    def __init__(self, offset):
+        self.offset = offset or 0
+        self.history = deque(maxlen=max(self.offset, 1))
+
+    def back(self, current):
+        if not self.offset:
+            return current
+        return self.history[0] if len(self.history) == self.offset else np.nan
+
+    def commit(self, value):
+        self.history.append(value)
+
+def _compare(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return np.nan
+    return 1.0 if a > b else 0.0
+
+class StreamingHMA():
+    name = 'hma'
+
+    def __init__(self, length, offset = 0):
+        self.candles = _Candles()
+        self.slow = RollingWMA(length)
+        self.fast = RollingWMA(int(length / 2))
+        self.smooth = RollingWMA(int(math.sqrt(length)))
+        self.offset = _Offset(offset)
+        self.current = None
+
+    def update(self, ts, high, low, close):
+        if self.candles.advance(ts):
+            self._commit()
+        self.current = close
+        return self.signal()
+
+    def _tentative(self, close):
+        diff = 2 * self.fast.value(close) - self.slow.value(close)
+        return diff, self.smooth.value(diff)
+
+    def _commit(self):
+        diff, hma = self._tentative(self.current)
+        self.fast.commit(self.current)
+        self.slow.commit(self.current)
+        self.smooth.commit(diff)
+        self.offset.commit(hma)
+
+    def value(self):
+        return self._tentative(self.current)[1] if self.current is not None else np.nan
+
+    def signal(self):
+        hma = self.value()
+        return _compare(hma, self.offset.back(hma))
+
+class StreamingAO():
+    name = 'ao'
+
+    def __init__(self, fast, slow, offset = 0):
+        self.candles = _Candles()
+        self.fast = RollingSMA(fast)
+        self.slow = RollingSMA(slow)
+        self.offset = _Offset(offset)
+        self.current = None
+
+    def update(self, ts, high, low, close):
+        if self.candles.advance(ts):
+            median = 0.5 * (self.current[0] + self.current[1])
+            self.offset.commit(self.value())
+            self.fast.commit(median)
+            self.slow.commit(median)
+        self.current = (high, low)
+        return self.signal()
+
+    def value(self):
+        if self.current is None:
+            return np.nan
+        median = 0.5 * (self.current[0] + self.current[1])
+        return self.fast.value(median) - self.slow.value(median)
+
+    def signal(self):
+        ao = self.value()
+        return _compare(ao, self.offset.back(ao))
+
+class StreamingAroon():
+    """Aroon oscillator sign with monotonic deques, amortized O(1)"""
+    name = 'aroon'
+
+    def __init__(self, length):
+        self.length = length
+        self.candles = _Candles()
+        self.highs = deque()
+        self.lows = deque()
+        self.current = None
+
+    def update(self, ts, high, low, close):
+        if self.candles.advance(ts):
+            self._commit()
+        self.current = (high, low)
+        return self.signal()
+
+    def _commit(self):
+        i = self.candles.index - 1
+        high, low = self.current
+        # keep the most recent extreme on ties, like argmax over the reversed window
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((i, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((i, low))
+
+    def value(self):
+        i = self.candles.index
+        if self.current is None or i < self.length:
+            return np.nan
+        first = i - self.length
+        while self.highs[0][0] < first:
+            self.highs.popleft()
+        while self.lows[0][0] < first:
+            self.lows.popleft()
+        high, low = self.current
+        from_hh = 0 if high >= self.highs[0][1] else i - self.highs[0][0]
+        from_ll = 0 if low <= self.lows[0][1] else i - self.lows[0][0]
+        return 100 * (from_ll - from_hh) / self.length
+
+    def signal(self):
+        return _compare(self.value(), 0)
+
+class StreamingATR():
+    """RMA of the true range, same weights as ``ewm(alpha=1/length, min_periods=length)``"""
+    name = 'atr'
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.candles = _Candles()
+        self.prev_close = None
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+        self.current = None
+
+    def update(self, ts, high, low, close):
+        if self.candles.advance(ts):
+            tr = self._true_range()
+            if not math.isnan(tr):
+                self.num = self.decay * self.num + tr
+                self.den = self.decay * self.den + 1
+                self.count += 1
+            else:
+                self.num *= self.decay
+                self.den *= self.decay
+            self.prev_close = self.current[2]
+        self.current = (high, low, close)
+        return self.value()
+
+    def _true_range(self):
+        high, low, _ = self.current
+        if self.prev_close is None:
+            return np.nan
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def value(self):
+        if self.current is None:
+            return np.nan
+        tr = self._true_range()
+        if math.isnan(tr):
+            num, den, count = self.decay * self.num, self.decay * self.den, self.count
+        else:
+            num, den, count = self.decay * self.num + tr, self.decay * self.den + 1, self.count + 1
+        return num / den if count >= self.length else np.nan
+
+    def signal(self):
+        return self.value()
+
+def streaming_indi(indi_obj):
+    """Streaming counterpart of ``calc_indi`` for an indicator of the strategy"""
+    name = indi_obj.get('name')
+    props = indi_obj.get('properties')
+    if name == 'hma':
+        return StreamingHMA(props.get('length'), props.get('offset'))
+    if name == 'ao':
+        return StreamingAO(props.get('fast'), props.get('slow'), props.get('offset'))
+    if name == 'aroon':
+        return StreamingAroon(props.get('length'))
+    if name == 'atr':
+        return StreamingATR(props.get('length'))
+    raise KeyError(f"streaming_indi: no streaming version of {name}")
+
+class _Aggregate():
+    """Higher timeframe candle built from 1m candles, the current minute stays revisable"""
+
+    def __init__(self, interval):
+        self.seconds = interval_seconds(interval)
+        self.bucket = None
+        self.minute = None
+
+    def update(self, ts, open_price, high, low, close):
+        bucket = ts - ts % self.seconds
+        if bucket != self.bucket:
+            self.bucket = bucket
+            self.open = open_price
+            self.high = -math.inf
+            self.low = math.inf
+        elif self.minute is not None and ts != self.minute[0]:
+            self.high = max(self.high, self.minute[1])
+            self.low = min(self.low, self.minute[2])
+        self.minute = (ts, high, low)
+        return bucket, self.open, max(self.high, high), min(self.low, low), close
+
+class StreamingSignals():
+    """Live replacement for ``Engine._get_indis().iloc[-1]``
+
+    Candles of every interval are fed as they arrive; ``row`` joins the current value
+    of each indicator to the latest 1m candle through its bucket, without rebuilding
+    any frame. With ``derive`` the higher timeframes are aggregated from the 1m feed,
+    so only 1m candles have to be fed.
+    """
+
+    def __init__(self, strategy, derive = True):
+        self.indis = {}
+        for indi in strategy.get('signal') + [strategy.get('atr')]:
+            interval = indi.get('properties').get('interval')
+            self.indis.setdefault(interval, []).append(streaming_indi(indi))
+        self.aggregates = {i: _Aggregate(i) for i in self.indis if i != '1m'} if derive else {}
+        self.last = {}
+        self.daily_open = np.nan
+        self.minute = None
+
+    def update(self, interval, ts, open_price, high, low, close):
+        ts = int(ts)
+        self.last[interval] = ts
+        for indi in self.indis.get(interval, []):
+            indi.update(ts, high, low, close)
+        if interval == '1m':
+            if ts % DAY == 0:
+                self.daily_open = open_price
+            self.minute = (ts, open_price, high, low, close)
+            for htf, aggregate in self.aggregates.items():
+                self.update(htf, *aggregate.update(ts, open_price, high, low, close))
+
+    def update_candles(self, interval, candles):
+        """Feed [ts, open, high, low, close, ...] rows, skipping those already seen
+
+        The last seen candle is fed again since it may have been revised.
+        """
+        last = self.last.get(interval)
+        start = len(candles)
+        while start > 0 and (last is None or int(candles[start - 1][0]) >= last):
+            start -= 1
+        for i in range(start, len(candles)):
+            c = candles[i]
+            self.update(interval, c[0], float(c[1]), float(c[2]), float(c[3]), float(c[4]))
+
+    def row(self):
+        ts, open_price, high, low, close = self.minute
+        values = {'Open': open_price, 'High': high, 'Low': low, 'Close': close, 'daily_open': self.daily_open}
+        for interval, indis in self.indis.items():
+            bucket = ts - ts % interval_seconds(interval)
+            current = self.last.get(interval) == bucket
+            for indi in indis:
+                values[indi.name] = indi.signal() if current else np.nan
+        return pd.Series(values, name = ts)
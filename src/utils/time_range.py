@@ -0,0 +1,77 @@
+import numpy as np
+
+#
+# Range selection on frames indexed by sorted integer timestamps
+#
+
+def range_bounds(ts, start, end):
+    """Positions [lo, hi) of the timestamps in [start, end), by binary search"""
+    lo, hi = np.searchsorted(ts, [start, end])
+    return int(lo), int(hi)
+
+def slice_range(frame, start, end):
+    """Rows of ``frame`` with index in [start, end), as a contiguous slice"""
+    if not frame.index.is_monotonic_increasing:
+        frame = frame.sort_index()
+    lo, hi = range_bounds(frame.index.to_numpy(), start, end)
+    return frame.iloc[lo:hi]
+
+def find_gaps(ts, start, end, step):
+    """Missing [from, to) ranges of a sorted, ``step`` spaced timestamp array within [start, end)
+
+    :param ts: sorted timestamps in seconds
+    :param step: expected spacing in seconds, e.g. 60 for 1m klines
+    :return: list of (from, to) tuples, empty when the range is complete
+    """
+    start = start + (-start) % step
+    if end <= start:
+        return []
+    ts = np.asarray(ts, dtype=np.int64)
+    lo, hi = range_bounds(ts, start, end)
+    edges = np.concatenate([[start - step], ts[lo:hi], [end]])
+    missing = np.flatnonzero(np.diff(edges) > step)
+    return [(int(edges[i] + step), int(edges[i + 1])) for i in missing]
+
+def select_range(frame, start, end, step):
+    """``slice_range`` plus the gaps of the selected range, see ``find_gaps``"""
+    selected = slice_range(frame, start, end)
+    return selected, find_gaps(selected.index.to_numpy(), start, end, step)
+
+#
+# Interval sets: sorted lists of disjoint [from, to) ranges
+#
+
+def merge_ranges(ranges):
+    """Union of [from, to) ranges as a sorted interval set, touching ranges are joined"""
+    merged = []
+    for start, end in sorted((int(s), int(e)) for s, e in ranges if e > s):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+def subtract_ranges(start, end, ranges):
+    """Parts of [start, end) that are not in the interval set ``ranges``"""
+    holes = []
+    for r_start, r_end in ranges:
+        if r_end <= start:
+            continue
+        if r_start >= end:
+            break
+        if r_start > start:
+            holes.append((start, r_start))
+        start = max(start, r_end)
+    if start < end:
+        holes.append((start, end))
+    return holes
+
+def runs(ts, step):
+    """Interval set of the ``step`` spaced runs in a sorted timestamp array"""
+    ts = np.asarray(ts, dtype=np.int64)
+    if not len(ts):
+        return []
+    breaks = np.flatnonzero(np.diff(ts) != step) + 1
+    starts = np.concatenate([[0], breaks])
+    ends = np.concatenate([breaks, [len(ts)]]) - 1
+    return [(int(ts[s]), int(ts[e]) + step) for s, e in zip(starts, ends)]
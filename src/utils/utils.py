@@ -1,22 +1,11 @@
 import json
 import logging
-from logging import handlers
-import dateparser
-import pytz
 from decimal import Decimal
-from datetime import datetime
-from pandas import Series
+from datetime import datetime, timezone
 
 from src.utils.constants import *
 
-def get_logger(logger, fname, level = logging.INFO):
-    fh = handlers.RotatingFileHandler(fname, maxBytes=5000000, backupCount=10)
-    fh.setLevel(level)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    fh.setFormatter(formatter)
-    logger.addHandler(fh)
-    logger.setLevel(level)
-    return logger
+from src.utils.log import get_logger
 
 logger = get_logger(logging.getLogger(__name__), 'logs/utils.log')
 
@@ -46,16 +35,17 @@ def date_to_seconds(date_str):
     :param date_str: date in readable format, i.e. "January 01, 2018", "11 hours ago UTC", "now UTC"
     :type date_str: str
     """
-    # get epoch value in UTC
-    epoch = datetime.utcfromtimestamp(0).replace(tzinfo=pytz.utc)
-    # parse our date string
-    d = dateparser.parse(date_str)
+    # ISO dates, e.g. 2021-03-05, do not need dateparser, which takes long to import
+    try:
+        d = datetime.fromisoformat(date_str)
+    except ValueError:
+        import dateparser
+        d = dateparser.parse(date_str)
     # if the date is not timezone aware apply UTC timezone
     if d.tzinfo is None or d.tzinfo.utcoffset(d) is None:
-        d = d.replace(tzinfo=pytz.utc)
+        d = d.replace(tzinfo=timezone.utc)
 
-    # return the difference in time
-    return int((d - epoch).total_seconds())
+    return int(d.timestamp())
 
 
 def interval_to_milliseconds(interval):
@@ -88,8 +78,9 @@ def interval_to_milliseconds(interval):
 def timestamp_to_date(timestamp):    
     return datetime.fromtimestamp(timestamp)
 
-def verify_series(series: Series) -> Series:
+def verify_series(series):
     """If a Pandas Series return it."""
+    from pandas import Series
     if series is not None and isinstance(series, Series):
         return series
 
@@ -98,39 +89,46 @@ def get_offset(x: int) -> int:
     return int(x) if isinstance(x, int) else 0
 
 def start_of_hour(ts):
-    dt = datetime.fromtimestamp(int(ts))
-    return dt.minute == 0
+    return int(ts) % 3600 == 0
 
 def start_of_hour4(ts):
-    dt = datetime.fromtimestamp(int(ts))
-    return dt.minute == 0 and dt.hour %4 == 0
+    return int(ts) % 14400 == 0
 
 def start_of_min15(ts):
-    dt = datetime.fromtimestamp(int(ts))
-    return dt.minute %15 == 0
+    return int(ts) % 900 == 0
 
 def start_of_day(ts):
-    dt = datetime.fromtimestamp(int(ts))
-    return dt.hour == 0 and dt.minute == 0
+    return int(ts) % 86400 == 0
 
 def sameday(first, second):
-    dtf = datetime.fromtimestamp(int(first))
-    dts = datetime.fromtimestamp(int(second))
+    return int(first) // 86400 == int(second) // 86400
 
-    return dtf.year == dts.year and dtf.month == dts.month and dtf.day == dts.day
+def hour_of_day(ts):
+    return int(ts) // 3600 % 24
 
 def percent( f, t ):
     return ((t - f) / f) * 100
 
+BYBIT_INTERVALS = {
+    '1m': 1,
+    '3m': 3,
+    '5m': 5,
+    '15m': 15,
+    '30m': 30,
+    '1h' : 60,
+    '2h': 120,
+    '4h': 240,
+    'D' : 'D'
+}
+
 def interval_bybit_notation(interval):
-    return {
-        '1m': 1,
-        '3m': 3,
-        '5m': 5,
-        '15m': 15,
-        '30m': 30,
-        '1h' : 60,
-        '2h': 120,
-        '4h': 240,
-        'D' : 'D'
-    }[interval]
+    return BYBIT_INTERVALS[interval]
+
+def interval_from_bybit_notation(notation):
+    """Inverse of interval_bybit_notation, accepts 1, '1', 60, 'D', ..."""
+    notation = int(notation) if str(notation).isdigit() else notation
+    return {v: k for k, v in BYBIT_INTERVALS.items()}[notation]
+
+def interval_seconds(interval):
+    notation = interval_bybit_notation(interval)
+    return 86400 if notation == 'D' else notation * 60